@@ -0,0 +1,56 @@
+// Prompt and response schema shared by every analysis path.
+
+export const EXPLANATION_SCHEMA = {
+  type: "object",
+  properties: {
+    error_type: {
+      type: "string",
+      description: "Type of error or 'No errors found' if code is correct"
+    },
+    simple_explanation: {
+      type: "string",
+      description: "Beginner-friendly explanation of the issue"
+    },
+    solution: {
+      type: "string",
+      description: "Step-by-step solution with code examples"
+    },
+    learning_points: {
+      type: "array",
+      items: {
+        type: "string"
+      },
+      description: "Key concepts to remember"
+    },
+    error_line: {
+      type: "number",
+      description: "Line number where the main issue occurs, if there is one"
+    }
+  }
+};
+
+export const buildAnalysisPrompt = ({ code, language, level, errorMessage, notice }) => {
+  const noticeLine = notice ? `\n  Note: ${notice}\n` : '';
+  const errorSection = errorMessage
+    ? `\n  When run, it reported this error:\n  \`\`\`\n  ${errorMessage.trim()}\n  \`\`\`\n`
+    : '';
+
+  return `
+  You are a friendly programming tutor helping a ${level} programmer.
+
+  Analyze this ${language} code and identify any errors or potential issues:
+${noticeLine}
+  \`\`\`${language}
+  ${code}
+  \`\`\`
+${errorSection}
+  Please provide:
+  1. A clear identification of any errors or issues
+  2. A beginner-friendly explanation in simple terms
+  3. Step-by-step solution with code examples
+  4. Key learning points to remember
+
+  Focus on being encouraging and educational rather than just providing fixes.
+  If the code looks correct, explain what it does and suggest improvements.
+`;
+};
@@ -0,0 +1,94 @@
+// Coordinates code analysis requests so that only the most recent one can
+// update the UI. Identical in-flight requests share a single promise and
+// anything superseded is aborted through its AbortController.
+
+export const createAbortError = (message = 'Analysis request was cancelled') => {
+  const error = new Error(message);
+  error.name = 'AbortError';
+  return error;
+};
+
+export const isAbortError = (error) => error?.name === 'AbortError';
+
+// Rejects as soon as the signal fires, even if the underlying call ignores it.
+export const abortable = (promise, signal) => {
+  if (!signal) return promise;
+  if (signal.aborted) return Promise.reject(createAbortError());
+  return new Promise((resolve, reject) => {
+    const onAbort = () => reject(createAbortError());
+    signal.addEventListener('abort', onAbort, { once: true });
+    promise.then(
+      value => {
+        signal.removeEventListener('abort', onAbort);
+        resolve(value);
+      },
+      error => {
+        signal.removeEventListener('abort', onAbort);
+        reject(error);
+      }
+    );
+  });
+};
+
+export const analysisRequestKey = ({ code, language, level, errorMessage = '' }) =>
+  `${language}\u0000${level}\u0000${errorMessage.trim()}\u0000${code}`;
+
+export class AnalysisRequestManager {
+  constructor() {
+    this.inFlight = new Map();
+    this.latestTicket = 0;
+  }
+
+  // Runs `task(signal, emitPartial)` for `key`, or joins the identical
+  // request already in flight. Resolves only for the latest caller; older
+  // callers reject with an AbortError so they never touch the UI. Partial
+  // results go to the most recent caller that asked for them, and a caller
+  // joining late is replayed the latest partial.
+  async run(key, task, { onPartial } = {}) {
+    const ticket = ++this.latestTicket;
+    this.cancelExcept(key);
+
+    let entry = this.inFlight.get(key);
+    if (!entry) {
+      const controller = new AbortController();
+      const emitPartial = (partial) => {
+        entry.lastPartial = partial;
+        if (!controller.signal.aborted && entry.onPartial) entry.onPartial(partial);
+      };
+      entry = { controller, onPartial, lastPartial: undefined };
+      entry.promise = abortable(
+        Promise.resolve().then(() => task(controller.signal, emitPartial)),
+        controller.signal
+      );
+      this.inFlight.set(key, entry);
+      const settle = () => {
+        if (this.inFlight.get(key) === entry) this.inFlight.delete(key);
+      };
+      entry.promise.then(settle, settle);
+    } else if (onPartial) {
+      entry.onPartial = onPartial;
+      if (entry.lastPartial !== undefined) onPartial(entry.lastPartial);
+    }
+
+    const result = await entry.promise;
+    if (ticket !== this.latestTicket) throw createAbortError('Analysis request was superseded');
+    return result;
+  }
+
+  // Aborts every in-flight request except the one for `key` (if any).
+  cancelExcept(key) {
+    for (const [otherKey, entry] of this.inFlight) {
+      if (otherKey === key) continue;
+      entry.controller.abort();
+      this.inFlight.delete(otherKey);
+    }
+  }
+
+  cancelAll() {
+    this.cancelExcept(undefined);
+  }
+
+  hasPending() {
+    return this.inFlight.size > 0;
+  }
+}
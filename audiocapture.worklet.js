@@ -0,0 +1,50 @@
+// Microphone capture for on-device recognition: downmixes to mono,
+// resamples to the model's rate and posts ~100 ms chunks straight to the
+// speech worker over the port it is handed, so audio never passes through
+// the main thread.
+
+class AudioCaptureProcessor extends AudioWorkletProcessor {
+  constructor({ processorOptions }) {
+    super();
+    this.ratio = sampleRate / processorOptions.targetRate;
+    this.chunk = new Float32Array(Math.round(processorOptions.targetRate * processorOptions.chunkMs / 1000));
+    this.filled = 0;
+    this.phase = 0;
+    this.sum = 0;
+    this.count = 0;
+    this.out = null;
+    this.port.onmessage = (event) => {
+      if (event.data.port) this.out = event.data.port;
+    };
+  }
+
+  // Averaging each output sample's span of input doubles as the low-pass
+  // filter the downsampling needs
+  process(inputs) {
+    const channels = inputs[0];
+    if (!this.out || !channels || channels.length === 0) return true;
+
+    const frames = channels[0].length;
+    for (let i = 0; i < frames; i++) {
+      let value = 0;
+      for (let c = 0; c < channels.length; c++) value += channels[c][i];
+      this.sum += value / channels.length;
+      this.count++;
+      this.phase++;
+      if (this.phase >= this.ratio) {
+        this.phase -= this.ratio;
+        this.chunk[this.filled++] = this.sum / this.count;
+        this.sum = 0;
+        this.count = 0;
+        if (this.filled === this.chunk.length) {
+          this.out.postMessage({ type: 'audio', samples: this.chunk }, [this.chunk.buffer]);
+          this.chunk = new Float32Array(this.chunk.length);
+          this.filled = 0;
+        }
+      }
+    }
+    return true;
+  }
+}
+
+registerProcessor('audio-capture', AudioCaptureProcessor);
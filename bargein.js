@@ -0,0 +1,240 @@
+import { speechQueue } from "./speechQueue";
+import { recognitionService } from "./speechRecognition";
+
+// Barge-in: while the app is talking, a voice activity detector
+// (voiceactivity.worklet.js) listens to the microphone, and the moment the
+// student starts to speak the speech stops and recognition starts. The
+// detector keeps a short pre-roll of audio; the on-device recognizer is fed
+// it, so the first word isn't lost while recognition starts. (The browser's
+// recognizer can't be fed audio, but when it is already listening it has
+// heard everything anyway.)
+//
+// The microphone is opened with echo cancellation, which removes the
+// on-device voice (played by the page); the browser's voice is played by
+// the system and can trigger the detector itself, so with it barge-in is
+// off unless the student turns it on (ideally with headphones).
+
+const DEFAULT_OPTIONS = {
+  // Level above the tracked noise floor that counts as speech, and the
+  // absolute level below which nothing does
+  thresholdDb: 15,
+  minDb: -55,
+  onsetMs: 40,
+  releaseMs: 400,
+  preRollMs: 500,
+  maxCaptureMs: 5000,
+  targetRate: 16000,
+  // The microphone stays open this long after the app stops talking, so
+  // the next explanation doesn't wait for it
+  lingerMs: 10000
+};
+
+const MAX_LATENCIES = 200;
+
+const stats = {
+  armed: 0,
+  bargeIns: 0,
+  preRollMs: 0,
+  errors: 0
+};
+// From the onset of the student's speech to the app falling silent, and to
+// recognition running
+let stopLatencies = [];
+let listenLatencies = [];
+
+const recordLatency = (latencies, ms) => {
+  latencies.push(ms);
+  return latencies.length > MAX_LATENCIES ? latencies.slice(-MAX_LATENCIES) : latencies;
+};
+
+export const isBargeInAvailable = () =>
+  typeof AudioWorkletNode !== 'undefined' &&
+  typeof navigator !== 'undefined' &&
+  !!navigator.mediaDevices?.getUserMedia;
+
+// Whether barge-in is on for a user who has not chosen
+export const bargeInByDefault = (speechEngine) => speechEngine === 'local';
+
+// The user's choice, or the default for their voice
+export const wantsBargeIn = (user) => user.barge_in ?? bargeInByDefault(user.speech_engine);
+
+const microphoneGranted = async () => {
+  try {
+    const status = await navigator.permissions.query({ name: 'microphone' });
+    return status.state === 'granted';
+  } catch (error) {
+    // No way to ask without prompting
+    return false;
+  }
+};
+
+class BargeInDetector {
+  constructor() {
+    this.options = DEFAULT_OPTIONS;
+    this.enabled = false;
+    this.armed = false;
+    this.opening = null;
+    this.node = null;
+    this.pendingDrain = null;
+    this.unsubscribe = null;
+  }
+
+  configure(overrides = {}) {
+    this.options = { ...DEFAULT_OPTIONS, ...overrides };
+    this.close();
+    if (this.armed) this.arm({ force: true });
+  }
+
+  // Follows the speech queue: armed whenever the app has something to say
+  setEnabled(enabled) {
+    this.enabled = !!enabled && isBargeInAvailable();
+    if (this.enabled && !this.unsubscribe) {
+      this.unsubscribe = speechQueue.subscribe(state => this.update(state));
+      this.update(speechQueue.getState());
+    } else if (!this.enabled && this.unsubscribe) {
+      this.unsubscribe();
+      this.unsubscribe = null;
+      this.armed = false;
+      this.close();
+    }
+  }
+
+  update(state) {
+    if (state.active) this.arm();
+    else this.disarm();
+  }
+
+  async arm({ force = false } = {}) {
+    clearTimeout(this.lingerTimer);
+    if (this.armed && !force) return;
+    this.armed = true;
+    try {
+      // Never the thing that asks for the microphone: that happens when
+      // the student first chooses to talk
+      if (!(await microphoneGranted()) || !this.armed) return;
+      stats.armed++;
+      await this.open();
+      if (!this.armed) return;
+      this.node.port.postMessage({ type: 'reset' });
+      if (this.context.state === 'suspended') await this.context.resume();
+    } catch (error) {
+      stats.errors++;
+      console.error('Error starting barge-in detection:', error);
+      // Without the microphone there is nothing to retry
+      this.setEnabled(false);
+    }
+  }
+
+  disarm() {
+    if (!this.armed) return;
+    this.armed = false;
+    clearTimeout(this.lingerTimer);
+    this.lingerTimer = setTimeout(() => this.close(), this.options.lingerMs);
+  }
+
+  open() {
+    if (!this.opening) {
+      this.opening = (async () => {
+        const stream = await navigator.mediaDevices.getUserMedia({
+          audio: { echoCancellation: true, noiseSuppression: true, channelCount: 1 }
+        });
+        const context = new AudioContext();
+        this.stream = stream;
+        this.context = context;
+        await context.audioWorklet.addModule(new URL('./voiceactivity.worklet.js', import.meta.url));
+        const node = new AudioWorkletNode(context, 'voice-activity', {
+          processorOptions: this.options
+        });
+        node.port.onmessage = (event) => this.handleMessage(event.data);
+        context.createMediaStreamSource(stream).connect(node);
+        this.node = node;
+      })();
+      this.opening.catch(() => this.close());
+    }
+    return this.opening;
+  }
+
+  close() {
+    clearTimeout(this.lingerTimer);
+    this.stream?.getTracks().forEach(track => track.stop());
+    this.context?.close();
+    this.stream = null;
+    this.context = null;
+    this.node = null;
+    this.opening = null;
+    this.finishDrain(new Float32Array(0));
+  }
+
+  handleMessage(message) {
+    if (message.type === 'speech') {
+      if (this.armed && speechQueue.getState().active) this.bargeIn(this.toPerformanceTime(message.time));
+    } else if (message.type === 'audio') {
+      this.finishDrain(message.samples);
+    }
+  }
+
+  // Worklet timestamps are on the audio clock
+  toPerformanceTime(contextTime) {
+    if (!this.context?.getOutputTimestamp) return performance.now();
+    const { contextTime: now, performanceTime } = this.context.getOutputTimestamp();
+    return performanceTime - (now - contextTime) * 1000;
+  }
+
+  bargeIn(onsetAt) {
+    speechQueue.stop();
+    stats.bargeIns++;
+    stopLatencies = recordLatency(stopLatencies, performance.now() - onsetAt);
+
+    const recognition = recognitionService.getState();
+    if (!recognition.supported) return;
+    if (recognition.running) {
+      listenLatencies = recordLatency(listenLatencies, performance.now() - onsetAt);
+      this.drain();
+      return;
+    }
+
+    const unsubscribe = recognitionService.subscribe((state) => {
+      if (!state.running && state.listening) return;
+      unsubscribe();
+      if (state.running) listenLatencies = recordLatency(listenLatencies, performance.now() - onsetAt);
+    });
+    recognitionService.start({
+      preRoll: () => this.drain().then((samples) => {
+        stats.preRollMs += samples.length * 1000 / this.options.targetRate;
+        return samples;
+      })
+    });
+  }
+
+  // The audio from the start of the pre-roll up to now
+  drain() {
+    if (!this.node) return Promise.resolve(new Float32Array(0));
+    if (!this.pendingDrain) {
+      this.pendingDrain = {};
+      this.pendingDrain.promise = new Promise((resolve) => {
+        this.pendingDrain.resolve = resolve;
+      });
+      this.node.port.postMessage({ type: 'drain' });
+    }
+    return this.pendingDrain.promise;
+  }
+
+  finishDrain(samples) {
+    if (!this.pendingDrain) return;
+    this.pendingDrain.resolve(samples);
+    this.pendingDrain = null;
+  }
+}
+
+export const bargeIn = new BargeInDetector();
+
+export const configureBargeIn = (overrides) => bargeIn.configure(overrides);
+
+export const getBargeInStats = () => {
+  const summarize = (latencies) => {
+    const sorted = [...latencies].sort((a, b) => a - b);
+    const at = (p) => (sorted.length > 0 ? sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))] : null);
+    return { p50Ms: at(0.5), p95Ms: at(0.95), samples: sorted.length };
+  };
+  return { ...stats, stop: summarize(stopLatencies), listen: summarize(listenLatencies) };
+};
@@ -0,0 +1,255 @@
+// Headless benchmark for the analyze flow (the same steps as the Debugger's
+// "Get Help": analyzeCode streaming into the speech queue, then
+// saveAnalysisSession), run against the local stand-in instead of the live
+// LLM, entities and speech engine.
+//
+//   npx vite-node components/debugger/benchmarkAnalyze.js \
+//     [--recordings recordings.json] [--iterations 20] [--seed 1] \
+//     [--out benchmarks/analyze.json] [--baseline benchmarks/previous.json] \
+//     [--providers 2]
+//
+// With --providers N, N independently seeded stand-ins are put behind a
+// ProviderPool so hedging is part of the measurement.
+//
+// vite-node is used so the app's "@/..." aliases resolve. Results are
+// written as JSON tagged with the current commit so runs can be compared.
+
+import { readFile, writeFile, mkdir } from 'node:fs/promises';
+import { execSync } from 'node:child_process';
+import { dirname } from 'node:path';
+import { analyzeCode, saveAnalysisSession } from "./analysisPipeline";
+import { explanationCache } from "./explanationCache";
+import { clearSemanticIndex } from "./semanticCache";
+import { createStandIn } from "./llmStandIn";
+import { ProviderPool } from "./providerPool";
+import { LANGUAGE_EXAMPLES } from "./languageExamples";
+import { hydrateSessions } from "./contentStore";
+import { SpeechQueue, explanationSpeech } from "../voice/speechQueue";
+
+const NOVEL_CODE = `def average(values):
+    total = 0
+    for value in values:
+        total += value
+    return total / len(values)
+
+print(average([]))`;
+
+const RENAMED_CODE = `def mean(numbers):
+    total = 0
+    for number in numbers:
+        total += number
+    return total / len(numbers)
+
+print(mean([]))`;
+
+// Each scenario runs `prepare` before every timed iteration.
+const SCENARIOS = [
+  {
+    name: 'llm-cold',
+    code: NOVEL_CODE,
+    language: 'python',
+    prepare: async () => {
+      await explanationCache.clear();
+      clearSemanticIndex();
+    }
+  },
+  {
+    name: 'cache-warm',
+    code: NOVEL_CODE,
+    language: 'python',
+    prepare: async () => {}
+  },
+  {
+    name: 'similar',
+    code: RENAMED_CODE,
+    language: 'python',
+    prepare: async () => {
+      await explanationCache.clear();
+    }
+  },
+  {
+    name: 'local-example',
+    code: LANGUAGE_EXAMPLES.java,
+    language: 'java',
+    prepare: async () => {}
+  }
+];
+
+const parseArgs = (argv) => {
+  const args = {};
+  for (let i = 0; i < argv.length; i += 2) args[argv[i].replace(/^--/, '')] = argv[i + 1];
+  return args;
+};
+
+const percentile = (sorted, p) => sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))];
+
+const summarize = (values) => {
+  const present = values.filter(value => value != null).sort((a, b) => a - b);
+  if (present.length === 0) return null;
+  const round = (value) => Math.round(value * 10) / 10;
+  return {
+    p50: round(percentile(present, 0.5)),
+    p95: round(percentile(present, 0.95)),
+    mean: round(present.reduce((sum, value) => sum + value, 0) / present.length)
+  };
+};
+
+// Stands in for speechSynthesis: an utterance "starts" as soon as it is
+// handed over, which is what time-to-first-audio measures.
+const createSilentSynth = () => ({
+  speak: (utterance) => queueMicrotask(() => utterance.onstart && utterance.onstart()),
+  cancel: () => {}
+});
+
+class SilentUtterance {
+  constructor(text) {
+    this.text = text;
+  }
+}
+
+const hasContent = (partial) =>
+  !!(partial && (partial.error_type || partial.simple_explanation || partial.solution));
+
+// One "Get Help" press, timed from the click.
+const runOnce = async ({ scenario, standIn, invoke, userProfile }) => {
+  const level = userProfile.programming_level;
+  const started = performance.now();
+  let firstContent = null;
+  let speechStart = null;
+
+  const speech = new SpeechQueue({ synth: createSilentSynth(), Utterance: SilentUtterance });
+  speech.subscribe((state) => {
+    if (speechStart === null && state.speaking) speechStart = performance.now() - started;
+  });
+  speech.begin();
+
+  const response = await analyzeCode({
+    code: scenario.code,
+    language: scenario.language,
+    level,
+    invoke,
+    onPartial: (partial) => {
+      if (firstContent === null && hasContent(partial)) firstContent = performance.now() - started;
+      speech.feed(explanationSpeech(partial, { complete: false }));
+    }
+  });
+  const fullRender = performance.now() - started;
+  if (firstContent === null) firstContent = fullRender;
+  speech.feed(explanationSpeech(response), { final: true });
+  await Promise.resolve();
+  if (speechStart === null) speechStart = performance.now() - started;
+  speech.stop();
+
+  const persistStarted = performance.now();
+  await saveAnalysisSession({
+    code: scenario.code,
+    language: scenario.language,
+    level,
+    response,
+    userProfile,
+    entities: standIn.entities
+  });
+  const persistence = performance.now() - persistStarted;
+
+  return { source: response.source, firstContent, fullRender, speechStart, persistence };
+};
+
+// History payload as the Dashboard/Debugger load it, and what is stored,
+// compared with the same sessions carrying their text inline.
+const measureStorage = async (standIn, userProfile) => {
+  const { DebuggingSession, ContentBlob } = standIn.entities;
+  const history = await DebuggingSession.filter({ created_by: userProfile.email }, '-created_date', 200);
+  const blobs = await ContentBlob.list();
+  const inline = await hydrateSessions(history, { entities: standIn.entities });
+  const bytes = (value) => Buffer.byteLength(JSON.stringify(value));
+  return {
+    sessions: history.length,
+    blobs: blobs.length,
+    historyBytes: bytes(history),
+    storedBytes: bytes(history) + bytes(blobs),
+    inlineHistoryBytes: bytes(inline)
+  };
+};
+
+const gitCommit = () => {
+  try {
+    return execSync('git rev-parse --short HEAD', { encoding: 'utf8', stdio: ['ignore', 'pipe', 'ignore'] }).trim();
+  } catch (error) {
+    return null;
+  }
+};
+
+const main = async () => {
+  const args = parseArgs(process.argv.slice(2));
+  const iterations = parseInt(args.iterations || '20', 10);
+  const recordings = args.recordings ? JSON.parse(await readFile(args.recordings, 'utf8')) : [];
+  const seed = parseInt(args.seed || '1', 10);
+  const standIn = createStandIn(recordings, { seed });
+  const userProfile = await standIn.entities.User.me();
+
+  const providerCount = parseInt(args.providers || '1', 10);
+  const pool = providerCount > 1
+    ? new ProviderPool(
+      Array.from({ length: providerCount }, (_, i) => ({
+        name: `stand-in-${i + 1}`,
+        invoke: i === 0 ? standIn.InvokeLLM : createStandIn(recordings, { seed: seed + i }).InvokeLLM
+      }))
+    )
+    : null;
+  const invoke = pool ? pool.invoke : standIn.InvokeLLM;
+
+  const scenarios = {};
+  for (const scenario of SCENARIOS) {
+    const runs = [];
+    for (let i = 0; i < iterations; i++) {
+      await scenario.prepare();
+      runs.push(await runOnce({ scenario, standIn, invoke, userProfile }));
+    }
+    scenarios[scenario.name] = {
+      iterations,
+      sources: runs.reduce((counts, run) => ({ ...counts, [run.source]: (counts[run.source] || 0) + 1 }), {}),
+      timeToFirstContentMs: summarize(runs.map(run => run.firstContent)),
+      timeToFullRenderMs: summarize(runs.map(run => run.fullRender)),
+      timeToSpeechStartMs: summarize(runs.map(run => run.speechStart)),
+      persistenceMs: summarize(runs.map(run => run.persistence))
+    };
+    console.log(scenario.name, JSON.stringify(scenarios[scenario.name]));
+  }
+
+  const report = {
+    commit: gitCommit(),
+    date: new Date().toISOString(),
+    node: process.version,
+    iterations,
+    seed,
+    providers: providerCount,
+    standInCalls: standIn.calls,
+    providerPool: pool ? pool.stats() : null,
+    scenarios,
+    storage: await measureStorage(standIn, userProfile)
+  };
+  console.log('storage', JSON.stringify(report.storage));
+
+  const out = args.out || `benchmarks/analyze-${report.commit || 'local'}.json`;
+  await mkdir(dirname(out), { recursive: true });
+  await writeFile(out, `${JSON.stringify(report, null, 2)}\n`);
+  console.log(`Wrote ${out}`);
+
+  if (args.baseline) {
+    const baseline = JSON.parse(await readFile(args.baseline, 'utf8'));
+    for (const [name, current] of Object.entries(scenarios)) {
+      const previous = baseline.scenarios?.[name];
+      if (!previous) continue;
+      for (const metric of ['timeToFirstContentMs', 'timeToFullRenderMs', 'timeToSpeechStartMs', 'persistenceMs']) {
+        if (!current[metric] || !previous[metric]) continue;
+        const delta = current[metric].p50 - previous[metric].p50;
+        console.log(`${name} ${metric} p50: ${previous[metric].p50} -> ${current[metric].p50} (${delta >= 0 ? '+' : ''}${delta.toFixed(1)})`);
+      }
+    }
+  }
+};
+
+main().catch((error) => {
+  console.error('Error running analyze benchmark:', error);
+  process.exit(1);
+});
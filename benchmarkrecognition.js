@@ -0,0 +1,203 @@
+import { LocalSpeechRecognition } from "./localRecognition";
+import { recognitionService } from "./speechRecognition";
+import { CommandRecognizer, DEBUGGER_COMMANDS, normalizeWords } from "./voiceCommands";
+
+// Compares on-device recognition with the browser's engine on recorded
+// fixtures: word error rate, command accuracy, and latency from the end of
+// the audio to the final transcript. Runs in the browser (the native engine
+// only listens to the microphone, so its fixtures are played through the
+// speakers; use a quiet room). From the dev console:
+//
+//   const { runRecognitionBenchmark } = await import('/src/components/voice/benchmarkRecognition.js');
+//   await runRecognitionBenchmark('/fixtures/speech/manifest.json');
+//
+// The manifest is { "fixtures": [{ "audio": "go-to-tutorials.wav",
+// "transcript": "go to tutorials" }, ...] } with audio paths relative to it.
+// The local engine is fed the same audio in real time, as the microphone
+// would deliver it, followed by the same trailing silence.
+
+const SAMPLE_RATE = 16000;
+const CHUNK_MS = 100;
+const TRAILING_SILENCE_MS = 1500;
+const RESULT_TIMEOUT_MS = 8000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+const loadFixture = async (url) => {
+  const data = await (await fetch(url)).arrayBuffer();
+  const context = new AudioContext();
+  const buffer = await context.decodeAudioData(data);
+  context.close();
+
+  const offline = new OfflineAudioContext(1, Math.ceil(buffer.duration * SAMPLE_RATE), SAMPLE_RATE);
+  const source = offline.createBufferSource();
+  source.buffer = buffer;
+  source.connect(offline.destination);
+  source.start();
+  const rendered = await offline.startRendering();
+  return { buffer, samples: rendered.getChannelData(0) };
+};
+
+// The first final transcript and when it arrived, or null on timeout
+const nextFinal = (recognition) => new Promise((resolve) => {
+  const timer = setTimeout(() => resolve(null), RESULT_TIMEOUT_MS);
+  recognition.onresult = (event) => {
+    for (let i = event.resultIndex; i < event.results.length; i++) {
+      if (event.results[i].isFinal) {
+        clearTimeout(timer);
+        resolve({ transcript: event.results[i][0].transcript, at: performance.now() });
+        return;
+      }
+    }
+  };
+});
+
+const runLocal = async (recognition, samples) => {
+  await recognition.prepare();
+  const final = nextFinal(recognition);
+  const padded = new Float32Array(samples.length + SAMPLE_RATE * TRAILING_SILENCE_MS / 1000);
+  padded.set(samples);
+
+  const chunk = SAMPLE_RATE * CHUNK_MS / 1000;
+  let speechEnd = null;
+  for (let i = 0; i < padded.length; i += chunk) {
+    recognition.feedAudio(padded.slice(i, i + chunk));
+    if (speechEnd === null && i + chunk >= samples.length) speechEnd = performance.now();
+    await sleep(CHUNK_MS);
+  }
+  recognition.flush();
+  const result = await final;
+  return result && { transcript: result.transcript, latencyMs: result.at - speechEnd };
+};
+
+const runNative = async (buffer) => {
+  const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+  const recognition = new SpeechRecognition();
+  recognition.lang = 'en-US';
+  const listening = new Promise(resolve => {
+    recognition.onaudiostart = resolve;
+  });
+  const final = nextFinal(recognition);
+  recognition.start();
+  await listening;
+
+  const context = new AudioContext();
+  const source = context.createBufferSource();
+  source.buffer = buffer;
+  source.connect(context.destination);
+  const played = new Promise(resolve => {
+    source.onended = () => resolve(performance.now());
+  });
+  source.start();
+  const speechEnd = await played;
+  const result = await final;
+  recognition.abort();
+  context.close();
+  return result && { transcript: result.transcript, latencyMs: result.at - speechEnd };
+};
+
+export const wordErrorRate = (reference, hypothesis) => {
+  const ref = normalizeWords(reference);
+  const hyp = normalizeWords(hypothesis);
+  let previous = Array.from({ length: hyp.length + 1 }, (_, j) => j);
+  for (let i = 1; i <= ref.length; i++) {
+    const current = [i];
+    for (let j = 1; j <= hyp.length; j++) {
+      current[j] = Math.min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref[i - 1] === hyp[j - 1] ? 0 : 1));
+    }
+    previous = current;
+  }
+  return ref.length > 0 ? previous[hyp.length] / ref.length : hyp.length;
+};
+
+const commandOf = (text) => new CommandRecognizer(DEBUGGER_COMMANDS).feed(text || '', { final: true })?.name || null;
+
+// Ordinary sentences a student says that start close to a command phrase;
+// none of them may be taken for a command
+export const COMMAND_NEAR_MISSES = [
+  'clean up my code',
+  'clearer names would help',
+  'cleared the list but it still fails',
+  'repeated code in two functions',
+  'replace the loop with a map',
+  'stopped working after I added this',
+  'stops before the last item',
+  'skipped the first element',
+  'helper function returns none',
+  'helpful error messages',
+  'starting over the loop twice',
+  'analysis of the second line',
+  'debugging prints everywhere',
+  'going to dashboard later',
+  'open file fails',
+  'what color is the text',
+  'what does scope mean',
+  'how do I step through it',
+  'why do I need to clear the list first'
+];
+
+// Near misses that fire a command, with the command; empty when all pass.
+// Needs no audio, so it also runs outside the browser.
+export const checkCommandNearMisses = (sentences = COMMAND_NEAR_MISSES) =>
+  sentences.map(text => ({ text, command: commandOf(text) })).filter(({ command }) => command !== null);
+
+const percentile = (sorted, p) => (sorted.length > 0 ? sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))] : null);
+
+const summarize = (runs) => {
+  const heard = runs.filter(run => run.result);
+  const latencies = heard.map(run => run.result.latencyMs).sort((a, b) => a - b);
+  const withCommand = runs.filter(run => run.expectedCommand);
+  const round = (value) => (value === null ? null : Math.round(value * 10) / 10);
+  return {
+    fixtures: runs.length,
+    missed: runs.length - heard.length,
+    wordErrorRate: round(runs.reduce((sum, run) => sum + wordErrorRate(run.transcript, run.result?.transcript || ''), 0) / runs.length),
+    commandAccuracy: withCommand.length > 0
+      ? round(withCommand.filter(run => commandOf(run.result?.transcript) === run.expectedCommand).length / withCommand.length)
+      : null,
+    latencyP50Ms: round(percentile(latencies, 0.5)),
+    latencyP95Ms: round(percentile(latencies, 0.95))
+  };
+};
+
+export const runRecognitionBenchmark = async (manifestUrl, { engines = ['local', 'native'] } = {}) => {
+  // The shared recognizer would hear the fixtures too
+  recognitionService.stop();
+  const base = new URL(manifestUrl, window.location.href);
+  const { fixtures } = await (await fetch(base)).json();
+  const hasNative = !!(window.SpeechRecognition || window.webkitSpeechRecognition);
+  const local = new LocalSpeechRecognition();
+  local.continuous = true;
+
+  const runs = { local: [], native: [] };
+  for (const fixture of fixtures) {
+    const { buffer, samples } = await loadFixture(new URL(fixture.audio, base));
+    const expectedCommand = commandOf(fixture.transcript);
+    for (const engine of engines) {
+      if (engine === 'native' && !hasNative) continue;
+      let result = null;
+      try {
+        result = engine === 'local' ? await runLocal(local, samples.slice()) : await runNative(buffer);
+      } catch (error) {
+        console.error(`Error running ${engine} recognition on ${fixture.audio}:`, error);
+      }
+      runs[engine].push({ audio: fixture.audio, transcript: fixture.transcript, expectedCommand, result });
+      await sleep(500);
+    }
+  }
+
+  const report = {};
+  for (const engine of engines) {
+    if (runs[engine].length === 0) continue;
+    report[engine] = summarize(runs[engine]);
+    console.table(runs[engine].map(run => ({
+      audio: run.audio,
+      expected: run.transcript,
+      heard: run.result?.transcript ?? '(nothing)',
+      latencyMs: run.result ? Math.round(run.result.latencyMs) : null
+    })));
+  }
+  report.commandNearMisses = checkCommandNearMisses();
+  console.log('Recognition benchmark:', report);
+  return report;
+};
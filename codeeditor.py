@@ -1,76 +1,35 @@
-import React, { useState } from 'react';
+import React, { useState, useRef, memo } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
-import { Textarea } from "@/components/ui/textarea";
+import { Input } from "@/components/ui/input";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "@/components/ui/select";
 import { Badge } from "@/components/ui/badge";
-import { Play, Copy, RotateCcw } from "lucide-react";
+import { Play, Copy, RotateCcw, FolderOpen, FileCode, X } from "lucide-react";
+import { LANGUAGE_EXAMPLES } from "./languageExamples";
+import { readProjectFiles } from "./projectFiles";
+import VirtualCodeEditor from "./VirtualCodeEditor";
+import { useCodeStore } from "./codeStore";
+import { countRender } from "./renderProbe";
 
-const LANGUAGE_EXAMPLES = {
-  python: `# Example Python code with an error
-def greet_user(name):
-    print("Hello " + name)
-    return name.upper()
-
-# This will cause an error
-result = greet_user()  # Missing required argument
-print(result)`,
-  
-  javascript: `// Example JavaScript code with an error
-function calculateArea(radius) {
-    return 3.14 * radius * radius;
-}
-
-// This will cause an error
-let area = calculateArea();  // Missing required argument
-console.log("Area is: " + area);`,
-
-  java: `// Example Java code with an error
-public class Main {
-    public static void main(String[] args) {
-        String name;
-        System.out.println("Hello " + name);  // Variable not initialized
-    }
-}`,
-
-  cpp: `// Example C++ code with an error
-#include <iostream>
-using namespace std;
-
-int main() {
-    int numbers[5] = {1, 2, 3, 4, 5};
-    cout << numbers[10] << endl;  // Array index out of bounds
-    return 0;
-}`,
-
-  html_css: `<!-- Example HTML/CSS with an error -->
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        .container {
-            color: blue;
-            background-color: #fff
-            /* Missing semicolon above */
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <p>Hello World!</p>
-    </div>
-</body>
-</html>`
-};
-
-export default function CodeEditor({ 
-  code, 
+// `codeStore` holds the code and error message (see codeStore.js); only
+// this component subscribes to them, so edits do not re-render the page.
+function CodeEditor({ 
+  codeStore,
   language, 
-  onCodeChange, 
   onLanguageChange,
-  onAnalyze 
+  onAnalyze,
+  projectFiles = [],
+  onProjectFilesChange
 }) {
+  countRender('CodeEditor');
+  const code = useCodeStore(codeStore, state => state.code);
+  const errorMessage = useCodeStore(codeStore, state => state.errorMessage);
   const [isAnalyzing, setIsAnalyzing] = useState(false);
+  const projectInputRef = useRef(null);
+  const editorRef = useRef(null);
+  const isProject = projectFiles.length > 0;
+
+  const onCodeChange = (value) => codeStore.setState({ code: value });
 
   const handleLanguageChange = (newLanguage) => {
     onLanguageChange(newLanguage);
@@ -79,18 +38,30 @@ export default function CodeEditor({
 
   const handleAnalyze = async () => {
     setIsAnalyzing(true);
+    // Commit any unsent keystrokes to the store before it is read
+    editorRef.current?.flush();
     await onAnalyze();
     setIsAnalyzing(false);
   };
 
   const copyToClipboard = () => {
-    navigator.clipboard.writeText(code);
+    navigator.clipboard.writeText(editorRef.current?.flush() ?? code);
   };
 
   const resetCode = () => {
     onCodeChange(LANGUAGE_EXAMPLES[language] || '');
   };
 
+  const handleProjectUpload = async (e) => {
+    try {
+      const files = await readProjectFiles(e.target.files);
+      if (files.length > 0) onProjectFilesChange(files);
+    } catch (error) {
+      console.error('Error reading project files:', error);
+    }
+    e.target.value = '';
+  };
+
   return (
     <Card className="shadow-lg border-0 bg-white/80 backdrop-blur-sm">
       <CardHeader className="pb-4">
@@ -155,17 +126,74 @@ export default function CodeEditor({
               <RotateCcw className="w-4 h-4" />
               Reset
             </Button>
+
+            {onProjectFilesChange && (
+              <>
+                <input
+                  ref={projectInputRef}
+                  type="file"
+                  multiple
+                  accept=".zip,.py,.js,.jsx,.mjs,.ts,.tsx,.java,.c,.cc,.cpp,.cxx,.h,.hpp,.html,.htm,.css"
+                  onChange={handleProjectUpload}
+                  className="hidden"
+                />
+                <Button
+                  variant="outline"
+                  size="sm"
+                  onClick={() => projectInputRef.current?.click()}
+                  className="flex items-center gap-2"
+                >
+                  <FolderOpen className="w-4 h-4" />
+                  Project
+                </Button>
+              </>
+            )}
           </div>
         </div>
       </CardHeader>
       
       <CardContent className="space-y-4">
-        <Textarea
-          value={code}
-          onChange={(e) => onCodeChange(e.target.value)}
-          placeholder="Paste your code here or use the example above..."
-          className="min-h-64 font-mono text-sm bg-gray-50 border-gray-200"
-          style={{ fontFamily: 'Consolas, Monaco, "Courier New", monospace' }}
+        {isProject ? (
+          <div className="min-h-64 rounded-md border border-gray-200 bg-gray-50 p-4">
+            <div className="flex justify-between items-center mb-3">
+              <p className="text-sm font-medium text-gray-700">
+                Project with {projectFiles.length} file{projectFiles.length === 1 ? '' : 's'}
+              </p>
+              <Button
+                variant="ghost"
+                size="sm"
+                onClick={() => onProjectFilesChange([])}
+                className="flex items-center gap-2"
+              >
+                <X className="w-4 h-4" />
+                Single file
+              </Button>
+            </div>
+            <div className="space-y-1">
+              {projectFiles.map((file) => (
+                <div key={file.path} className="flex items-center gap-2 text-sm font-mono text-gray-700">
+                  <FileCode className="w-4 h-4 text-gray-400 flex-shrink-0" />
+                  <span className="truncate">{file.path}</span>
+                  <span className="text-xs text-gray-400">{file.content.split('\n').length} lines</span>
+                </div>
+              ))}
+            </div>
+          </div>
+        ) : (
+          <VirtualCodeEditor
+            ref={editorRef}
+            value={code}
+            onChange={onCodeChange}
+            language={language}
+            placeholder="Paste your code here or use the example above..."
+          />
+        )}
+
+        <Input
+          value={errorMessage}
+          onChange={(e) => codeStore.setState({ errorMessage: e.target.value })}
+          placeholder="Got an error message? Paste it here (optional)"
+          className="font-mono text-sm bg-gray-50 border-gray-200"
         />
         
         <div className="flex justify-between items-center">
@@ -175,7 +203,7 @@ export default function CodeEditor({
           
           <Button 
             onClick={handleAnalyze}
-            disabled={isAnalyzing || !code.trim()}
+            disabled={isAnalyzing || (!isProject && !code.trim())}
             className="bg-gradient-to-r from-blue-500 to-indigo-600 hover:from-blue-600 hover:to-indigo-700 text-white px-8"
           >
             {isAnalyzing ? (
@@ -194,4 +222,6 @@ export default function CodeEditor({
       </CardContent>
     </Card>
   );
-}
\ No newline at end of file
+}
+
+export default memo(CodeEditor);
\ No newline at end of file
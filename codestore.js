@@ -0,0 +1,29 @@
+import { useSyncExternalStore } from 'react';
+
+// Small external store for what the user is typing (code and error
+// message). Components subscribe to the slice they render, so an edit
+// re-renders the editor rather than the whole Debugger page; everything
+// else reads the current value with getState() when it needs it.
+
+export const createCodeStore = (initialState) => {
+  let state = initialState;
+  const listeners = new Set();
+
+  return {
+    getState: () => state,
+    setState(update) {
+      const changes = typeof update === 'function' ? update(state) : update;
+      if (Object.keys(changes).every(key => changes[key] === state[key])) return;
+      state = { ...state, ...changes };
+      listeners.forEach(listener => listener(state));
+    },
+    subscribe(listener) {
+      listeners.add(listener);
+      return () => listeners.delete(listener);
+    }
+  };
+};
+
+// `selector` should return a primitive or a stable reference.
+export const useCodeStore = (store, selector) =>
+  useSyncExternalStore(store.subscribe, () => selector(store.getState()));
@@ -0,0 +1,204 @@
+import { ContentBlob } from "@/entities/all";
+import { hashText } from "./explanationCache";
+
+// Content-addressed storage for the large text fields of a debugging
+// session. Each distinct text is stored once as a ContentBlob keyed by its
+// SHA-256, deflate-compressed when that helps; the session keeps a
+// "blob:<hash>" reference in the field instead. Blobs never change, so once
+// fetched (or written) they are cached for the life of the tab.
+//
+// Blobs are readable only by the student who created them, so text is
+// deduplicated per student: the same text saved by two students is stored
+// twice. Which blobs a student already has is remembered per `owner`.
+
+export const BLOB_REF_PREFIX = 'blob:';
+export const BLOB_FIELDS = ['code_input', 'explanation_provided', 'solution_suggested'];
+export const PREVIEW_CHARS = 60;
+
+// Shorter text is stored inline: a reference would not be much smaller
+const INLINE_MAX_CHARS = 96;
+// 128 bits of the SHA-256 keep references short without risking collisions
+const HASH_CHARS = 32;
+const COMPRESS_MIN_CHARS = 256;
+const BULK_LOAD_MIN = 8;
+const BULK_LOAD_LIMIT = 1000;
+
+const texts = new Map();
+// owner -> hashes of blobs that owner can read
+const stored = new Map();
+const inflight = new Map();
+
+const stats = {
+  blobsWritten: 0,
+  deduplicated: 0,
+  inlined: 0,
+  bytesIn: 0,
+  bytesWritten: 0,
+  blobsFetched: 0,
+  fetchHits: 0
+};
+
+export const isBlobRef = (value) => typeof value === 'string' && value.startsWith(BLOB_REF_PREFIX);
+
+// Without an owner nothing is remembered and every write checks the server
+const storedBy = (owner) => {
+  if (!owner) return new Set();
+  if (!stored.has(owner)) stored.set(owner, new Set());
+  return stored.get(owner);
+};
+
+const toBase64 = (bytes) => {
+  let binary = '';
+  for (let i = 0; i < bytes.length; i += 0x8000) {
+    binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+  }
+  return btoa(binary);
+};
+
+const fromBase64 = (data) => Uint8Array.from(atob(data), c => c.charCodeAt(0));
+
+const pipe = async (bytes, transform) =>
+  new Uint8Array(await new Response(new Blob([bytes]).stream().pipeThrough(transform)).arrayBuffer());
+
+// Returns { encoding, data }; plain when compression is unavailable or does
+// not pay for its base64 overhead.
+export const compressText = async (text) => {
+  if (text.length < COMPRESS_MIN_CHARS || typeof CompressionStream === 'undefined') {
+    return { encoding: 'plain', data: text };
+  }
+  const compressed = await pipe(new TextEncoder().encode(text), new CompressionStream('deflate-raw'));
+  const data = toBase64(compressed);
+  return data.length < text.length ? { encoding: 'deflate-raw', data } : { encoding: 'plain', data: text };
+};
+
+export const decompressText = async ({ encoding, data }) => {
+  if (encoding === 'plain') return data;
+  if (encoding !== 'deflate-raw') throw new Error(`Unknown blob encoding: ${encoding}`);
+  return new TextDecoder().decode(await pipe(fromBase64(data), new DecompressionStream('deflate-raw')));
+};
+
+// Stores `text` once per owner (the user's email) and resolves to the value
+// to put in the session field.
+export const storeContent = async (text, { entities = { ContentBlob }, owner = null } = {}) => {
+  if (!text || text.length <= INLINE_MAX_CHARS || !entities.ContentBlob) {
+    if (text) stats.inlined++;
+    return text;
+  }
+  const hash = (await hashText(text)).slice(0, HASH_CHARS);
+  const ref = BLOB_REF_PREFIX + hash;
+  stats.bytesIn += text.length;
+  texts.set(hash, text);
+  const known = storedBy(owner);
+
+  if (known.has(hash)) {
+    stats.deduplicated++;
+    return ref;
+  }
+  const existing = await entities.ContentBlob.filter({ hash }, null, 1);
+  if (existing.length > 0) {
+    known.add(hash);
+    stats.deduplicated++;
+    return ref;
+  }
+
+  const { encoding, data } = await compressText(text);
+  await entities.ContentBlob.create({ hash, encoding, data, size: text.length });
+  known.add(hash);
+  stats.blobsWritten++;
+  stats.bytesWritten += data.length;
+  return ref;
+};
+
+const fetchBlob = (hash, entities, owner) => {
+  if (!inflight.has(hash)) {
+    const request = (async () => {
+      const [blob] = await entities.ContentBlob.filter({ hash }, null, 1);
+      if (!blob) throw new Error(`Missing content blob ${hash}`);
+      const text = await decompressText(blob);
+      texts.set(hash, text);
+      storedBy(owner).add(hash);
+      stats.blobsFetched++;
+      return text;
+    })();
+    inflight.set(hash, request);
+    request.catch(() => {}).finally(() => inflight.delete(hash));
+  }
+  return inflight.get(hash);
+};
+
+// Resolves a field value that may be a blob reference; unreadable blobs
+// come back as an empty string rather than failing the whole page.
+export const loadContent = async (value, { entities = { ContentBlob }, owner = null } = {}) => {
+  if (!isBlobRef(value)) return value;
+  const hash = value.slice(BLOB_REF_PREFIX.length);
+  if (texts.has(hash)) {
+    stats.fetchHits++;
+    return texts.get(hash);
+  }
+  try {
+    return await fetchBlob(hash, entities, owner);
+  } catch (error) {
+    console.error('Error loading session content:', error);
+    return '';
+  }
+};
+
+// One list call for the user's blobs (reads are scoped to the creator),
+// cheaper than a filter call per hash when many are missing.
+const preloadBlobs = async (entities, owner) => {
+  const blobs = await entities.ContentBlob.list('-created_date', BULK_LOAD_LIMIT);
+  const known = storedBy(owner);
+  await Promise.all(blobs.map(async (blob) => {
+    known.add(blob.hash);
+    if (texts.has(blob.hash)) return;
+    texts.set(blob.hash, await decompressText(blob));
+    stats.blobsFetched++;
+  }));
+};
+
+// Replaces blob references in the sessions' text fields with the text.
+// Each distinct blob is fetched once, however many sessions share it.
+export const hydrateSessions = async (sessions, { entities = { ContentBlob }, owner = null } = {}) => {
+  const missing = new Set();
+  for (const session of sessions) {
+    for (const field of BLOB_FIELDS) {
+      if (isBlobRef(session[field])) {
+        const hash = session[field].slice(BLOB_REF_PREFIX.length);
+        if (!texts.has(hash)) missing.add(hash);
+      }
+    }
+  }
+  if (missing.size > BULK_LOAD_MIN) {
+    try {
+      await preloadBlobs(entities, owner);
+    } catch (error) {
+      console.error('Error preloading session content:', error);
+    }
+  }
+
+  return Promise.all(sessions.map(async (session) => {
+    const hydrated = { ...session };
+    await Promise.all(BLOB_FIELDS.map(async (field) => {
+      hydrated[field] = await loadContent(session[field], { entities, owner });
+    }));
+    return hydrated;
+  }));
+};
+
+// Session fields with the large text moved to blobs.
+export const storeSessionContent = async (fields, options) => {
+  const result = { ...fields };
+  await Promise.all(BLOB_FIELDS.map(async (field) => {
+    result[field] = await storeContent(fields[field], options);
+  }));
+  if (fields.explanation_provided) {
+    result.explanation_preview = fields.explanation_provided.slice(0, PREVIEW_CHARS);
+  }
+  return result;
+};
+
+// Short explanation for lists, without fetching any blobs.
+export const sessionPreview = (session) =>
+  session.explanation_preview || (isBlobRef(session.explanation_provided) ? '' : session.explanation_provided || '');
+
+export const getContentStoreStats = () => ({ ...stats, cachedTexts: texts.size });
@@ -0,0 +1,199 @@
+import { buildAnalysisPrompt } from "./analysisPrompt";
+import { summarizeExplanation } from "./incrementalAnalysis";
+import { estimateTokens, outlineLines } from "./promptBudget";
+import { invokeLLMStreaming } from "./streamingLLM";
+import { analysisProviderPool } from "./providerPool";
+
+// Follow-up questions about an analysis ("why does upper() fail?"). Each
+// analysis starts a conversation that keeps the code and the explanation;
+// a question is sent with a compact context (the program or its outline
+// and the lines around the error, a summary of the explanation, earlier
+// turns) instead of the whole analysis prompt again. The context comes
+// first and the prompt only grows at the end, so providers with prompt
+// caching reuse the shared prefix from one question to the next.
+
+// Programs this small are cheaper to include whole than to outline
+const WHOLE_PROGRAM_TOKENS = 150;
+const CONTEXT_LINES = 3;
+const MAX_QUESTION_LINES = 8;
+const MAX_TURNS = 6;
+const ANSWER_CHARS = 400;
+const MAX_LATENCIES = 200;
+
+export const FOLLOW_UP_SCHEMA = {
+  type: "object",
+  properties: {
+    answer: {
+      type: "string",
+      description: "Short, beginner-friendly answer to the question"
+    },
+    code_example: {
+      type: "string",
+      description: "A short code example, only if it helps answer the question"
+    }
+  }
+};
+
+const stats = {
+  conversations: 0,
+  followUps: 0,
+  promptTokens: 0,
+  baselineTokens: 0
+};
+let followUpLatencies = [];
+let analysisLatencies = [];
+
+const recordLatency = (latencies, ms) => {
+  latencies.push(ms);
+  return latencies.length > MAX_LATENCIES ? latencies.slice(-MAX_LATENCIES) : latencies;
+};
+
+const QUESTION_START = /^(why|what|what's|whats|how|where|when|which|who|can|could|should|would|will|does|do|did|is|are|isn't|doesn't|explain|tell me)\b/i;
+
+// Whether a spoken or typed sentence asks something, as opposed to code
+// being dictated
+export const isFollowUpQuestion = (text) => {
+  const trimmed = (text || '').trim();
+  return trimmed.endsWith('?') || QUESTION_START.test(trimmed);
+};
+
+const truncate = (text = '', limit = ANSWER_CHARS) =>
+  text.length > limit ? `${text.slice(0, limit)}...` : text;
+
+const numbered = (lines, indices) => indices.map(index => `${index + 1}: ${lines[index]}`).join('\n');
+
+const IDENTIFIER = /[A-Za-z_$][\w$]*/g;
+
+let nextId = 0;
+
+export class AnalysisConversation {
+  constructor({ code, language, level, errorMessage = '', explanation }) {
+    this.id = `conversation-${Date.now().toString(36)}-${++nextId}`;
+    this.code = code;
+    this.language = language;
+    this.level = level;
+    this.errorMessage = errorMessage;
+    this.explanation = explanation;
+    this.lines = code.replace(/\r\n?/g, '\n').split('\n');
+    this.turns = [];
+    this.whole = estimateTokens(code, language) <= WHOLE_PROGRAM_TOKENS;
+    this.shown = new Set();
+    this.context = this.buildContext();
+    // What answering by resending everything would start from
+    this.baselinePrompt = buildAnalysisPrompt({ code, language, level, errorMessage });
+    stats.conversations++;
+  }
+
+  buildContext() {
+    const { lines, explanation, language } = this;
+    let program;
+    if (this.whole) {
+      lines.forEach((_, index) => this.shown.add(index));
+      program = `Their program:\n  \`\`\`${language}\n${numbered(lines, [...this.shown])}\n  \`\`\``;
+    } else {
+      const outline = outlineLines(lines).map(({ line, index }) => `${index + 1}: ${line.trim()}`).join('\n');
+      program = `Program outline (${lines.length} lines):\n  ${outline || '(no declarations)'}`;
+      const errorLine = explanation.error_line;
+      if (errorLine > 0 && errorLine <= lines.length) {
+        const around = [];
+        for (let i = Math.max(0, errorLine - 1 - CONTEXT_LINES); i < Math.min(lines.length, errorLine + CONTEXT_LINES); i++) {
+          around.push(i);
+          this.shown.add(i);
+        }
+        program += `\n\n  Lines around the issue:\n  \`\`\`${language}\n${numbered(lines, around)}\n  \`\`\``;
+      }
+    }
+    const errorSection = this.errorMessage.trim()
+      ? `\n  When run, it reported this error:\n  \`\`\`\n  ${this.errorMessage.trim()}\n  \`\`\`\n`
+      : '';
+
+    return `
+  You are a friendly programming tutor helping a ${this.level} programmer.
+
+  You analyzed their ${language} code. ${program}
+${errorSection}
+  Your explanation was:
+  ${summarizeExplanation(explanation)}
+
+  They have follow-up questions. Answer only what is asked, briefly and in simple terms,
+  without repeating the explanation above.
+`;
+  }
+
+  history() {
+    return this.turns
+      .slice(-MAX_TURNS)
+      .map(({ question, answer }) => `\n  Student: ${question}\n  You: ${truncate(answer.answer)}\n`)
+      .join('');
+  }
+
+  // Lines the question names, by line number or by an identifier in them,
+  // that the context does not already show
+  questionLines(question) {
+    const found = new Set();
+    for (const match of question.matchAll(/\bline\s+(\d+)/gi)) {
+      const index = parseInt(match[1], 10) - 1;
+      if (index >= 0 && index < this.lines.length) found.add(index);
+    }
+    const names = new Set((question.match(IDENTIFIER) || []).filter(word => word.length > 2));
+    this.lines.forEach((line, index) => {
+      if ((line.match(IDENTIFIER) || []).some(word => names.has(word))) found.add(index);
+    });
+    return [...found].filter(index => !this.shown.has(index)).sort((a, b) => a - b).slice(0, MAX_QUESTION_LINES);
+  }
+
+  buildPrompt(question) {
+    const relevant = this.questionLines(question);
+    const excerpt = relevant.length > 0
+      ? `\n  Lines the question refers to:\n  \`\`\`${this.language}\n${numbered(this.lines, relevant)}\n  \`\`\`\n`
+      : '';
+    return `${this.context}${this.history()}${excerpt}\n  Student: ${question}\n`;
+  }
+
+  // Resolves to { answer, code_example }; onPartial sees it as it streams
+  async ask(question, { signal, onPartial, invoke = analysisProviderPool.invoke } = {}) {
+    const prompt = this.buildPrompt(question);
+    const baseline = `${this.baselinePrompt}${this.history()}\n  Student: ${question}\n`;
+    const started = performance.now();
+
+    const answer = await invokeLLMStreaming({
+      prompt,
+      response_json_schema: FOLLOW_UP_SCHEMA,
+      // Hint for backends that cache prompt prefixes per key
+      prompt_cache_key: this.id,
+      signal,
+      invoke,
+      onPartial: (partial) => {
+        if (onPartial && !signal?.aborted) onPartial(partial);
+      }
+    });
+
+    followUpLatencies = recordLatency(followUpLatencies, performance.now() - started);
+    stats.followUps++;
+    stats.promptTokens += estimateTokens(prompt, this.language);
+    stats.baselineTokens += estimateTokens(baseline, this.language);
+    this.turns.push({ question, answer });
+    return answer;
+  }
+}
+
+// Time of full analyses that went to the LLM, the baseline follow-ups are
+// compared against
+export const recordAnalysisLatency = (ms) => {
+  analysisLatencies = recordLatency(analysisLatencies, ms);
+};
+
+export const getConversationStats = () => {
+  const summarize = (latencies) => {
+    const sorted = [...latencies].sort((a, b) => a - b);
+    const at = (p) => (sorted.length > 0 ? sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))] : null);
+    return { p50Ms: at(0.5), p95Ms: at(0.95), samples: sorted.length };
+  };
+  return {
+    ...stats,
+    savedTokens: stats.baselineTokens - stats.promptTokens,
+    savedRatio: stats.baselineTokens > 0 ? 1 - stats.promptTokens / stats.baselineTokens : 0,
+    followUpLatency: summarize(followUpLatencies),
+    analysisLatency: summarize(analysisLatencies)
+  };
+};
@@ -1,11 +1,16 @@
 import React, { useState, useEffect } from "react";
-import { User, DebuggingSession, Tutorial, UserProgress } from "@/entities/all";
+import { User, DebuggingSession, Tutorial, UserProgress, useQueryRevalidation } from "../components/debugger/queryCache";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { Progress } from "@/components/ui/progress";
-import { Link } from "react-router-dom";
+import { Link, useNavigate } from "react-router-dom";
 import { createPageUrl } from "@/utils";
+import { sessionPreview } from "../components/debugger/contentStore";
+import { useVoiceCommands } from "../components/voice/speechRecognition";
+import { applyVoicePreferences } from "../components/voice/voicePreferences";
+import { NAVIGATION_COMMANDS, commandPage } from "../components/voice/voiceCommands";
+import ListenButton from "../components/voice/ListenButton";
 import {
   Code,
   BookOpen,
@@ -25,16 +30,27 @@ export default function Dashboard() {
   const [recentSessions, setRecentSessions] = useState([]);
   const [userProgress, setUserProgress] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
+  const navigate = useNavigate();
 
   useEffect(() => {
     loadDashboardData();
   }, []);
 
-  const loadDashboardData = async () => {
-    setIsLoading(true);
+  // Cached data is shown at once; a background refresh that changed it reloads
+  useQueryRevalidation(() => loadDashboardData({ background: true }));
+
+  // Voice navigation, through the recognizer shared with the other pages
+  useVoiceCommands({
+    commands: NAVIGATION_COMMANDS,
+    onCommand: (command) => commandPage(command) && navigate(createPageUrl(commandPage(command)))
+  });
+
+  const loadDashboardData = async ({ background = false } = {}) => {
+    if (!background) setIsLoading(true);
     try {
       const user = await User.me();
       setUserProfile(user);
+      applyVoicePreferences(user);
 
       const sessions = await DebuggingSession.filter(
         { created_by: user.email },
@@ -202,10 +218,11 @@ export default function Dashboard() {
                     <div className="w-10 h-10 bg-green-100 rounded-full flex items-center justify-center">
                       <Mic className="w-5 h-5 text-green-600" />
                     </div>
-                    <div>
+                    <div className="flex-1">
                       <p className="font-semibold text-green-800">Voice Features Enabled</p>
                       <p className="text-sm text-green-600">You can speak your questions and hear explanations!</p>
                     </div>
+                    <ListenButton />
                   </div>
                 </div>
               )}
@@ -234,7 +251,7 @@ export default function Dashboard() {
                         </span>
                       </div>
                       <p className="text-sm text-gray-600 line-clamp-2">
-                        {session.explanation_provided?.slice(0, 60) || 'Debugging session completed'}...
+                        {sessionPreview(session).slice(0, 60) || 'Debugging session completed'}...
                       </p>
                       {session.voice_used && (
                         <div className="flex items-center gap-1 mt-1">
@@ -1,75 +1,244 @@
 
-import React, { useState, useRef, useEffect } from "react";
-import { User, DebuggingSession } from "@/entities/all";
-import { InvokeLLM } from "@/integrations/Core";
+import React, { useState, useRef, useEffect, useCallback } from "react";
+import { User, DebuggingSession } from "../components/debugger/queryCache";
 import { Button } from "@/components/ui/button";
 import { Alert, AlertDescription } from "@/components/ui/alert";
 import { AlertCircle, ArrowLeft } from "lucide-react";
-import { Link } from "react-router-dom";
+import { Link, useNavigate } from "react-router-dom";
 import { createPageUrl } from "@/utils";
 
 import VoiceControls from "../components/voice/VoiceControls";
 import CodeEditor from "../components/debugger/CodeEditor";
 import ErrorExplanation from "../components/debugger/ErrorExplanation";
+import FollowUpPanel from "../components/debugger/FollowUpPanel";
+import { AnalysisRequestManager, analysisRequestKey, isAbortError } from "../components/debugger/analysisRequests";
+import { snapshotCode } from "../components/debugger/incrementalAnalysis";
+import { analyzeCode, saveAnalysisSession } from "../components/debugger/analysisPipeline";
+import { LANGUAGE_EXAMPLES } from "../components/debugger/languageExamples";
+import { seedSimilarExplanations } from "../components/debugger/semanticCache";
+import { hydrateSessions } from "../components/debugger/contentStore";
+import { analyzeProject, projectLanguage, projectSource } from "../components/debugger/projectAnalysis";
+import { useSpeculativeAnalysis, recordExplicitAnalysis } from "../components/debugger/speculativeAnalysis";
+import { createCodeStore, useCodeStore } from "../components/debugger/codeStore";
+import { countRender } from "../components/debugger/renderProbe";
+import { AnalysisConversation, isFollowUpQuestion, recordAnalysisLatency } from "../components/debugger/conversation";
+import { explanationSpeech, speechQueue } from "../components/voice/speechQueue";
+import { DEBUGGER_COMMANDS, commandPage } from "../components/voice/voiceCommands";
+import { applyVoicePreferences } from "../components/voice/voicePreferences";
+
+// Skips re-rendering while only the code changes
+const MemoizedErrorExplanation = React.memo(ErrorExplanation);
+
+// Subscribes to the code itself so edits do not re-render the page
+function SpeculativePrefetch({ codeStore, ...options }) {
+  const code = useCodeStore(codeStore, state => state.code);
+  const errorMessage = useCodeStore(codeStore, state => state.errorMessage);
+  useSpeculativeAnalysis({ ...options, code, errorMessage });
+  return null;
+}
 
 export default function Debugger() {
+  countRender('Debugger');
   const [userProfile, setUserProfile] = useState(null);
-  const [code, setCode] = useState('');
   const [language, setLanguage] = useState('python');
+  const [projectFiles, setProjectFiles] = useState([]);
   const [explanation, setExplanation] = useState(null);
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [error, setError] = useState(null);
+  const [followUps, setFollowUps] = useState([]);
+  const [isAsking, setIsAsking] = useState(false);
+  const navigate = useNavigate();
   const voiceControlsRef = useRef(null);
+  const lastAnalysisRef = useRef(null);
+  // Follow-up questions about the current explanation
+  const conversationRef = useRef(null);
+  const followUpControllerRef = useRef(null);
+  const analysisRequestsRef = useRef(null);
+  if (!analysisRequestsRef.current) {
+    analysisRequestsRef.current = new AnalysisRequestManager();
+  }
+  // Code and error message live outside React state; the page reads them
+  // when it needs them instead of re-rendering on every edit
+  const codeStoreRef = useRef(null);
+  if (!codeStoreRef.current) {
+    codeStoreRef.current = createCodeStore({ code: LANGUAGE_EXAMPLES.python, errorMessage: '' });
+  }
+  const codeStore = codeStoreRef.current;
+  const programmingLevel = userProfile?.programming_level || 'beginner';
+  const isProject = projectFiles.length > 0;
+
+  const currentRequest = () => {
+    const { code, errorMessage } = codeStore.getState();
+    const analysisInput = isProject ? projectSource(projectFiles) : code;
+    return {
+      code,
+      errorMessage,
+      analysisInput,
+      requestKey: analysisRequestKey({
+        code: analysisInput,
+        language: isProject ? 'project' : language,
+        level: programmingLevel,
+        errorMessage
+      })
+    };
+  };
 
   useEffect(() => {
     loadUserProfile();
-    // Set initial code example
-    setCode(`# Example Python code with an error
-def greet_user(name):
-    print("Hello " + name)
-    return name.upper()
-
-# This will cause an error
-result = greet_user()  # Missing required argument
-print(result)`);
   }, []);
 
+  // Editing the code makes any in-flight analysis of the old code stale
+  useEffect(() => {
+    const cancelStale = () => analysisRequestsRef.current.cancelExcept(currentRequest().requestKey);
+    cancelStale();
+    return codeStore.subscribe(cancelStale);
+  }, [codeStore, isProject, projectFiles, language, programmingLevel]);
+
+  // Follow-ups are about the analyzed code; once it is edited the
+  // conversation's context no longer matches it
+  useEffect(() => codeStore.subscribe(() => {
+    if (conversationRef.current) handlersRef.current.endConversation();
+  }), [codeStore]);
+
+  // Identical requests share one call; a newer request aborts older ones
+  const requestAnalysis = (options) => {
+    const { code, errorMessage, requestKey } = currentRequest();
+    return analysisRequestsRef.current.run(
+      requestKey,
+      (signal, onPartial) => isProject
+        ? analyzeProject({
+          files: projectFiles,
+          level: programmingLevel,
+          errorMessage,
+          signal,
+          onPartial
+        })
+        : analyzeCode({
+          code,
+          language,
+          level: programmingLevel,
+          errorMessage,
+          previous: lastAnalysisRef.current,
+          signal,
+          onPartial
+        }),
+      options
+    );
+  };
+
   const loadUserProfile = async () => {
     try {
       const user = await User.me();
       setUserProfile(user);
       setLanguage(user.preferred_language || 'python');
+      applyVoicePreferences(user);
+
+      // Past explanations can be reused for the same mistake in renamed code
+      const pastSessions = await DebuggingSession.filter(
+        { created_by: user.email },
+        '-created_date',
+        200
+      );
+      seedSimilarExplanations(await hydrateSessions(pastSessions, { owner: user.email }));
     } catch (error) {
       console.error('Error loading user profile:', error);
     }
   };
 
-  const handleVoiceInput = (transcript) => {
-    // Simple voice commands
-    const lowerTranscript = transcript.toLowerCase();
-    
-    if (lowerTranscript.includes('analyze') || lowerTranscript.includes('help')) {
+  // Recognized by VoiceControls as results arrive (see DEBUGGER_COMMANDS)
+  const handleVoiceCommand = (command) => {
+    if (commandPage(command)) {
+      navigate(createPageUrl(commandPage(command)));
+    } else if (command === 'analyze') {
       handleAnalyzeCode();
-    } else if (lowerTranscript.includes('clear')) {
-      setCode('');
+    } else if (command === 'clear') {
+      codeStore.setState({ code: '', errorMessage: '' });
+      endConversation();
       setExplanation(null);
-    } else if (lowerTranscript.includes('explain again') && explanation) {
+    } else if (command === 'explain' && explanation) {
       speakExplanation();
-    } else {
-      // Treat as code input
-      setCode(prev => prev + '\n' + transcript);
+    } else if (command === 'stop') {
+      speechQueue.stop();
+    } else if (command === 'skip') {
+      speechQueue.skip();
+    } else if (command === 'replay') {
+      speechQueue.replay();
+    }
+  };
+
+  // While there is an explanation to ask about, questions skip command
+  // matching: "why do I need to clear the list first" is not "clear"
+  const isVoiceQuestion = (transcript) => !!conversationRef.current && isFollowUpQuestion(transcript);
+
+  // Questions about the explanation are follow-ups; anything else that is
+  // not a command is dictated code
+  const handleVoiceInput = (transcript) => {
+    if (isVoiceQuestion(transcript)) {
+      handleFollowUp(transcript);
+      return;
+    }
+    codeStore.setState(state => ({ code: state.code + '\n' + transcript }));
+  };
+
+  const endConversation = () => {
+    followUpControllerRef.current?.abort();
+    followUpControllerRef.current = null;
+    conversationRef.current = null;
+    setFollowUps([]);
+    setIsAsking(false);
+  };
+
+  const handleFollowUp = async (question) => {
+    const conversation = conversationRef.current;
+    if (!conversation) return;
+    followUpControllerRef.current?.abort();
+    const controller = new AbortController();
+    followUpControllerRef.current = controller;
+
+    const turn = followUps.length;
+    const showAnswer = (answer) => {
+      setFollowUps(turns => turns.map((entry, index) => (index === turn ? { ...entry, answer } : entry)));
+    };
+    setFollowUps(turns => [...turns.slice(0, turn), { question, answer: null }]);
+    setIsAsking(true);
+    setError(null);
+
+    const voice = userProfile?.voice_enabled ? voiceControlsRef.current : null;
+    voice?.beginStream();
+
+    try {
+      const answer = await conversation.ask(question, {
+        signal: controller.signal,
+        onPartial: (partial) => {
+          showAnswer(partial);
+          voice?.feedStream(partial.answer || '');
+        }
+      });
+      showAnswer(answer);
+      voice?.feedStream(answer.answer || '', { final: true });
+    } catch (error) {
+      if (isAbortError(error)) return;
+      console.error('Error answering follow-up question:', error);
+      voice?.stopSpeaking();
+      setFollowUps(turns => turns.slice(0, turn));
+      setError('Failed to answer your question. Please try again.');
+    }
+
+    if (followUpControllerRef.current === controller) {
+      followUpControllerRef.current = null;
+      setIsAsking(false);
     }
   };
 
   const speakExplanation = () => {
     if (explanation && voiceControlsRef.current) {
-      const textToSpeak = `I found a ${explanation.error_type}. Here is what's wrong: ${explanation.simple_explanation}. And here is how to fix it: ${explanation.solution}`;
-      voiceControlsRef.current.speak(textToSpeak);
+      voiceControlsRef.current.speak(explanationSpeech(explanation));
     }
   };
 
   const handleAnalyzeCode = async () => {
-    if (!code.trim()) {
+    const { code, errorMessage, analysisInput } = currentRequest();
+    if (!isProject && !code.trim()) {
       setError('Please enter some code to analyze');
       return;
     }
@@ -77,83 +246,58 @@ print(result)`);
     setIsAnalyzing(true);
     setError(null);
     setExplanation(null);
+    endConversation();
+    const started = performance.now();
+
+    if (userProfile?.email) recordExplicitAnalysis(userProfile.email);
+
+    // Read the explanation aloud as it streams in, a sentence at a time
+    const voice = userProfile?.voice_enabled ? voiceControlsRef.current : null;
+    voice?.beginStream();
 
     try {
-      const prompt = `
-        You are a friendly programming tutor helping a ${userProfile?.programming_level || 'beginner'} programmer.
-        
-        Analyze this ${language} code and identify any errors or potential issues:
-        
-        \`\`\`${language}
-        ${code}
-        \`\`\`
-        
-        Please provide:
-        1. A clear identification of any errors or issues
-        2. A beginner-friendly explanation in simple terms
-        3. Step-by-step solution with code examples
-        4. Key learning points to remember
-        
-        Focus on being encouraging and educational rather than just providing fixes.
-        If the code looks correct, explain what it does and suggest improvements.
-      `;
-
-      const response = await InvokeLLM({
-        prompt,
-        response_json_schema: {
-          type: "object",
-          properties: {
-            error_type: {
-              type: "string",
-              description: "Type of error or 'No errors found' if code is correct"
-            },
-            simple_explanation: {
-              type: "string",
-              description: "Beginner-friendly explanation of the issue"
-            },
-            solution: {
-              type: "string",
-              description: "Step-by-step solution with code examples"
-            },
-            learning_points: {
-              type: "array",
-              items: {
-                type: "string"
-              },
-              description: "Key concepts to remember"
-            }
-          }
+      const response = await requestAnalysis({
+        onPartial: (partial) => {
+          setExplanation(partial);
+          voice?.feedStream(explanationSpeech(partial, { complete: false }));
         }
       });
 
       setExplanation(response);
-
-      // Save debugging session
-      await DebuggingSession.create({
-        code_input: code,
-        programming_language: language,
-        explanation_provided: response.simple_explanation,
-        solution_suggested: response.solution,
-        voice_used: userProfile?.voice_enabled || false,
-        concepts_learned: response.learning_points || []
+      voice?.feedStream(explanationSpeech(response), { final: true });
+      if (response.source === 'llm') recordAnalysisLatency(performance.now() - started);
+      conversationRef.current = new AnalysisConversation({
+        code: analysisInput,
+        language: isProject ? projectLanguage(projectFiles) : language,
+        level: programmingLevel,
+        errorMessage,
+        explanation: response
       });
+      lastAnalysisRef.current = isProject ? null : {
+        snapshot: snapshotCode(code),
+        explanation: response,
+        errorMessage,
+        language,
+        level: programmingLevel
+      };
 
-      // Update user's session count
-      if (userProfile) {
-        await User.updateMyUserData({
-          total_sessions: (userProfile.total_sessions || 0) + 1
-        });
-      }
-
-      // Auto-speak explanation if voice is enabled - with delay to ensure UI is rendered
-      if (userProfile?.voice_enabled && voiceControlsRef.current) {
-        setTimeout(() => {
-          speakExplanation();
-        }, 500);
-      }
-
+      // Save debugging session and update the user's session count
+      await saveAnalysisSession({
+        code: analysisInput,
+        errorMessage,
+        language: isProject ? projectLanguage(projectFiles) : language,
+        level: programmingLevel,
+        response,
+        userProfile
+      });
     } catch (error) {
+      if (isAbortError(error)) {
+        // Superseded: the newer request owns the loading state
+        if (!analysisRequestsRef.current.hasPending()) setIsAnalyzing(false);
+        return;
+      }
       console.error('Error analyzing code:', error);
+      voice?.stopSpeaking();
       setError('Failed to analyze code. Please try again.');
     }
 
@@ -181,6 +325,17 @@ print(result)`);
     }
   };
 
+  // Stable callbacks for the memoized children, always calling the latest handlers
+  const handlersRef = useRef(null);
+  handlersRef.current = { handleVoiceInput, handleVoiceCommand, speakExplanation, handleAnalyzeCode, handleRateExplanation, handleFollowUp, endConversation, isVoiceQuestion };
+  const onSpeechResult = useCallback((transcript) => handlersRef.current.handleVoiceInput(transcript), []);
+  const isQuestion = useCallback((transcript) => handlersRef.current.isVoiceQuestion(transcript), []);
+  const onCommand = useCallback((command) => handlersRef.current.handleVoiceCommand(command), []);
+  const onSpeak = useCallback(() => handlersRef.current.speakExplanation(), []);
+  const onAnalyze = useCallback(() => handlersRef.current.handleAnalyzeCode(), []);
+  const onRate = useCallback((rating) => handlersRef.current.handleRateExplanation(rating), []);
+  const onAsk = useCallback((question) => handlersRef.current.handleFollowUp(question), []);
+
   return (
     <div className="min-h-screen bg-gradient-to-br from-blue-50 to-indigo-50 p-4 md:p-8">
       <div className="max-w-6xl mx-auto">
@@ -205,7 +360,10 @@ print(result)`);
           {userProfile?.voice_enabled && (
             <VoiceControls
               ref={voiceControlsRef}
-              onSpeechResult={handleVoiceInput}
+              onSpeechResult={onSpeechResult}
+              onCommand={onCommand}
+              isQuestion={isQuestion}
+              commands={DEBUGGER_COMMANDS}
               voiceEnabled={userProfile.voice_enabled}
               speechRate={userProfile.speech_rate || 1.0}
             />
@@ -219,23 +377,46 @@ print(result)`);
           </Alert>
         )}
 
+        {/* Opt-in: analyze stable code in idle time so "Get Help" hits the cache */}
+        <SpeculativePrefetch
+          codeStore={codeStore}
+          enabled={!!userProfile?.speculative_analysis && !isProject}
+          userKey={userProfile?.email}
+          language={language}
+          level={programmingLevel}
+          isBusy={isAnalyzing}
+          prefetch={() => requestAnalysis()}
+        />
+
         <div className="space-y-6">
           {/* Code Editor */}
           <CodeEditor
-            code={code}
+            codeStore={codeStore}
             language={language}
-            onCodeChange={setCode}
             onLanguageChange={setLanguage}
-            onAnalyze={handleAnalyzeCode}
+            onAnalyze={onAnalyze}
+            projectFiles={projectFiles}
+            onProjectFilesChange={setProjectFiles}
           />
 
           {/* Error Explanation */}
-          <ErrorExplanation
+          <MemoizedErrorExplanation
             explanation={explanation}
-            onRate={handleRateExplanation}
-            onSpeak={speakExplanation}
+            language={language}
+            onRate={onRate}
+            onSpeak={onSpeak}
             isLoading={isAnalyzing}
           />
+
+          {/* Follow-up questions reuse the analysis instead of starting over */}
+          {explanation && !isAnalyzing && (
+            <FollowUpPanel
+              turns={followUps}
+              onAsk={onAsk}
+              isAsking={isAsking}
+              language={language}
+            />
+          )}
         </div>
       </div>
     </div>
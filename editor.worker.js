@@ -0,0 +1,25 @@
+import { computeLineStarts } from "./pieceTable";
+import { DocumentMirror } from "./editorSupport";
+
+// Editor worker: mirrors the document and answers line-start, search and
+// highlighting requests so large buffers never block the main thread.
+
+const mirror = new DocumentMirror();
+
+self.onmessage = (event) => {
+  const { id, type } = event.data;
+
+  if (type === 'load') {
+    mirror.load(event.data.text);
+  } else if (type === 'edit') {
+    mirror.edit(event.data.start, event.data.end, event.data.insert);
+  } else if (type === 'lineStarts') {
+    const starts = Uint32Array.from(computeLineStarts(event.data.text));
+    self.postMessage({ id, result: starts }, [starts.buffer]);
+  } else if (type === 'search') {
+    self.postMessage({ id, result: mirror.search(event.data.query, event.data.options) });
+  } else if (type === 'highlight') {
+    const { language, from, to } = event.data;
+    self.postMessage({ id, result: mirror.highlight(language, from, to) });
+  }
+};
@@ -0,0 +1,153 @@
+import { computeLineStarts } from "./pieceTable";
+import { HighlightCache } from "./syntaxHighlight";
+
+// Off-main-thread helpers for the virtualized code editor, plus its
+// keystroke-to-paint measurements. The worker keeps its own copy of the
+// text, updated with small edit messages, so searching and highlighting
+// never block typing.
+
+const LATENCY_SAMPLES = 500;
+
+const latency = {
+  samples: new Float64Array(LATENCY_SAMPLES),
+  count: 0,
+  next: 0,
+  over16ms: 0
+};
+
+export const recordKeystrokeLatency = (ms) => {
+  latency.samples[latency.next] = ms;
+  latency.next = (latency.next + 1) % LATENCY_SAMPLES;
+  latency.count = Math.min(latency.count + 1, LATENCY_SAMPLES);
+  if (ms > 16) latency.over16ms++;
+};
+
+export const getEditorLatencyStats = () => {
+  const sorted = latency.samples.slice(0, latency.count).sort();
+  const at = (q) => (latency.count > 0 ? sorted[Math.min(latency.count - 1, Math.floor(q * latency.count))] : 0);
+  return {
+    samples: latency.count,
+    p50: at(0.5),
+    p95: at(0.95),
+    max: latency.count > 0 ? sorted[latency.count - 1] : 0,
+    over16ms: latency.over16ms
+  };
+};
+
+// Offsets of the first `limit` matches, and how many there are in total.
+export const searchText = (text, query, { caseSensitive = false, limit = 10000 } = {}) => {
+  if (!query) return { offsets: [], total: 0 };
+  const haystack = caseSensitive ? text : text.toLowerCase();
+  const needle = caseSensitive ? query : query.toLowerCase();
+  const offsets = [];
+  let total = 0;
+  let index = haystack.indexOf(needle);
+  while (index !== -1) {
+    total++;
+    if (offsets.length < limit) offsets.push(index);
+    index = haystack.indexOf(needle, index + needle.length);
+  }
+  return { offsets, total };
+};
+
+// The worker's copy of the document, kept as lines so edits and
+// highlighting work per line. Also used inline when workers are unavailable.
+export class DocumentMirror {
+  constructor() {
+    this.lines = [''];
+    this.text = '';
+    this.highlighter = new HighlightCache(null);
+  }
+
+  load(text) {
+    this.lines = text.split('\n');
+    this.text = text;
+    this.highlighter.invalidate();
+  }
+
+  // `start`/`end` are the {line, column} positions of the replaced range.
+  edit(start, end, insert) {
+    const replaced = (this.lines[start.line].slice(0, start.column) + insert + this.lines[end.line].slice(end.column)).split('\n');
+    const removed = end.line - start.line + 1;
+    if (replaced.length < 10000) {
+      this.lines.splice(start.line, removed, ...replaced);
+    } else {
+      this.lines = this.lines.slice(0, start.line).concat(replaced, this.lines.slice(start.line + removed));
+    }
+    this.highlighter.splice(start.line, removed, replaced.length);
+    this.text = null;
+  }
+
+  search(query, options) {
+    if (this.text === null) this.text = this.lines.join('\n');
+    return searchText(this.text, query, options);
+  }
+
+  highlight(language, from, to) {
+    this.highlighter.setLanguage(language);
+    return this.highlighter.tokens(this.lines, from, to);
+  }
+}
+
+// Same interface with or without a worker; without one the work runs inline.
+export const createEditorWorker = () => {
+  let mirror = null;
+  let worker = null;
+  let nextId = 0;
+  const pending = new Map();
+
+  if (typeof Worker !== 'undefined') {
+    try {
+      worker = new Worker(new URL('./editor.worker.js', import.meta.url), { type: 'module' });
+      worker.onmessage = (event) => {
+        const request = pending.get(event.data.id);
+        if (!request) return;
+        pending.delete(event.data.id);
+        request(event.data.result);
+      };
+      worker.onerror = (error) => {
+        console.error('Editor worker error:', error);
+      };
+    } catch (error) {
+      console.error('Could not start editor worker:', error);
+      worker = null;
+    }
+  }
+  if (!worker) mirror = new DocumentMirror();
+
+  const request = (message, transfer = []) =>
+    new Promise((resolve) => {
+      const id = ++nextId;
+      pending.set(id, resolve);
+      worker.postMessage({ id, ...message }, transfer);
+    });
+
+  return {
+    load(text) {
+      if (worker) worker.postMessage({ type: 'load', text });
+      else mirror.load(text);
+    },
+    edit(start, end, insert) {
+      if (worker) worker.postMessage({ type: 'edit', start, end, insert });
+      else mirror.edit(start, end, insert);
+    },
+    computeLineStarts(text) {
+      if (worker) return request({ type: 'lineStarts', text });
+      return Promise.resolve(computeLineStarts(text));
+    },
+    search(query, options) {
+      if (worker) return request({ type: 'search', query, options });
+      return Promise.resolve(mirror.search(query, options));
+    },
+    // Resolves to [{ text, tokens }] for lines [from, to)
+    highlight(language, from, to) {
+      if (worker) return request({ type: 'highlight', language, from, to });
+      return Promise.resolve(mirror.highlight(language, from, to));
+    },
+    terminate() {
+      if (worker) worker.terminate();
+      worker = null;
+      pending.clear();
+    }
+  };
+};
@@ -13,21 +13,35 @@ import {
   Copy
 } from "lucide-react";
 import { Separator } from "@/components/ui/separator";
-import ReactMarkdown from 'react-markdown';
+import MarkdownView from "./MarkdownView";
+import { countRender } from "./renderProbe";
+import { speechQueue, explanationSpeech } from "../voice/speechQueue";
+
+const StreamingPlaceholder = () => (
+  <div className="space-y-2 animate-pulse">
+    <div className="h-3 bg-gray-200 rounded w-3/4" />
+    <div className="h-3 bg-gray-200 rounded w-1/2" />
+  </div>
+);
 
 export default function ErrorExplanation({ 
   explanation, 
+  language,
   onRate, 
   onSpeak,
   isLoading 
 }) {
+  countRender('ErrorExplanation');
   const explanationRef = useRef(null);
+  const hasExplanation = !!explanation;
+  // Streaming responses arrive while isLoading is still true
+  const isStreaming = isLoading && hasExplanation;
 
   useEffect(() => {
-    if (explanation && explanationRef.current) {
+    if (hasExplanation && explanationRef.current) {
       explanationRef.current.scrollIntoView({ behavior: 'smooth' });
     }
-  }, [explanation]);
+  }, [hasExplanation]);
 
   const copyExplanation = () => {
     if (explanation) {
@@ -41,29 +55,15 @@ export default function ErrorExplanation({
     if (!explanation) return;
     
     // Direct text-to-speech implementation
-    if ('speechSynthesis' in window) {
-      // Stop any ongoing speech
-      window.speechSynthesis.cancel();
-      
-      const textToSpeak = `I found a ${explanation.error_type}. Here is what's wrong: ${explanation.simple_explanation}. And here is how to fix it: ${explanation.solution}`;
-      
-      const utterance = new SpeechSynthesisUtterance(textToSpeak);
-      utterance.rate = 1.0;
-      utterance.pitch = 1;
-      utterance.volume = 0.9;
-      
-      // Add some debugging
-      utterance.onstart = () => console.log('Speech started');
-      utterance.onend = () => console.log('Speech ended');
-      utterance.onerror = (e) => console.error('Speech error:', e);
-      
-      window.speechSynthesis.speak(utterance);
+    if (speechQueue.getSynth()) {
+      // Sentence by sentence, replacing anything already being spoken
+      speechQueue.speak(explanationSpeech(explanation), { rate: 1.0, volume: 0.9 });
     } else {
       alert('Text-to-speech is not supported in this browser. Please try Chrome, Edge, or Safari.');
     }
   };
 
-  if (isLoading) {
+  if (isLoading && !explanation) {
     return (
       <Card ref={explanationRef} className="shadow-lg border-0 bg-gradient-to-r from-blue-50 to-indigo-50">
         <CardContent className="p-8">
@@ -89,8 +89,13 @@ export default function ErrorExplanation({
             <div>
               <h3 className="text-xl font-bold text-gray-900">Code Analysis Results</h3>
               <Badge className="mt-1 bg-amber-100 text-amber-800">
-                {explanation.error_type || 'Code Issue Detected'}
+                {explanation.error_type || (isStreaming ? 'Analyzing...' : 'Code Issue Detected')}
               </Badge>
+              {explanation.error_file && (
+                <p className="text-sm text-gray-600 mt-1 font-mono">
+                  {explanation.error_file}{explanation.error_line ? `, line ${explanation.error_line}` : ''}
+                </p>
+              )}
             </div>
           </CardTitle>
           
@@ -99,6 +104,7 @@ export default function ErrorExplanation({
               variant="outline"
               size="sm"
               onClick={handleSpeak}
+              disabled={isStreaming}
               className="flex items-center gap-2"
             >
               <Volume2 className="w-4 h-4" />
@@ -108,6 +114,7 @@ export default function ErrorExplanation({
               variant="outline"
               size="sm"
               onClick={copyExplanation}
+              disabled={isStreaming}
               className="flex items-center gap-2"
             >
               <Copy className="w-4 h-4" />
@@ -127,26 +134,36 @@ export default function ErrorExplanation({
             <div>
               <h4 className="font-semibold text-gray-900 mb-2">What's Wrong?</h4>
               <div className="text-gray-700 prose prose-sm">
-                <ReactMarkdown>{explanation.simple_explanation}</ReactMarkdown>
+                {explanation.simple_explanation ? (
+                  <MarkdownView text={explanation.simple_explanation} language={language} />
+                ) : (
+                  <StreamingPlaceholder />
+                )}
               </div>
             </div>
           </div>
         </div>
 
         {/* Solution */}
-        <div className="bg-white/70 rounded-xl p-6 border border-green-200">
-          <div className="flex items-start gap-3">
-            <div className="w-8 h-8 bg-green-100 rounded-lg flex items-center justify-center flex-shrink-0">
-              <Code2 className="w-4 h-4 text-green-600" />
-            </div>
-            <div>
-              <h4 className="font-semibold text-gray-900 mb-2">How to Fix It</h4>
-              <div className="text-gray-700 prose prose-sm">
-                <ReactMarkdown>{explanation.solution}</ReactMarkdown>
+        {(explanation.solution || isStreaming) && (
+          <div className="bg-white/70 rounded-xl p-6 border border-green-200">
+            <div className="flex items-start gap-3">
+              <div className="w-8 h-8 bg-green-100 rounded-lg flex items-center justify-center flex-shrink-0">
+                <Code2 className="w-4 h-4 text-green-600" />
+              </div>
+              <div>
+                <h4 className="font-semibold text-gray-900 mb-2">How to Fix It</h4>
+                <div className="text-gray-700 prose prose-sm">
+                  {explanation.solution ? (
+                    <MarkdownView text={explanation.solution} language={language} />
+                  ) : (
+                    <StreamingPlaceholder />
+                  )}
+                </div>
               </div>
             </div>
           </div>
-        </div>
+        )}
 
         {/* Learning Points */}
         {explanation.learning_points && explanation.learning_points.length > 0 && (
@@ -180,6 +197,7 @@ export default function ErrorExplanation({
               variant="outline"
               size="sm"
               onClick={() => onRate && onRate(5)}
+              disabled={isStreaming}
               className="flex items-center gap-2 hover:bg-green-50 hover:text-green-700"
             >
               <ThumbsUp className="w-4 h-4" />
@@ -189,6 +207,7 @@ export default function ErrorExplanation({
               variant="outline"
               size="sm"
               onClick={() => onRate && onRate(2)}
+              disabled={isStreaming}
               className="flex items-center gap-2 hover:bg-red-50 hover:text-red-700"
             >
               <ThumbsDown className="w-4 h-4" />
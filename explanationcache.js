@@ -0,0 +1,347 @@
+// Content-addressed cache for code explanations.
+// Two tiers: an in-memory LRU for the current tab and an IndexedDB store
+// that survives reloads. Keys are a SHA-256 of the normalized code plus
+// language, programming level and prompt version.
+
+export const PROMPT_VERSION = 2;
+
+const DB_NAME = 'codewhisperer-cache';
+const DB_VERSION = 1;
+const STORE_NAME = 'explanations';
+
+const DEFAULT_OPTIONS = {
+  memoryEntries: 100,
+  persistentEntries: 500,
+  persistentBytes: 5 * 1024 * 1024,
+  ttlMs: 7 * 24 * 60 * 60 * 1000
+};
+
+const LINE_COMMENT = {
+  python: '#',
+  javascript: '//',
+  java: '//',
+  cpp: '//'
+};
+
+// Removes comments while leaving string literals and line breaks intact, so
+// that `print("# not a comment")` keeps its meaning.
+export const stripComments = (code, language) => {
+  const lineComment = LINE_COMMENT[language];
+  const blockComments = language === 'python'
+    ? []
+    : language === 'html_css'
+      ? [['<!--', '-->'], ['/*', '*/']]
+      : [['/*', '*/']];
+
+  let out = '';
+  let i = 0;
+  let quote = null;
+
+  while (i < code.length) {
+    const ch = code[i];
+
+    if (quote) {
+      out += ch;
+      if (ch === '\\' && i + 1 < code.length) {
+        out += code[i + 1];
+        i += 2;
+        continue;
+      }
+      if (ch === quote) quote = null;
+      i++;
+      continue;
+    }
+
+    if (ch === '"' || ch === "'" || ch === '`') {
+      quote = ch;
+      out += ch;
+      i++;
+      continue;
+    }
+
+    if (lineComment && code.startsWith(lineComment, i)) {
+      while (i < code.length && code[i] !== '\n') i++;
+      continue;
+    }
+
+    const block = blockComments.find(([open]) => code.startsWith(open, i));
+    if (block) {
+      const end = code.indexOf(block[1], i + block[0].length);
+      const stop = end === -1 ? code.length : end + block[1].length;
+      // Keep the line breaks so line numbers still match the original
+      out += code.slice(i, stop).replace(/[^\n]/g, '');
+      i = stop;
+      continue;
+    }
+
+    out += ch;
+    i++;
+  }
+
+  return out;
+};
+
+// Python keeps its indentation because it is significant; everything else
+// is compared with leading/trailing whitespace and runs of spaces collapsed.
+export const normalizeCode = (code, language) => {
+  const lines = stripComments(code.replace(/\r\n?/g, '\n'), language)
+    .split('\n')
+    .map(line => line.replace(/\t/g, '    ').replace(/\s+$/, ''))
+    .filter(line => line.trim() !== '');
+
+  if (language === 'python') {
+    return lines.map(line => {
+      const indent = line.match(/^ */)[0];
+      return indent + line.slice(indent.length).replace(/\s+/g, ' ');
+    }).join('\n');
+  }
+
+  return lines.map(line => line.trim().replace(/\s+/g, ' ')).join('\n');
+};
+
+const toHex = (buffer) =>
+  Array.from(new Uint8Array(buffer))
+    .map(b => b.toString(16).padStart(2, '0'))
+    .join('');
+
+// FNV-1a fallback for contexts without SubtleCrypto (plain http, old browsers).
+export const fnv1a = (text) => {
+  let h1 = 0x811c9dc5;
+  let h2 = 0x01000193;
+  for (let i = 0; i < text.length; i++) {
+    const c = text.charCodeAt(i);
+    h1 = Math.imul(h1 ^ c, 0x01000193) >>> 0;
+    h2 = Math.imul(h2 ^ c, 0x5bd1e995) >>> 0;
+  }
+  return h1.toString(16).padStart(8, '0') + h2.toString(16).padStart(8, '0');
+};
+
+export const hashText = async (text) => {
+  if (typeof crypto !== 'undefined' && crypto.subtle) {
+    const bytes = new TextEncoder().encode(text);
+    return toHex(await crypto.subtle.digest('SHA-256', bytes));
+  }
+  return fnv1a(text);
+};
+
+export const explanationCacheKey = async ({ code, language, level, errorMessage = '' }) => {
+  const normalized = normalizeCode(code, language);
+  const error = errorMessage.trim();
+  return hashText(`v${PROMPT_VERSION}\u0000${language}\u0000${level}\u0000${normalized}\u0000${error}`);
+};
+
+// Map iteration order is insertion order, so re-inserting on access keeps
+// the least recently used entry first.
+export class MemoryLRU {
+  constructor(limit) {
+    this.limit = limit;
+    this.entries = new Map();
+  }
+
+  get(key) {
+    if (!this.entries.has(key)) return undefined;
+    const entry = this.entries.get(key);
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry;
+  }
+
+  set(key, entry) {
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    while (this.entries.size > this.limit) {
+      this.entries.delete(this.entries.keys().next().value);
+    }
+  }
+
+  delete(key) {
+    this.entries.delete(key);
+  }
+
+  clear() {
+    this.entries.clear();
+  }
+}
+
+const requestToPromise = (request) =>
+  new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+
+const transactionDone = (tx) =>
+  new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error);
+    tx.onabort = () => reject(tx.error);
+  });
+
+class PersistentStore {
+  constructor() {
+    this.dbPromise = null;
+  }
+
+  open() {
+    if (typeof indexedDB === 'undefined') return Promise.resolve(null);
+    if (!this.dbPromise) {
+      const request = indexedDB.open(DB_NAME, DB_VERSION);
+      request.onupgradeneeded = () => {
+        const store = request.result.createObjectStore(STORE_NAME, { keyPath: 'key' });
+        store.createIndex('lastAccess', 'lastAccess');
+      };
+      this.dbPromise = requestToPromise(request).catch(error => {
+        console.error('Error opening explanation cache:', error);
+        return null;
+      });
+    }
+    return this.dbPromise;
+  }
+
+  async get(key) {
+    const db = await this.open();
+    if (!db) return undefined;
+    const tx = db.transaction(STORE_NAME, 'readonly');
+    return requestToPromise(tx.objectStore(STORE_NAME).get(key));
+  }
+
+  async put(entry) {
+    const db = await this.open();
+    if (!db) return;
+    const tx = db.transaction(STORE_NAME, 'readwrite');
+    tx.objectStore(STORE_NAME).put(entry);
+    await transactionDone(tx);
+  }
+
+  async touch(entry) {
+    await this.put({ ...entry, lastAccess: Date.now() });
+  }
+
+  async delete(key) {
+    const db = await this.open();
+    if (!db) return;
+    const tx = db.transaction(STORE_NAME, 'readwrite');
+    tx.objectStore(STORE_NAME).delete(key);
+    await transactionDone(tx);
+  }
+
+  // Drops expired entries, then the least recently used ones until both the
+  // entry and byte limits hold. Returns the number of evicted entries.
+  async evict({ maxEntries, maxBytes, ttlMs }) {
+    const db = await this.open();
+    if (!db) return 0;
+
+    const tx = db.transaction(STORE_NAME, 'readwrite');
+    const store = tx.objectStore(STORE_NAME);
+    const entries = await requestToPromise(store.index('lastAccess').getAll());
+    const now = Date.now();
+
+    let totalBytes = entries.reduce((sum, entry) => sum + (entry.size || 0), 0);
+    let remaining = entries.length;
+    let evicted = 0;
+
+    for (const entry of entries) {
+      const expired = now - entry.createdAt > ttlMs;
+      if (!expired && remaining <= maxEntries && totalBytes <= maxBytes) continue;
+      store.delete(entry.key);
+      totalBytes -= entry.size || 0;
+      remaining--;
+      evicted++;
+    }
+
+    await transactionDone(tx);
+    return evicted;
+  }
+
+  async clear() {
+    const db = await this.open();
+    if (!db) return;
+    const tx = db.transaction(STORE_NAME, 'readwrite');
+    tx.objectStore(STORE_NAME).clear();
+    await transactionDone(tx);
+  }
+}
+
+export class ExplanationCache {
+  constructor(options = {}) {
+    this.options = { ...DEFAULT_OPTIONS, ...options };
+    this.memory = new MemoryLRU(this.options.memoryEntries);
+    this.persistent = new PersistentStore();
+    this.counters = {
+      memoryHits: 0,
+      persistentHits: 0,
+      misses: 0,
+      writes: 0,
+      evictions: 0
+    };
+  }
+
+  async get(key) {
+    const now = Date.now();
+    const cached = this.memory.get(key);
+    if (cached && now - cached.createdAt <= this.options.ttlMs) {
+      this.counters.memoryHits++;
+      return cached.value;
+    }
+    if (cached) this.memory.delete(key);
+
+    try {
+      const entry = await this.persistent.get(key);
+      if (entry && now - entry.createdAt <= this.options.ttlMs) {
+        this.counters.persistentHits++;
+        this.memory.set(key, entry);
+        this.persistent.touch(entry).catch(() => {});
+        return entry.value;
+      }
+      if (entry) this.persistent.delete(key).catch(() => {});
+    } catch (error) {
+      console.error('Error reading explanation cache:', error);
+    }
+
+    this.counters.misses++;
+    return undefined;
+  }
+
+  async set(key, value) {
+    const now = Date.now();
+    const entry = {
+      key,
+      value,
+      size: JSON.stringify(value).length * 2,
+      createdAt: now,
+      lastAccess: now
+    };
+    this.memory.set(key, entry);
+    this.counters.writes++;
+
+    try {
+      await this.persistent.put(entry);
+      this.counters.evictions += await this.persistent.evict({
+        maxEntries: this.options.persistentEntries,
+        maxBytes: this.options.persistentBytes,
+        ttlMs: this.options.ttlMs
+      });
+    } catch (error) {
+      console.error('Error writing explanation cache:', error);
+    }
+  }
+
+  async clear() {
+    this.memory.clear();
+    await this.persistent.clear();
+  }
+
+  stats() {
+    const hits = this.counters.memoryHits + this.counters.persistentHits;
+    const lookups = hits + this.counters.misses;
+    return {
+      ...this.counters,
+      hits,
+      lookups,
+      hitRate: lookups > 0 ? hits / lookups : 0
+    };
+  }
+}
+
+export const explanationCache = new ExplanationCache();
+
+export const getExplanationCacheStats = () => explanationCache.stats();
@@ -0,0 +1,63 @@
+import React, { useState } from 'react';
+import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
+import { Button } from "@/components/ui/button";
+import { Input } from "@/components/ui/input";
+import { MessageCircle, Send } from "lucide-react";
+import MarkdownView from "./MarkdownView";
+import { countRender } from "./renderProbe";
+
+// Questions about the current explanation and their answers. Questions can
+// also be asked aloud ("why does upper() fail?").
+export default function FollowUpPanel({ turns, onAsk, isAsking, language }) {
+  countRender('FollowUpPanel');
+  const [question, setQuestion] = useState('');
+
+  const handleSubmit = (event) => {
+    event.preventDefault();
+    const text = question.trim();
+    if (!text || isAsking) return;
+    onAsk(text);
+    setQuestion('');
+  };
+
+  return (
+    <Card className="shadow-lg border-0">
+      <CardHeader className="pb-3">
+        <CardTitle className="flex items-center gap-2 text-lg">
+          <MessageCircle className="w-5 h-5 text-blue-500" />
+          Ask a Follow-up Question
+        </CardTitle>
+      </CardHeader>
+      <CardContent className="space-y-4">
+        {turns.map((turn, index) => (
+          <div key={index} className="space-y-2">
+            <p className="font-medium text-gray-900">{turn.question}</p>
+            <div className="text-gray-700 prose prose-sm bg-blue-50 rounded-lg p-4">
+              {turn.answer?.answer ? (
+                <MarkdownView text={turn.answer.answer} language={language} />
+              ) : (
+                <div className="h-3 bg-gray-200 rounded w-1/2 animate-pulse" />
+              )}
+              {turn.answer?.code_example && (
+                <MarkdownView text={'```' + language + '\n' + turn.answer.code_example + '\n```'} language={language} />
+              )}
+            </div>
+          </div>
+        ))}
+
+        <form onSubmit={handleSubmit} className="flex items-center gap-2">
+          <Input
+            value={question}
+            onChange={(event) => setQuestion(event.target.value)}
+            placeholder="e.g. Why does this line fail?"
+            disabled={isAsking}
+          />
+          <Button type="submit" disabled={isAsking || !question.trim()} className="flex items-center gap-2">
+            <Send className="w-4 h-4" />
+            Ask
+          </Button>
+        </form>
+      </CardContent>
+    </Card>
+  );
+}
@@ -0,0 +1,19 @@
+import React from 'react';
+import { TOKEN_CLASSES } from "./syntaxHighlight";
+
+// One line of code with its [start, end, type] tokens applied.
+export default function HighlightedText({ text, tokens }) {
+  const parts = [];
+  let position = 0;
+  for (let t = 0; t < tokens.length; t += 3) {
+    if (tokens[t] > position) parts.push(text.slice(position, tokens[t]));
+    parts.push(
+      <span key={t} className={TOKEN_CLASSES[tokens[t + 2]]}>
+        {text.slice(tokens[t], tokens[t + 1])}
+      </span>
+    );
+    position = tokens[t + 1];
+  }
+  if (position < text.length) parts.push(text.slice(position));
+  return <>{parts}</>;
+}
@@ -0,0 +1,204 @@
+import { EXPLANATION_SCHEMA } from "./analysisPrompt";
+import { outlineLines } from "./promptBudget";
+
+// Re-analysis after a small edit. Instead of resending the whole program we
+// send the previous explanation plus the changed hunks, and let the model
+// mark which parts of its earlier answer still apply so it does not have to
+// write them again.
+
+const MAX_CHANGED_RATIO = 0.5;
+const CONTEXT_LINES = 3;
+const MAX_LCS_CELLS = 250000;
+const SUMMARY_FIELD_CHARS = 600;
+const REUSABLE_FIELDS = ['simple_explanation', 'solution', 'learning_points'];
+
+const stats = {
+  incrementalRequests: 0,
+  fullRequests: 0,
+  promptChars: 0,
+  baselineChars: 0
+};
+
+const hashLine = (line) => {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < line.length; i++) {
+    hash = Math.imul(hash ^ line.charCodeAt(i), 0x01000193) >>> 0;
+  }
+  return hash;
+};
+
+export const snapshotCode = (code) => {
+  const lines = code.replace(/\r\n?/g, '\n').split('\n');
+  return { code, lines, hashes: lines.map(line => hashLine(line.replace(/\s+$/, ''))) };
+};
+
+// Line diff: common prefix/suffix are trimmed first (the usual one-line fix
+// ends there), then an LCS over the remaining middle when it is small enough.
+// Returns hunks as { oldStart, oldEnd, newStart, newEnd } (0-based, end exclusive).
+export const diffLines = (before, after) => {
+  let start = 0;
+  while (start < before.length && start < after.length && before[start] === after[start]) start++;
+  let endBefore = before.length;
+  let endAfter = after.length;
+  while (endBefore > start && endAfter > start && before[endBefore - 1] === after[endAfter - 1]) {
+    endBefore--;
+    endAfter--;
+  }
+  if (start === endBefore && start === endAfter) return [];
+
+  const a = before.slice(start, endBefore);
+  const b = after.slice(start, endAfter);
+  if (a.length * b.length > MAX_LCS_CELLS || a.length === 0 || b.length === 0) {
+    return [{ oldStart: start, oldEnd: endBefore, newStart: start, newEnd: endAfter }];
+  }
+
+  const table = Array.from({ length: a.length + 1 }, () => new Uint32Array(b.length + 1));
+  for (let i = a.length - 1; i >= 0; i--) {
+    for (let j = b.length - 1; j >= 0; j--) {
+      table[i][j] = a[i] === b[j] ? table[i + 1][j + 1] + 1 : Math.max(table[i + 1][j], table[i][j + 1]);
+    }
+  }
+
+  const hunks = [];
+  let current = null;
+  let i = 0;
+  let j = 0;
+  const extend = () => {
+    if (!current) current = { oldStart: start + i, oldEnd: start + i, newStart: start + j, newEnd: start + j };
+  };
+  while (i < a.length || j < b.length) {
+    if (i < a.length && j < b.length && a[i] === b[j]) {
+      if (current) hunks.push(current);
+      current = null;
+      i++;
+      j++;
+    } else if (j < b.length && (i === a.length || table[i][j + 1] >= table[i + 1][j])) {
+      extend();
+      current.newEnd = start + ++j;
+    } else {
+      extend();
+      current.oldEnd = start + ++i;
+    }
+  }
+  if (current) hunks.push(current);
+  return hunks;
+};
+
+const formatHunk = (hunk, previous, next) => {
+  const contextStart = Math.max(0, hunk.newStart - CONTEXT_LINES);
+  const contextEnd = Math.min(next.lines.length, hunk.newEnd + CONTEXT_LINES);
+  const out = [`@@ -${hunk.oldStart + 1},${hunk.oldEnd - hunk.oldStart} +${hunk.newStart + 1},${hunk.newEnd - hunk.newStart} @@`];
+
+  for (let k = contextStart; k < hunk.newStart; k++) out.push(`  ${next.lines[k]}`);
+  for (let k = hunk.oldStart; k < hunk.oldEnd; k++) out.push(`- ${previous.lines[k]}`);
+  for (let k = hunk.newStart; k < hunk.newEnd; k++) out.push(`+ ${next.lines[k]}`);
+  for (let k = hunk.newEnd; k < contextEnd; k++) out.push(`  ${next.lines[k]}`);
+  return out.join('\n');
+};
+
+// Signatures give the model the program's shape without its full text.
+const outline = (snapshot) =>
+  outlineLines(snapshot.lines)
+    .map(({ line, index }) => `${index + 1}: ${line.trim()}`)
+    .join('\n');
+
+const truncate = (text = '', limit = SUMMARY_FIELD_CHARS) =>
+  text.length > limit ? `${text.slice(0, limit)}...` : text;
+
+export const summarizeExplanation = (explanation) => {
+  const points = (explanation.learning_points || []).map(point => `- ${point}`).join('\n');
+  return [
+    `Error type: ${explanation.error_type || 'unknown'}`,
+    explanation.error_line ? `Error line: ${explanation.error_line}` : null,
+    `Explanation: ${truncate(explanation.simple_explanation)}`,
+    `Solution: ${truncate(explanation.solution)}`,
+    points ? `Learning points:\n${points}` : null
+  ].filter(Boolean).join('\n');
+};
+
+export const INCREMENTAL_SCHEMA = {
+  type: "object",
+  properties: {
+    // Listed first so streamed partials know which fields to reuse early
+    unchanged_fields: {
+      type: "array",
+      items: {
+        type: "string",
+        enum: REUSABLE_FIELDS
+      },
+      description: "Fields of the previous explanation that still apply word for word; leave those fields empty"
+    },
+    ...EXPLANATION_SCHEMA.properties
+  }
+};
+
+// Returns null when a full analysis is the better choice, otherwise the
+// delta prompt and a merge function that fills reused fields back in. A
+// different error message is a different question, so it always gets a
+// full analysis.
+export const planIncrementalAnalysis = ({ previous, code, language, level, errorMessage = '', baselinePrompt }) => {
+  if (!previous || previous.language !== language || previous.level !== level || !previous.explanation) {
+    return null;
+  }
+  if ((previous.errorMessage || '').trim() !== errorMessage.trim()) return null;
+
+  const next = snapshotCode(code);
+  const hunks = diffLines(previous.snapshot.hashes, next.hashes);
+  if (hunks.length === 0) return null;
+
+  const changed = hunks.reduce(
+    (sum, hunk) => sum + Math.max(hunk.oldEnd - hunk.oldStart, hunk.newEnd - hunk.newStart),
+    0
+  );
+  if (changed / Math.max(next.lines.length, 1) > MAX_CHANGED_RATIO) return null;
+
+  const prompt = `
+  You are a friendly programming tutor helping a ${level} programmer.
+
+  You already analyzed their ${language} program and explained:
+  ${summarizeExplanation(previous.explanation)}
+
+  ${errorMessage.trim() ? `When run, it reported this error:\n  \`\`\`\n  ${errorMessage.trim()}\n  \`\`\`\n\n  ` : ''}They have now edited the code (${next.lines.length} lines in total). Program outline:
+  ${outline(next) || '(no declarations)'}
+
+  Changed lines (unified diff, new line numbers):
+  \`\`\`diff
+  ${hunks.map(hunk => formatHunk(hunk, previous.snapshot, next)).join('\n')}
+  \`\`\`
+
+  Update your analysis for the edited code. If the edit fixed the issue, say so and explain why the change works.
+  For any of simple_explanation, solution or learning_points that still apply unchanged,
+  list the field name in unchanged_fields and leave that field empty instead of repeating it.
+`;
+
+  // Tiny programs are cheaper to resend than to summarize
+  const baselineChars = baselinePrompt ? baselinePrompt.length : code.length;
+  if (prompt.length >= baselineChars) return null;
+
+  stats.incrementalRequests++;
+  stats.promptChars += prompt.length;
+  stats.baselineChars += baselineChars;
+
+  const merge = (result) => {
+    const merged = { ...result };
+    for (const field of result.unchanged_fields || []) {
+      if (REUSABLE_FIELDS.includes(field)) merged[field] = previous.explanation[field];
+    }
+    delete merged.unchanged_fields;
+    return merged;
+  };
+
+  return { prompt, schema: INCREMENTAL_SCHEMA, merge, hunks };
+};
+
+export const recordFullAnalysis = (prompt) => {
+  stats.fullRequests++;
+  stats.promptChars += prompt.length;
+  stats.baselineChars += prompt.length;
+};
+
+export const getIncrementalStats = () => ({
+  ...stats,
+  savedChars: stats.baselineChars - stats.promptChars,
+  savedRatio: stats.baselineChars > 0 ? 1 - stats.promptChars / stats.baselineChars : 0
+});
@@ -0,0 +1,25 @@
+import React from 'react';
+import { Button } from "@/components/ui/button";
+import { Mic, MicOff } from "lucide-react";
+import { recognitionService, useRecognitionState } from "./speechRecognition";
+
+// Turns the shared recognition service on and off; it keeps listening
+// across pages until turned off here or voice is disabled.
+export default function ListenButton({ disabled = false, size = "sm" }) {
+  const { supported, listening } = useRecognitionState();
+
+  return (
+    <Button
+      variant={listening ? "default" : "outline"}
+      size={size}
+      onClick={() => (listening ? recognitionService.stop() : recognitionService.start())}
+      disabled={disabled || !supported}
+      className={`flex items-center gap-2 ${
+        listening ? 'bg-red-500 hover:bg-red-600 text-white animate-pulse' : ''
+      }`}
+    >
+      {listening ? <MicOff className="w-4 h-4" /> : <Mic className="w-4 h-4" />}
+      {listening ? 'Stop Listening' : 'Start Voice'}
+    </Button>
+  );
+}
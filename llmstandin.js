@@ -0,0 +1,174 @@
+// Local stand-in for InvokeLLM and the DebuggingSession / User entities,
+// used to measure the analyze flow without the live services. Responses
+// are replayed from recordings (captured with createRecorder) with
+// latencies drawn from a configurable distribution, and streamed in chunks
+// the same way a streaming backend would.
+
+const DEFAULT_OPTIONS = {
+  seed: 1,
+  // Time until the first streamed chunk (or the full response when not streaming)
+  llmLatency: { distribution: 'lognormal', medianMs: 900, p95Ms: 2500 },
+  streaming: { enabled: true, chunkChars: 24, intervalMs: 25 },
+  entityLatency: { distribution: 'lognormal', medianMs: 120, p95Ms: 350 }
+};
+
+const FALLBACK_RESPONSE = {
+  error_type: 'No errors found',
+  simple_explanation: 'This is a recorded stand-in response.',
+  solution: 'Nothing to fix.',
+  learning_points: ['Recorded responses are replayed by the benchmark']
+};
+
+// Small seeded PRNG so benchmark runs are reproducible.
+export const createRandom = (seed = 1) => {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6d2b79f5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+};
+
+const gaussian = (random) => {
+  const u = Math.max(random(), Number.EPSILON);
+  return Math.sqrt(-2 * Math.log(u)) * Math.cos(2 * Math.PI * random());
+};
+
+// Latency spec: { distribution: 'fixed', ms } | { distribution: 'uniform', minMs, maxMs }
+// | { distribution: 'lognormal', medianMs, p95Ms }
+export const sampleLatency = (spec, random = Math.random) => {
+  if (!spec) return 0;
+  switch (spec.distribution) {
+    case 'fixed':
+      return spec.ms;
+    case 'uniform':
+      return spec.minMs + random() * (spec.maxMs - spec.minMs);
+    case 'lognormal': {
+      const sigma = Math.log(spec.p95Ms / spec.medianMs) / 1.645;
+      return spec.medianMs * Math.exp(sigma * gaussian(random));
+    }
+    default:
+      throw new Error(`Unknown latency distribution: ${spec.distribution}`);
+  }
+};
+
+const delay = (ms, signal) =>
+  new Promise((resolve, reject) => {
+    const timer = setTimeout(resolve, ms);
+    signal?.addEventListener('abort', () => {
+      clearTimeout(timer);
+      const error = new Error('Stand-in request was cancelled');
+      error.name = 'AbortError';
+      reject(error);
+    }, { once: true });
+  });
+
+// Wraps the real InvokeLLM and keeps every prompt/response pair so a
+// session can be saved as a recordings file.
+export const createRecorder = (invoke) => {
+  const recordings = [];
+  return {
+    invoke: async (params) => {
+      const { stream, signal, ...request } = params;
+      const response = await invoke(request);
+      recordings.push({ prompt: request.prompt, response });
+      return response;
+    },
+    recordings: () => recordings.slice()
+  };
+};
+
+// Recordings: [{ prompt?, match?, response }]. An exact prompt wins, then the
+// first recording whose `match` text occurs in the prompt, then the first
+// recording at all.
+export const createStandIn = (recordings = [], overrides = {}) => {
+  const options = { ...DEFAULT_OPTIONS, ...overrides };
+  const random = createRandom(options.seed);
+  const byPrompt = new Map(recordings.filter(r => r.prompt).map(r => [r.prompt, r.response]));
+  const calls = { llm: 0, replayed: 0, fallback: 0, entity: 0 };
+
+  const findResponse = (prompt) => {
+    if (byPrompt.has(prompt)) {
+      calls.replayed++;
+      return byPrompt.get(prompt);
+    }
+    const partial = recordings.find(r => r.match && prompt.includes(r.match));
+    if (partial) {
+      calls.replayed++;
+      return partial.response;
+    }
+    calls.fallback++;
+    return recordings[0]?.response || FALLBACK_RESPONSE;
+  };
+
+  async function* streamText(text, signal) {
+    const { chunkChars, intervalMs } = options.streaming;
+    for (let i = 0; i < text.length; i += chunkChars) {
+      if (i > 0) await delay(intervalMs, signal);
+      yield text.slice(i, i + chunkChars);
+    }
+  }
+
+  const InvokeLLM = async ({ prompt, stream, signal }) => {
+    calls.llm++;
+    const response = findResponse(prompt);
+    await delay(sampleLatency(options.llmLatency, random), signal);
+    if (stream && options.streaming.enabled) return streamText(JSON.stringify(response), signal);
+    return structuredClone(response);
+  };
+
+  const entityCall = async (result) => {
+    calls.entity++;
+    await delay(sampleLatency(options.entityLatency, random));
+    return result;
+  };
+
+  const sessions = [];
+  const user = { email: 'student@example.com', programming_level: 'beginner', voice_enabled: true, total_sessions: 0 };
+
+  const DebuggingSession = {
+    create: (data) => {
+      const record = { id: String(sessions.length + 1), created_by: user.email, created_date: new Date().toISOString(), ...data };
+      sessions.push(record);
+      return entityCall(record);
+    },
+    update: (id, data) => {
+      const record = sessions.find(s => s.id === id);
+      if (record) Object.assign(record, data);
+      return entityCall(record);
+    },
+    filter: (query = {}, sort, limit) => {
+      const matches = sessions
+        .filter(s => Object.entries(query).every(([key, value]) => s[key] === value))
+        .reverse();
+      return entityCall(limit ? matches.slice(0, limit) : matches);
+    },
+    list: (sort, limit) => entityCall(limit ? sessions.slice(-limit).reverse() : sessions.slice().reverse())
+  };
+
+  const blobs = [];
+  const ContentBlob = {
+    create: (data) => {
+      const record = { id: String(blobs.length + 1), created_by: user.email, created_date: new Date().toISOString(), ...data };
+      blobs.push(record);
+      return entityCall(record);
+    },
+    filter: (query = {}, sort, limit) => {
+      const matches = blobs.filter(b => Object.entries(query).every(([key, value]) => b[key] === value));
+      return entityCall(limit ? matches.slice(0, limit) : matches);
+    },
+    list: (sort, limit) => entityCall(limit ? blobs.slice(-limit).reverse() : blobs.slice().reverse())
+  };
+
+  const User = {
+    me: () => entityCall({ ...user }),
+    updateMyUserData: (data) => {
+      Object.assign(user, data);
+      return entityCall({ ...user });
+    }
+  };
+
+  return { InvokeLLM, entities: { DebuggingSession, User, ContentBlob }, calls };
+};
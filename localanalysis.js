@@ -0,0 +1,89 @@
+import { preAnalyze } from "./preAnalyzer";
+
+// Main-thread client for the pre-analysis worker. Falls back to running the
+// rules inline when workers are unavailable, and gives up after a short
+// timeout so a slow worker never delays the LLM path.
+
+const WORKER_TIMEOUT_MS = 250;
+
+const stats = {
+  lookups: 0,
+  hits: 0,
+  byRule: {},
+  totalDurationMs: 0
+};
+
+let worker = null;
+let workerFailed = false;
+let nextId = 0;
+const pending = new Map();
+
+const getWorker = () => {
+  if (worker || workerFailed || typeof Worker === 'undefined') return worker;
+  try {
+    worker = new Worker(new URL('./preAnalyzer.worker.js', import.meta.url), { type: 'module' });
+    worker.onmessage = (event) => {
+      const request = pending.get(event.data.id);
+      if (!request) return;
+      pending.delete(event.data.id);
+      request.resolve(event.data.result);
+    };
+    worker.onerror = (error) => {
+      console.error('Pre-analysis worker error:', error);
+      workerFailed = true;
+      worker = null;
+      for (const request of pending.values()) request.resolve(undefined);
+      pending.clear();
+    };
+  } catch (error) {
+    console.error('Could not start pre-analysis worker:', error);
+    workerFailed = true;
+    worker = null;
+  }
+  return worker;
+};
+
+const runInWorker = (input) => {
+  const activeWorker = getWorker();
+  if (!activeWorker) return Promise.resolve(undefined);
+
+  const id = ++nextId;
+  return new Promise((resolve) => {
+    const timer = setTimeout(() => {
+      pending.delete(id);
+      resolve(null);
+    }, WORKER_TIMEOUT_MS);
+    pending.set(id, {
+      resolve: (result) => {
+        clearTimeout(timer);
+        resolve(result);
+      }
+    });
+    activeWorker.postMessage({ id, ...input });
+  });
+};
+
+// Resolves to an explanation tagged with the rule that produced it, or null
+// when no rule is confident enough.
+export const runLocalAnalysis = async ({ code, language, level }) => {
+  const started = performance.now();
+  let result = await runInWorker({ code, language, level });
+  if (result === undefined) {
+    result = preAnalyze({ code, language, level });
+  }
+
+  stats.lookups++;
+  stats.totalDurationMs += performance.now() - started;
+  if (result) {
+    stats.hits++;
+    stats.byRule[result.rule_id] = (stats.byRule[result.rule_id] || 0) + 1;
+  }
+  return result;
+};
+
+export const getLocalAnalysisStats = () => ({
+  ...stats,
+  byRule: { ...stats.byRule },
+  hitRate: stats.lookups > 0 ? stats.hits / stats.lookups : 0,
+  averageDurationMs: stats.lookups > 0 ? stats.totalDurationMs / stats.lookups : 0
+});
@@ -0,0 +1,265 @@
+import { DEBUGGER_COMMANDS, normalizeWords } from "./voiceCommands";
+
+// On-device speech recognition with the same interface as the browser's
+// SpeechRecognition (start/stop, onstart/onresult/onend/onerror), so the
+// recognition service can use either. Audio is captured by an AudioWorklet
+// and decoded by a WASM model in speech.worker.js; nothing leaves the
+// machine, and it works where the browser engine is missing (Firefox,
+// locked-down lab machines).
+//
+// The model only listens for a small vocabulary, the debugger commands and
+// common programming words, which keeps it fast and accurate on commands;
+// free dictation outside that vocabulary comes back as nothing.
+
+const DEFAULT_OPTIONS = {
+  modelUrl: '/models/vosk-model-small-en-us-0.15.tar.gz',
+  sampleRate: 16000,
+  chunkMs: 100
+};
+
+let options = DEFAULT_OPTIONS;
+
+export const configureLocalRecognition = (overrides = {}) => {
+  options = { ...DEFAULT_OPTIONS, ...overrides };
+};
+
+export const PROGRAMMING_TERMS = [
+  'python', 'javascript', 'java', 'html', 'css', 'code', 'error', 'bug', 'line', 'function', 'variable',
+  'print', 'return', 'def', 'class', 'import', 'if', 'else', 'for', 'while', 'loop', 'list', 'array',
+  'string', 'number', 'integer', 'true', 'false', 'none', 'null', 'equals', 'plus', 'minus', 'times',
+  'divide', 'by', 'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+  'open', 'close', 'paren', 'bracket', 'quote', 'colon', 'comma', 'dot', 'new', 'the', 'a', 'is', 'it',
+  'what', 'why', 'how', 'does', 'this', 'mean', 'fix', 'my', 'please'
+];
+
+// Vosk grammar: any sequence of these words, anything else is "[unk]"
+export const recognitionGrammar = (commands = DEBUGGER_COMMANDS) => {
+  const words = new Set(PROGRAMMING_TERMS);
+  for (const { phrases } of commands) {
+    for (const phrase of phrases) normalizeWords(phrase).forEach(word => words.add(word));
+  }
+  return [...words, '[unk]'];
+};
+
+const stats = { modelLoads: 0, modelLoadMs: null, utterances: 0, errors: 0 };
+
+// Whether the engine and model are there: null until the probe answers.
+// The browser APIs alone say nothing, since vosk-browser and the model are
+// optional and not shipped with the app.
+let engineAvailable = null;
+let probing = false;
+const availabilityListeners = new Set();
+
+const setEngineAvailable = (available) => {
+  if (engineAvailable === available) return;
+  engineAvailable = available;
+  availabilityListeners.forEach(listener => listener(available));
+};
+
+export const onLocalRecognitionAvailability = (listener) => {
+  availabilityListeners.add(listener);
+  return () => availabilityListeners.delete(listener);
+};
+
+// Asks a short-lived worker whether vosk-browser imports and the model URL
+// answers, without downloading the model. Runs once per tab.
+const probeEngine = () => {
+  if (probing || engineAvailable !== null) return;
+  probing = true;
+  const probe = new Worker(new URL('./speech.worker.js', import.meta.url), { type: 'module' });
+  const finish = (available, reason) => {
+    probe.terminate();
+    probing = false;
+    if (!available) console.error('On-device recognition unavailable:', reason);
+    setEngineAvailable(available);
+  };
+  probe.onmessage = (event) => {
+    if (event.data.type === 'probe') finish(event.data.ok, event.data.message);
+  };
+  probe.onerror = (error) => finish(false, error.message);
+  probe.postMessage({ type: 'probe', modelUrl: options.modelUrl });
+};
+
+// False until the probe has confirmed the engine and model
+export const isLocalRecognitionAvailable = () => {
+  if (typeof Worker === 'undefined' || typeof WebAssembly === 'undefined' || typeof AudioWorkletNode === 'undefined') {
+    return false;
+  }
+  probeEngine();
+  return engineAvailable === true;
+};
+
+// One worker and model for the tab; loading the model is the slow part
+let worker = null;
+let ready = null;
+let loaded = false;
+let activeRecognition = null;
+
+const getWorker = () => {
+  if (!ready) {
+    const loadStarted = performance.now();
+    worker = new Worker(new URL('./speech.worker.js', import.meta.url), { type: 'module' });
+    ready = new Promise((resolve, reject) => {
+      worker.onmessage = (event) => {
+        const message = event.data;
+        if (message.type === 'ready') {
+          loaded = true;
+          setEngineAvailable(true);
+          stats.modelLoads++;
+          stats.modelLoadMs = performance.now() - loadStarted;
+          resolve(worker);
+        } else if (message.type === 'error') {
+          stats.errors++;
+          if (!loaded) {
+            reject(new Error(message.message));
+            return;
+          }
+          console.error('Speech worker error:', message.message);
+          activeRecognition?.handleError('engine-error');
+        } else {
+          activeRecognition?.handleMessage(message);
+        }
+      };
+      worker.onerror = (error) => reject(error);
+    });
+    worker.postMessage({
+      type: 'init',
+      modelUrl: options.modelUrl,
+      grammar: recognitionGrammar(),
+      rate: options.sampleRate
+    });
+    ready.catch(() => {
+      worker.terminate();
+      ready = null;
+      // A model that fails to load will not load on the next try either
+      setEngineAvailable(false);
+    });
+  }
+  return ready;
+};
+
+const toResult = (transcript, isFinal) => Object.assign([{ transcript, confidence: 1 }], { isFinal });
+
+export class LocalSpeechRecognition {
+  constructor() {
+    this.continuous = false;
+    this.interimResults = false;
+    this.lang = 'en-US';
+    this.results = [];
+    this.running = false;
+    this.preRoll = null;
+    this.onstart = null;
+    this.onresult = null;
+    this.onend = null;
+    this.onerror = null;
+    this.onspeechend = null;
+  }
+
+  // Loads the model without opening the microphone (also used by the
+  // fixture benchmark, which feeds audio with feedAudio)
+  async prepare() {
+    await getWorker();
+    activeRecognition = this;
+    this.results = [];
+  }
+
+  feedAudio(samples) {
+    worker.postMessage({ type: 'audio', samples }, [samples.buffer]);
+  }
+
+  flush() {
+    worker.postMessage({ type: 'flush' });
+  }
+
+  start() {
+    if (this.running) throw new Error('Recognition already started');
+    this.running = true;
+    this.open().catch((error) => {
+      if (error.name === 'NotAllowedError') {
+        this.handleError('not-allowed');
+      } else {
+        console.error('Error starting on-device recognition:', error);
+        this.handleError(error.name === 'NotFoundError' ? 'audio-capture' : 'engine-unavailable');
+      }
+      this.close();
+    });
+  }
+
+  async open() {
+    await this.prepare();
+    this.stream = await navigator.mediaDevices.getUserMedia({
+      audio: { echoCancellation: true, noiseSuppression: true, channelCount: 1 }
+    });
+    this.context = new AudioContext();
+    await this.context.audioWorklet.addModule(new URL('./audiocapture.worklet.js', import.meta.url));
+    const source = this.context.createMediaStreamSource(this.stream);
+    const capture = new AudioWorkletNode(this.context, 'audio-capture', {
+      processorOptions: { targetRate: options.sampleRate, chunkMs: options.chunkMs }
+    });
+    const channel = new MessageChannel();
+    capture.port.postMessage({ port: channel.port1 }, [channel.port1]);
+    worker.postMessage({ type: 'connect', port: channel.port2 }, [channel.port2]);
+    // Audio heard before the microphone was ours goes first
+    if (this.preRoll) {
+      const samples = await this.preRoll();
+      this.preRoll = null;
+      if (samples.length > 0) this.feedAudio(samples);
+    }
+    source.connect(capture);
+    if (!this.running) {
+      this.close();
+      return;
+    }
+    this.onstart && this.onstart();
+  }
+
+  stop() {
+    if (!this.running) return;
+    if (worker) this.flush();
+    this.close();
+  }
+
+  abort() {
+    this.stop();
+  }
+
+  close() {
+    const wasRunning = this.running;
+    this.running = false;
+    this.stream?.getTracks().forEach(track => track.stop());
+    this.context?.close();
+    this.stream = null;
+    this.context = null;
+    if (wasRunning) this.onend && this.onend();
+  }
+
+  handleError(error) {
+    this.onerror && this.onerror({ error });
+  }
+
+  // The last entry of `results` is the utterance in progress, if any
+  handleMessage({ type, text }) {
+    const last = this.results[this.results.length - 1];
+    const index = last && !last.isFinal ? this.results.length - 1 : this.results.length;
+
+    if (type === 'partial') {
+      if (!this.interimResults) return;
+      this.results[index] = toResult(text, false);
+    } else if (type === 'result') {
+      if (!text) {
+        // Silence or out-of-vocabulary speech: drop the interim result
+        if (index < this.results.length) this.results.pop();
+        return;
+      }
+      this.results[index] = toResult(text, true);
+      stats.utterances++;
+      this.onspeechend && this.onspeechend();
+    } else {
+      return;
+    }
+    this.onresult && this.onresult({ resultIndex: index, results: this.results });
+    if (type === 'result' && !this.continuous) this.stop();
+  }
+}
+
+export const getLocalRecognitionStats = () => ({ ...stats });
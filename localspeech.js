@@ -0,0 +1,275 @@
+import { MemoryLRU, hashText } from "../debugger/explanationCache";
+import { LANGUAGE_EXAMPLES } from "../debugger/languageExamples";
+import { preAnalyze } from "../debugger/preAnalyzer";
+import { SPEECH_LEADS, explanationSpeech, speechQueue, splitSentences } from "./speechQueue";
+
+// On-device text-to-speech. Sentences are rendered by a WASM voice in
+// tts.worker.js and the audio is kept in Cache Storage, keyed by the
+// sentence's hash and the voice, so a sentence is synthesized once per
+// browser and every repeat plays straight from the cache. The recurring
+// sentences (the fixed lead-ins, "I found a TypeError." and the built-in
+// examples' explanations) are synthesized ahead of time while idle.
+//
+// LocalSpeechSynth has the speechSynthesis interface, so the speech queue
+// drives it exactly like the browser's engine. The speech rate is applied
+// at playback (pitch preserved), so one rendering serves every rate.
+
+const DEFAULT_OPTIONS = { voice: 'en_US-hfc_female-medium', memoryEntries: 64 };
+
+const CACHE_NAME = 'codewhisperer-tts-v1';
+const CACHE_PATH = '/tts-cache/';
+
+// Error types worth having ready besides those in the built-in examples
+const COMMON_ERROR_TYPES = [
+  'SyntaxError', 'TypeError', 'NameError', 'IndentationError', 'ZeroDivisionError', 'IndexError',
+  'KeyError', 'AttributeError', 'ValueError', 'ReferenceError', 'NullPointerException',
+  'ArrayIndexOutOfBoundsException', 'Logic Error', 'Runtime Error'
+];
+
+let options = DEFAULT_OPTIONS;
+const memory = new MemoryLRU(DEFAULT_OPTIONS.memoryEntries);
+const inflight = new Map();
+
+const stats = {
+  memoryHits: 0,
+  cacheHits: 0,
+  synthesized: 0,
+  synthesisMs: 0,
+  prewarmed: 0,
+  errors: 0
+};
+
+export const configureLocalSpeech = (overrides = {}) => {
+  options = { ...DEFAULT_OPTIONS, ...overrides };
+  memory.limit = options.memoryEntries;
+};
+
+export const isLocalSpeechAvailable = () =>
+  typeof Worker !== 'undefined' && typeof WebAssembly !== 'undefined' && typeof Audio !== 'undefined';
+
+let worker = null;
+let nextId = 0;
+const pending = new Map();
+
+const synthesize = (text, voice) => {
+  if (!worker) {
+    worker = new Worker(new URL('./tts.worker.js', import.meta.url), { type: 'module' });
+    worker.onmessage = (event) => {
+      const request = pending.get(event.data.id);
+      if (!request) return;
+      pending.delete(event.data.id);
+      if (event.data.error) request.reject(new Error(event.data.error));
+      else request.resolve(event.data.audio);
+    };
+    worker.onerror = (error) => {
+      console.error('Speech synthesis worker error:', error);
+    };
+  }
+  return new Promise((resolve, reject) => {
+    const id = ++nextId;
+    pending.set(id, { resolve, reject });
+    worker.postMessage({ id, text, voice });
+  });
+};
+
+let cacheOpen = null;
+const openCache = () => {
+  if (!cacheOpen) {
+    cacheOpen = typeof caches === 'undefined'
+      ? Promise.resolve(null)
+      : caches.open(CACHE_NAME).catch((error) => {
+        console.error('Error opening speech cache:', error);
+        return null;
+      });
+  }
+  return cacheOpen;
+};
+
+const audioKey = async (text, voice) =>
+  `${CACHE_PATH}${encodeURIComponent(voice)}/${(await hashText(text)).slice(0, 32)}.wav`;
+
+const loadAudio = async (key, text, voice) => {
+  const cache = await openCache();
+  const cached = cache && await cache.match(key);
+  if (cached) {
+    stats.cacheHits++;
+    return cached.blob();
+  }
+
+  const started = performance.now();
+  const audio = new Blob([await synthesize(text, voice)], { type: 'audio/wav' });
+  stats.synthesized++;
+  stats.synthesisMs += performance.now() - started;
+  if (cache) {
+    cache.put(key, new Response(audio, { headers: { 'Content-Type': 'audio/wav' } }))
+      .catch(error => console.error('Error caching synthesized speech:', error));
+  }
+  return audio;
+};
+
+// The rendered sentence as a WAV blob: memory, then Cache Storage, then
+// the worker. Concurrent requests for one sentence share the work.
+export const renderSpeech = async (text, { voice = options.voice } = {}) => {
+  const key = await audioKey(text, voice);
+  const remembered = memory.get(key);
+  if (remembered) {
+    stats.memoryHits++;
+    return remembered;
+  }
+  if (!inflight.has(key)) {
+    const request = loadAudio(key, text, voice)
+      .then((audio) => {
+        memory.set(key, audio);
+        return audio;
+      })
+      .finally(() => inflight.delete(key));
+    inflight.set(key, request);
+  }
+  return inflight.get(key);
+};
+
+export class LocalUtterance {
+  constructor(text) {
+    this.text = text;
+    this.rate = 1;
+    this.pitch = 1;
+    this.volume = 1;
+    this.onstart = null;
+    this.onend = null;
+    this.onerror = null;
+  }
+}
+
+// speechSynthesis-compatible player. Rendering starts as soon as an
+// utterance is queued, so the speech queue's lookahead doubles as prefetch.
+export class LocalSpeechSynth {
+  constructor() {
+    this.queue = [];
+    this.current = null;
+    this.audio = null;
+    this.url = null;
+  }
+
+  speak(utterance) {
+    const entry = { utterance, audio: renderSpeech(utterance.text) };
+    entry.audio.catch(() => {});
+    this.queue.push(entry);
+    if (!this.current) this.playNext();
+  }
+
+  async playNext() {
+    const entry = this.queue.shift() || null;
+    this.current = entry;
+    if (!entry) return;
+    const { utterance } = entry;
+
+    try {
+      const blob = await entry.audio;
+      if (this.current !== entry) return;
+      this.url = URL.createObjectURL(blob);
+      const audio = new Audio(this.url);
+      audio.playbackRate = utterance.rate;
+      audio.preservesPitch = true;
+      audio.volume = utterance.volume;
+      audio.onplay = () => utterance.onstart && utterance.onstart();
+      audio.onended = () => this.finish(entry, () => utterance.onend && utterance.onend());
+      audio.onerror = () => this.finish(entry, () => utterance.onerror && utterance.onerror({ error: 'audio-hardware' }));
+      this.audio = audio;
+      await audio.play();
+    } catch (error) {
+      if (this.current !== entry) return;
+      stats.errors++;
+      console.error('Error playing synthesized speech:', error);
+      this.finish(entry, () => utterance.onerror && utterance.onerror({ error: 'synthesis-failed' }));
+    }
+  }
+
+  release() {
+    if (this.audio) this.audio.pause();
+    if (this.url) URL.revokeObjectURL(this.url);
+    this.audio = null;
+    this.url = null;
+  }
+
+  // The next entry is taken before notifying, since the speech queue
+  // answers onend by queuing another utterance
+  finish(entry, notify) {
+    if (this.current !== entry) return;
+    this.release();
+    this.playNext();
+    notify();
+  }
+
+  cancel() {
+    const current = this.current;
+    const queued = this.queue;
+    this.queue = [];
+    this.current = null;
+    this.release();
+    if (current?.utterance.onerror) current.utterance.onerror({ error: 'interrupted' });
+    queued.forEach(({ utterance }) => utterance.onerror && utterance.onerror({ error: 'canceled' }));
+  }
+}
+
+export const localSpeechSynth = new LocalSpeechSynth();
+
+// Sentences worth having ready for a student at `level`
+const recurringSentences = async (level) => {
+  const sentences = new Set(splitSentences(SPEECH_LEADS.join('\n')));
+  // The built-in examples are answered by the local rules
+  const examples = Object.entries(LANGUAGE_EXAMPLES)
+    .map(([language, code]) => preAnalyze({ code, language, level }))
+    .filter(Boolean);
+  const errorTypes = new Set([...COMMON_ERROR_TYPES, ...examples.map(example => example.error_type)]);
+  errorTypes.forEach(errorType => splitSentences(explanationSpeech({ error_type: errorType }))
+    .forEach(sentence => sentences.add(sentence)));
+  examples.forEach(example => splitSentences(explanationSpeech(example)).forEach(sentence => sentences.add(sentence)));
+  return [...sentences];
+};
+
+const whenIdle = () => new Promise((resolve) => {
+  if (typeof window !== 'undefined' && window.requestIdleCallback) {
+    window.requestIdleCallback(resolve, { timeout: 2000 });
+  } else {
+    setTimeout(resolve, 0);
+  }
+});
+
+let prewarming = null;
+
+// Synthesizes the recurring sentences one at a time in idle periods;
+// sentences already in Cache Storage cost one lookup each.
+export const prewarmSpeech = ({ level = 'beginner' } = {}) => {
+  if (!prewarming) {
+    prewarming = (async () => {
+      for (const sentence of await recurringSentences(level)) {
+        await whenIdle();
+        if (speechQueue.getState().active) await whenIdle();
+        await renderSpeech(sentence);
+        stats.prewarmed++;
+      }
+    })().catch((error) => {
+      console.error('Error pre-synthesizing speech:', error);
+    }).finally(() => {
+      prewarming = null;
+    });
+  }
+  return prewarming;
+};
+
+// 'local' switches the speech queue to this engine, anything else back to
+// the browser's speechSynthesis.
+export const setSpeechEngine = (engine, { level } = {}) => {
+  if (engine === 'local' && isLocalSpeechAvailable()) {
+    if (speechQueue.synth !== localSpeechSynth) speechQueue.setSynth(localSpeechSynth, LocalUtterance);
+    prewarmSpeech({ level });
+  } else if (speechQueue.synth === localSpeechSynth) {
+    speechQueue.setSynth(null, null);
+  }
+};
+
+export const getLocalSpeechStats = () => ({
+  ...stats,
+  memoryEntries: memory.entries.size,
+  meanSynthesisMs: stats.synthesized > 0 ? stats.synthesisMs / stats.synthesized : null
+});
@@ -0,0 +1,189 @@
+import { MemoryLRU, fnv1a } from "./explanationCache";
+
+// Compiles the markdown in explanations and follow-up answers into a small
+// JSON tree that MarkdownView renders directly. Compiled trees are cached
+// by content hash, so text that is shown again (a parent re-rendering, the
+// same answer streamed to completion) is not parsed again.
+//
+// Covers what the LLM and tutorial authors actually write: headings,
+// paragraphs, nested lists, block quotes, rules, fenced code, and inline
+// code, bold, italic and links. An unterminated fence (mid-stream) runs to
+// the end of the text.
+
+const DEFAULT_OPTIONS = { entries: 200 };
+
+const cache = new MemoryLRU(DEFAULT_OPTIONS.entries);
+const stats = { compiled: 0, hits: 0 };
+
+export const configureMarkdownCache = (overrides = {}) => {
+  cache.limit = { ...DEFAULT_OPTIONS, ...overrides }.entries;
+};
+
+const SAFE_URL = /^(https?:|mailto:|#|\/)/i;
+
+// Inline markdown to [string | { t, ... }]
+const parseInline = (text) => {
+  const nodes = [];
+  let plain = '';
+  const flush = () => {
+    if (plain) nodes.push(plain);
+    plain = '';
+  };
+
+  let i = 0;
+  while (i < text.length) {
+    const ch = text[i];
+    if (ch === '\\' && i + 1 < text.length && /[\\`*_[\]()#+\-.!]/.test(text[i + 1])) {
+      plain += text[i + 1];
+      i += 2;
+      continue;
+    }
+    if (ch === '`') {
+      const ticks = /^`+/.exec(text.slice(i))[0];
+      const close = text.indexOf(ticks, i + ticks.length);
+      if (close !== -1) {
+        flush();
+        nodes.push({ t: 'code', v: text.slice(i + ticks.length, close).trim() });
+        i = close + ticks.length;
+        continue;
+      }
+    }
+    if ((ch === '*' || ch === '_') && text[i + 1] === ch) {
+      const close = text.indexOf(ch + ch, i + 2);
+      if (close > i + 2) {
+        flush();
+        nodes.push({ t: 'strong', c: parseInline(text.slice(i + 2, close)) });
+        i = close + 2;
+        continue;
+      }
+    }
+    if ((ch === '*' || ch === '_') && text[i + 1] !== ' ' && (ch === '*' || !/\w/.test(text[i - 1] || ''))) {
+      let close = i + 1;
+      while ((close = text.indexOf(ch, close)) !== -1 && text[close + 1] === ch) close += 2;
+      if (close > i + 1 && text[close - 1] !== ' ') {
+        flush();
+        nodes.push({ t: 'em', c: parseInline(text.slice(i + 1, close)) });
+        i = close + 1;
+        continue;
+      }
+    }
+    if (ch === '[') {
+      const link = /^\[([^\]]+)\]\(((?:[^()\s]|\([^()\s]*\))+)\)/.exec(text.slice(i));
+      if (link) {
+        flush();
+        nodes.push(SAFE_URL.test(link[2]) ? { t: 'a', href: link[2], c: parseInline(link[1]) } : link[1]);
+        i += link[0].length;
+        continue;
+      }
+    }
+    plain += ch;
+    i++;
+  }
+  flush();
+  return nodes;
+};
+
+const indentOf = (line) => /^ */.exec(line)[0].length;
+const LIST_ITEM = /^( *)([-*+]|\d+[.)])\s+(.*)$/;
+const FENCE = /^ *(`{3,}|~{3,})\s*([\w+#-]*)/;
+
+// Block markdown to [{ t, ... }]
+const parseBlocks = (lines) => {
+  const blocks = [];
+  let i = 0;
+
+  while (i < lines.length) {
+    const line = lines[i];
+    if (!line.trim()) {
+      i++;
+      continue;
+    }
+
+    const fence = FENCE.exec(line);
+    if (fence) {
+      const body = [];
+      i++;
+      while (i < lines.length && !lines[i].trim().startsWith(fence[1])) body.push(lines[i++]);
+      i++;
+      blocks.push({ t: 'pre', lang: fence[2].toLowerCase(), v: body.join('\n') });
+      continue;
+    }
+
+    const heading = /^ {0,3}(#{1,6})\s+(.*?)\s*#*\s*$/.exec(line);
+    if (heading) {
+      blocks.push({ t: 'h', level: heading[1].length, c: parseInline(heading[2]) });
+      i++;
+      continue;
+    }
+
+    if (/^ {0,3}([-*_])( *\1){2,}\s*$/.test(line)) {
+      blocks.push({ t: 'hr' });
+      i++;
+      continue;
+    }
+
+    if (/^ {0,3}>/.test(line)) {
+      const quoted = [];
+      while (i < lines.length && /^ {0,3}>/.test(lines[i])) quoted.push(lines[i++].replace(/^ {0,3}> ?/, ''));
+      blocks.push({ t: 'blockquote', c: parseBlocks(quoted) });
+      continue;
+    }
+
+    const item = LIST_ITEM.exec(line);
+    if (item) {
+      const baseIndent = item[1].length;
+      const ordered = /\d/.test(item[2]);
+      const items = [];
+      while (i < lines.length) {
+        const current = LIST_ITEM.exec(lines[i]);
+        if (!current || current[1].length !== baseIndent || /\d/.test(current[2]) !== ordered) break;
+        // The item's text plus any lines indented under it (nested lists,
+        // continuation paragraphs)
+        const body = [current[3]];
+        const contentIndent = lines[i].length - current[3].length;
+        i++;
+        while (i < lines.length && (!lines[i].trim() ? i + 1 < lines.length && indentOf(lines[i + 1]) > baseIndent : indentOf(lines[i]) > baseIndent)) {
+          body.push(lines[i].slice(Math.min(contentIndent, indentOf(lines[i]))));
+          i++;
+        }
+        items.push(parseBlocks(body));
+      }
+      blocks.push(ordered
+        ? { t: 'ol', start: parseInt(item[2], 10), items }
+        : { t: 'ul', items });
+      continue;
+    }
+
+    const paragraph = [];
+    while (
+      i < lines.length &&
+      lines[i].trim() &&
+      !FENCE.test(lines[i]) &&
+      !/^ {0,3}(#{1,6}\s|>)/.test(lines[i]) &&
+      !(paragraph.length > 0 && LIST_ITEM.test(lines[i]))
+    ) {
+      paragraph.push(lines[i++].trim());
+    }
+    blocks.push({ t: 'p', c: parseInline(paragraph.join('\n')) });
+  }
+  return blocks;
+};
+
+export const parseMarkdown = (text) => parseBlocks(text.replace(/\r\n?/g, '\n').split('\n'));
+
+// Cached compile; the hash picks the slot and the text confirms the hit.
+export const compileMarkdown = (text) => {
+  if (!text) return [];
+  const key = fnv1a(text);
+  const cached = cache.get(key);
+  if (cached && cached.text === text) {
+    stats.hits++;
+    return cached.tree;
+  }
+  const tree = parseMarkdown(text);
+  cache.set(key, { text, tree });
+  stats.compiled++;
+  return tree;
+};
+
+export const getMarkdownStats = () => ({ ...stats, entries: cache.entries.size });
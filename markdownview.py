@@ -0,0 +1,126 @@
+import React, { useState, useEffect, useMemo, memo } from 'react';
+import { compileMarkdown } from "./markdownCompiler";
+
+const FENCE_LANGUAGES = {
+  py: 'python',
+  python: 'python',
+  js: 'javascript',
+  jsx: 'javascript',
+  ts: 'javascript',
+  javascript: 'javascript',
+  typescript: 'javascript',
+  java: 'java',
+  c: 'cpp',
+  cpp: 'cpp',
+  'c++': 'cpp',
+  html: 'html_css',
+  css: 'html_css',
+  html_css: 'html_css'
+};
+
+// The tokenizers are only fetched once a code block needs them
+let highlighter = null;
+let highlighterLoad = null;
+const loadHighlighter = () => {
+  if (!highlighterLoad) {
+    highlighterLoad = Promise.all([import("./syntaxHighlight"), import("./HighlightedText")])
+      .then(([syntax, text]) => {
+        highlighter = { highlightLines: syntax.highlightLines, HighlightedText: text.default };
+        return highlighter;
+      });
+  }
+  return highlighterLoad;
+};
+
+const CodeBlock = ({ code, language }) => {
+  const [loaded, setLoaded] = useState(highlighter);
+
+  useEffect(() => {
+    if (loaded || !language) return;
+    let cancelled = false;
+    loadHighlighter()
+      .then((result) => {
+        if (!cancelled) setLoaded(result);
+      })
+      .catch(error => console.error('Error loading syntax highlighter:', error));
+    return () => {
+      cancelled = true;
+    };
+  }, [loaded, language]);
+
+  const lines = useMemo(
+    () => (loaded && language ? loaded.highlightLines(language, code) : null),
+    [loaded, language, code]
+  );
+
+  return (
+    <pre>
+      <code>
+        {lines
+          ? lines.map(({ text, tokens }, i) => (
+            <React.Fragment key={i}>
+              {i > 0 && '\n'}
+              <loaded.HighlightedText text={text} tokens={tokens} />
+            </React.Fragment>
+          ))
+          : code}
+      </code>
+    </pre>
+  );
+};
+
+const renderInline = (nodes) => nodes.map((node, i) => {
+  if (typeof node === 'string') return node;
+  if (node.t === 'code') return <code key={i}>{node.v}</code>;
+  if (node.t === 'strong') return <strong key={i}>{renderInline(node.c)}</strong>;
+  if (node.t === 'em') return <em key={i}>{renderInline(node.c)}</em>;
+  if (node.t === 'a') {
+    return (
+      <a key={i} href={node.href} target="_blank" rel="noopener noreferrer">
+        {renderInline(node.c)}
+      </a>
+    );
+  }
+  return null;
+});
+
+const renderBlocks = (blocks, language) => blocks.map((block, i) => {
+  switch (block.t) {
+    case 'h': {
+      const Heading = `h${block.level}`;
+      return <Heading key={i}>{renderInline(block.c)}</Heading>;
+    }
+    case 'p':
+      return <p key={i}>{renderInline(block.c)}</p>;
+    case 'ul':
+      return <ul key={i}>{block.items.map((item, k) => <li key={k}>{renderItem(item, language)}</li>)}</ul>;
+    case 'ol':
+      return <ol key={i} start={block.start}>{block.items.map((item, k) => <li key={k}>{renderItem(item, language)}</li>)}</ol>;
+    case 'blockquote':
+      return <blockquote key={i}>{renderBlocks(block.c, language)}</blockquote>;
+    case 'hr':
+      return <hr key={i} />;
+    case 'pre': {
+      const codeLanguage = block.lang ? FENCE_LANGUAGES[block.lang] : FENCE_LANGUAGES[language];
+      return <CodeBlock key={i} code={block.v} language={codeLanguage} />;
+    }
+    default:
+      return null;
+  }
+});
+
+// Tight list items: the leading paragraph renders without its <p>
+const renderItem = (blocks, language) =>
+  blocks[0]?.t === 'p'
+    ? [<React.Fragment key="text">{renderInline(blocks[0].c)}</React.Fragment>, ...renderBlocks(blocks.slice(1), language)]
+    : renderBlocks(blocks, language);
+
+// Renders markdown from the compiled-tree cache; unchanged text is never
+// parsed twice, and re-renders with the same props are skipped outright.
+function MarkdownView({ text, language }) {
+  const tree = useMemo(() => compileMarkdown(text || ''), [text]);
+  const content = useMemo(() => renderBlocks(tree, language), [tree, language]);
+  return <>{content}</>;
+}
+
+export default memo(MarkdownView);
@@ -0,0 +1,246 @@
+// Piece table text buffer for the code editor. The pasted text stays in an
+// immutable original buffer and typing appends to an add buffer; the
+// document is a list of pieces pointing into the two. Each buffer keeps the
+// offsets where its lines start, so line lookups are binary searches and an
+// edit never copies the document.
+
+export const computeLineStarts = (text, base = 0) => {
+  const starts = [];
+  let index = text.indexOf('\n');
+  while (index !== -1) {
+    starts.push(base + index + 1);
+    index = text.indexOf('\n', index + 1);
+  }
+  return starts;
+};
+
+// First index in the sorted array whose value is >= target.
+const lowerBound = (array, target, from = 0, to = array.length) => {
+  let lo = from;
+  let hi = to;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (array[mid] < target) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+};
+
+// Last index in the sorted array whose value is <= target, or -1.
+const upperIndex = (array, target) => {
+  let lo = 0;
+  let hi = array.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (array[mid] <= target) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo - 1;
+};
+
+export class PieceTable {
+  // `lineStarts` may be passed in when it was already computed (e.g. by the
+  // editor worker for a large paste).
+  constructor(text = '', lineStarts = null) {
+    this.buffers = [
+      { text, lineStarts: lineStarts ? Array.from(lineStarts) : computeLineStarts(text) },
+      { text: '', lineStarts: [] }
+    ];
+    this.pieces = text.length > 0 ? [this.createPiece(0, 0, text.length)] : [];
+    this.length = text.length;
+    this.lineBreaks = this.buffers[0].lineStarts.length;
+    this.index = null;
+  }
+
+  get lineCount() {
+    return this.lineBreaks + 1;
+  }
+
+  // Line breaks inside buffer[start, end) are the line starts in (start, end].
+  countBreaks(buffer, start, end) {
+    const starts = this.buffers[buffer].lineStarts;
+    return lowerBound(starts, end + 1) - lowerBound(starts, start + 1);
+  }
+
+  createPiece(buffer, start, length) {
+    return { buffer, start, length, lineBreaks: this.countBreaks(buffer, start, start + length) };
+  }
+
+  // Prefix sums over the pieces, rebuilt lazily after an edit.
+  ensureIndex() {
+    if (this.index) return this.index;
+    const count = this.pieces.length;
+    const offsets = new Float64Array(count + 1);
+    const breaks = new Float64Array(count + 1);
+    for (let i = 0; i < count; i++) {
+      offsets[i + 1] = offsets[i] + this.pieces[i].length;
+      breaks[i + 1] = breaks[i] + this.pieces[i].lineBreaks;
+    }
+    this.index = { offsets, breaks };
+    return this.index;
+  }
+
+  // Piece containing `offset` (the last one for offset === length).
+  pieceAt(offset) {
+    const { offsets } = this.ensureIndex();
+    const i = Math.max(0, Math.min(this.pieces.length - 1, upperIndex(offsets, offset)));
+    return { i, pieceOffset: offsets[i] };
+  }
+
+  // Document offset where `line` (0-based) starts.
+  offsetOfLine(line) {
+    if (line <= 0) return 0;
+    if (line > this.lineBreaks) return this.length;
+    const { offsets, breaks } = this.ensureIndex();
+    // Piece holding the line's preceding break: breaks[p] < line <= breaks[p + 1]
+    const p = lowerBound(breaks, line) - 1;
+    const piece = this.pieces[p];
+    const starts = this.buffers[piece.buffer].lineStarts;
+    const first = lowerBound(starts, piece.start + 1);
+    return offsets[p] + starts[first + (line - breaks[p]) - 1] - piece.start;
+  }
+
+  positionAt(offset) {
+    offset = Math.max(0, Math.min(this.length, offset));
+    if (this.pieces.length === 0) return { line: 0, column: 0 };
+    const { breaks } = this.ensureIndex();
+    const { i, pieceOffset } = this.pieceAt(offset);
+    const piece = this.pieces[i];
+    const line = breaks[i] + this.countBreaks(piece.buffer, piece.start, piece.start + (offset - pieceOffset));
+    return { line, column: offset - this.offsetOfLine(line) };
+  }
+
+  offsetAt(line, column) {
+    const start = this.offsetOfLine(line);
+    return Math.min(start + column, this.lineEnd(line));
+  }
+
+  // Offset of the end of `line`, before its line break.
+  lineEnd(line) {
+    return line >= this.lineBreaks ? this.length : this.offsetOfLine(line + 1) - 1;
+  }
+
+  substring(start, end) {
+    start = Math.max(0, start);
+    end = Math.min(this.length, end);
+    if (end <= start) return '';
+    let { i, pieceOffset } = this.pieceAt(start);
+    const parts = [];
+    let position = start;
+    while (position < end && i < this.pieces.length) {
+      const piece = this.pieces[i];
+      const from = piece.start + (position - pieceOffset);
+      const to = piece.start + Math.min(piece.length, end - pieceOffset);
+      parts.push(this.buffers[piece.buffer].text.slice(from, to));
+      position = pieceOffset + piece.length;
+      pieceOffset = position;
+      i++;
+    }
+    return parts.join('');
+  }
+
+  getLine(line) {
+    return this.substring(this.offsetOfLine(line), this.lineEnd(line));
+  }
+
+  getText() {
+    return this.pieces.map(piece => this.buffers[piece.buffer].text.slice(piece.start, piece.start + piece.length)).join('');
+  }
+
+  insert(offset, text, lineStarts = null) {
+    if (!text) return;
+    offset = Math.max(0, Math.min(this.length, offset));
+    const add = this.buffers[1];
+    const start = add.text.length;
+    add.text += text;
+    if (lineStarts) {
+      for (const lineStart of lineStarts) add.lineStarts.push(start + lineStart);
+    } else {
+      for (const lineStart of computeLineStarts(text, start)) add.lineStarts.push(lineStart);
+    }
+    const inserted = this.createPiece(1, start, text.length);
+
+    if (this.pieces.length === 0) {
+      this.pieces.push(inserted);
+    } else {
+      const { offsets } = this.ensureIndex();
+      // Offsets at a piece boundary belong to the piece before, so typing
+      // at the end of the last insertion extends that piece
+      let i = lowerBound(offsets, offset) - 1;
+      if (i < 0) {
+        this.pieces.unshift(inserted);
+      } else {
+        const piece = this.pieces[i];
+        const within = offset - offsets[i];
+        if (within === piece.length && piece.buffer === 1 && piece.start + piece.length === start) {
+          piece.length += text.length;
+          piece.lineBreaks += inserted.lineBreaks;
+        } else if (within === piece.length) {
+          this.pieces.splice(i + 1, 0, inserted);
+        } else {
+          this.pieces.splice(
+            i,
+            1,
+            this.createPiece(piece.buffer, piece.start, within),
+            inserted,
+            this.createPiece(piece.buffer, piece.start + within, piece.length - within)
+          );
+        }
+      }
+    }
+
+    this.length += text.length;
+    this.lineBreaks += inserted.lineBreaks;
+    this.index = null;
+  }
+
+  delete(offset, count) {
+    offset = Math.max(0, offset);
+    const end = Math.min(this.length, offset + count);
+    if (end <= offset) return;
+    const { offsets } = this.ensureIndex();
+    const kept = [];
+    let removedBreaks = 0;
+
+    this.pieces.forEach((piece, i) => {
+      const pieceStart = offsets[i];
+      const pieceEnd = pieceStart + piece.length;
+      if (pieceEnd <= offset || pieceStart >= end) {
+        kept.push(piece);
+        return;
+      }
+      removedBreaks += piece.lineBreaks;
+      if (pieceStart < offset) {
+        const left = this.createPiece(piece.buffer, piece.start, offset - pieceStart);
+        removedBreaks -= left.lineBreaks;
+        kept.push(left);
+      }
+      if (pieceEnd > end) {
+        const right = this.createPiece(piece.buffer, piece.start + (end - pieceStart), pieceEnd - end);
+        removedBreaks -= right.lineBreaks;
+        kept.push(right);
+      }
+    });
+
+    this.pieces = kept;
+    this.length -= end - offset;
+    this.lineBreaks -= removedBreaks;
+    this.index = null;
+  }
+
+  // Cheap snapshot for undo: the buffers only grow, so pieces are enough.
+  snapshot() {
+    return {
+      pieces: this.pieces.map(piece => ({ ...piece })),
+      length: this.length,
+      lineBreaks: this.lineBreaks
+    };
+  }
+
+  restore({ pieces, length, lineBreaks }) {
+    this.pieces = pieces.map(piece => ({ ...piece }));
+    this.length = length;
+    this.lineBreaks = lineBreaks;
+    this.index = null;
+  }
+}
@@ -0,0 +1,622 @@
+// Rule-based pre-analysis for the mistakes beginners hit most often.
+// Each rule only fires when it is certain, and answers in the same shape as
+// the InvokeLLM explanation so the UI cannot tell the difference.
+
+export const MIN_CONFIDENCE = 0.9;
+
+const C_LIKE = ['javascript', 'java', 'cpp'];
+
+// Minimal tokenizer: identifiers, numbers, strings, punctuation. Comments
+// are dropped and every token remembers its line and column.
+export const tokenize = (code, language) => {
+  const tokens = [];
+  const lineComment = language === 'python' ? '#' : C_LIKE.includes(language) ? '//' : null;
+  const quotes = language === 'javascript' ? ['"', "'", '`'] : ['"', "'"];
+  let i = 0;
+  let line = 1;
+  let lineStart = 0;
+
+  const push = (type, value, start) => {
+    tokens.push({ type, value, line, col: start - lineStart });
+  };
+
+  while (i < code.length) {
+    const ch = code[i];
+
+    if (ch === '\n') {
+      push('newline', '\n', i);
+      i++;
+      line++;
+      lineStart = i;
+      continue;
+    }
+    if (/\s/.test(ch)) {
+      i++;
+      continue;
+    }
+    if (lineComment && code.startsWith(lineComment, i)) {
+      while (i < code.length && code[i] !== '\n') i++;
+      continue;
+    }
+    if (C_LIKE.includes(language) && code.startsWith('/*', i)) {
+      const end = code.indexOf('*/', i + 2);
+      const stop = end === -1 ? code.length : end + 2;
+      for (let k = i; k < stop; k++) {
+        if (code[k] === '\n') {
+          line++;
+          lineStart = k + 1;
+        }
+      }
+      i = stop;
+      continue;
+    }
+    if (quotes.includes(ch)) {
+      const start = i;
+      const triple = language === 'python' && code.startsWith(ch.repeat(3), i);
+      const close = triple ? ch.repeat(3) : ch;
+      i += close.length;
+      while (i < code.length && !code.startsWith(close, i)) {
+        if (code[i] === '\\') i++;
+        else if (code[i] === '\n' && !triple && ch !== '`') break;
+        i++;
+      }
+      i += close.length;
+      push('string', code.slice(start, i), start);
+      continue;
+    }
+    if (/[A-Za-z_$]/.test(ch)) {
+      const start = i;
+      while (i < code.length && /[\w$]/.test(code[i])) i++;
+      push('ident', code.slice(start, i), start);
+      continue;
+    }
+    if (/\d/.test(ch)) {
+      const start = i;
+      while (i < code.length && /[\w.]/.test(code[i])) i++;
+      push('number', code.slice(start, i), start);
+      continue;
+    }
+    const twoChar = code.slice(i, i + 2);
+    if (['==', '!=', '<=', '>=', '++', '--', '+=', '-=', '*=', '/=', '::', '->', '&&', '||', '**'].includes(twoChar)) {
+      push('punct', twoChar, i);
+      i += 2;
+      continue;
+    }
+    push('punct', ch, i);
+    i++;
+  }
+
+  return tokens;
+};
+
+const significant = (tokens) => tokens.filter(t => t.type !== 'newline');
+
+// Line numbers that continue a string started on an earlier line (the
+// body of a docstring or other triple-quoted string)
+const linesInStrings = (tokens) => {
+  const lines = new Set();
+  for (const token of tokens) {
+    if (token.type !== 'string') continue;
+    const extra = token.value.split('\n').length - 1;
+    for (let k = 1; k <= extra; k++) lines.add(token.line + k);
+  }
+  return lines;
+};
+
+// Splits the tokens between matching brackets into top-level arguments.
+// Returns { args, end } where `end` is the index of the closing bracket.
+const readArguments = (tokens, openIndex) => {
+  const open = tokens[openIndex].value;
+  const close = { '(': ')', '[': ']', '{': '}' }[open];
+  const args = [];
+  let current = [];
+  let depth = 0;
+
+  for (let i = openIndex + 1; i < tokens.length; i++) {
+    const token = tokens[i];
+    if (['(', '[', '{'].includes(token.value)) depth++;
+    if ([')', ']', '}'].includes(token.value)) {
+      if (depth === 0 && token.value === close) {
+        if (current.length > 0) args.push(current);
+        return { args, end: i };
+      }
+      depth--;
+    }
+    if (depth === 0 && token.value === ',') {
+      args.push(current);
+      current = [];
+      continue;
+    }
+    current.push(token);
+  }
+  return null;
+};
+
+const exampleValue = (param) => {
+  const name = param.toLowerCase();
+  if (/name|text|word|message|label|title/.test(name)) return '"Alice"';
+  if (/list|items|values|array|numbers/.test(name)) return '[1, 2, 3]';
+  return '5';
+};
+
+const codeBlock = (language, code) => `\`\`\`${language}\n${code}\n\`\`\``;
+
+const levelNote = (level, beginner, advanced) => {
+  if (level === 'beginner') return beginner ? `\n\n${beginner}` : '';
+  if (level === 'advanced') return advanced ? `\n\n${advanced}` : '';
+  return '';
+};
+
+const sourceLine = (code, line) => code.split('\n')[line - 1] || '';
+
+// --- Function calls with too few arguments (python, javascript) -----------
+
+const collectDefinitions = (tokens, language) => {
+  const definitions = new Map();
+  const keyword = language === 'python' ? 'def' : 'function';
+
+  tokens.forEach((token, i) => {
+    if (token.value !== keyword || tokens[i + 1]?.type !== 'ident') return;
+    if (tokens[i + 2]?.value !== '(') return;
+    // Only plain functions: methods would need `self`/receiver handling
+    if (language === 'python' && token.col !== 0) return;
+
+    const parsed = readArguments(tokens, i + 2);
+    if (!parsed) return;
+    // The body's tokens, for javascript
+    const body = tokens[parsed.end + 1]?.value === '{' ? readArguments(tokens, parsed.end + 1) : null;
+
+    const required = [];
+    let variadic = false;
+    for (const param of parsed.args) {
+      const first = param[0]?.value;
+      if (first === '*' || first === '**' || first === '.') {
+        variadic = true;
+        continue;
+      }
+      if (param.some(t => t.value === '=')) continue;
+      required.push(param.find(t => t.type === 'ident')?.value);
+    }
+
+    definitions.set(tokens[i + 1].value, {
+      name: tokens[i + 1].value,
+      params: parsed.args.map(p => p.map(t => t.value).join('')),
+      required: required.filter(Boolean),
+      variadic,
+      line: token.line,
+      body: body ? tokens.slice(parsed.end + 2, body.end) : []
+    });
+  });
+
+  return definitions;
+};
+
+// Every function's parameter names and the stream indices it spans, nested
+// functions and methods included
+const functionScopes = (tokens, language) => {
+  const keyword = language === 'python' ? 'def' : 'function';
+  const scopes = [];
+  tokens.forEach((token, i) => {
+    if (token.value !== keyword) return;
+    const open = tokens[i + 1]?.value === '(' ? i + 1 : i + 2;
+    if (tokens[open]?.value !== '(') return;
+    const parsed = readArguments(tokens, open);
+    if (!parsed) return;
+    let end = tokens.length - 1;
+    if (language === 'python') {
+      const next = tokens.findIndex((other, k) => k > parsed.end && other.line > token.line && other.col <= token.col);
+      if (next !== -1) end = next - 1;
+    } else if (tokens[parsed.end + 1]?.value === '{') {
+      end = readArguments(tokens, parsed.end + 1)?.end ?? end;
+    }
+    const params = parsed.args.map(param => param.find(t => t.type === 'ident')?.value).filter(Boolean);
+    scopes.push({ start: i, end, params: new Set(params) });
+  });
+  return scopes;
+};
+
+const REBINDING = new Set(['for', 'as', 'import', 'let', 'const', 'var', 'class']);
+
+// Whether `name` at stream index `index` may not be the function of that
+// name: a parameter of an enclosing function, or a name the program
+// assigns or rebinds somewhere (`f = other`, `for f in ...`)
+const isShadowed = (tokens, scopes, name, index) =>
+  scopes.some(scope => index > scope.start && index <= scope.end && scope.params.has(name)) ||
+  tokens.some((token, k) => token.value === name && tokens[k - 1]?.value !== '.' &&
+    (tokens[k + 1]?.value === '=' || REBINDING.has(tokens[k - 1]?.value)));
+
+// Whether a javascript function body handles the parameter being left out
+// (`greeting || "Hi"`, `greeting ?? "Hi"`, `if (!greeting)`,
+// `typeof greeting`, `greeting === undefined`)
+const guardsParameter = (body, param) => body.some((token, i) => {
+  if (token.value !== param || body[i - 1]?.value === '.') return false;
+  const [previous, next, after] = [body[i - 1]?.value, body[i + 1]?.value, body[i + 2]?.value];
+  if (previous === '!' || previous === 'typeof' || next === '||' || (next === '?' && after === '?')) return true;
+  return ['==', '!=', '='].includes(next) && ['undefined', 'null', '='].includes(after);
+});
+
+const missingArgumentRule = (language) => ({ code, tokens, level }) => {
+  const stream = significant(tokens);
+  const definitions = collectDefinitions(stream, language);
+  const scopes = functionScopes(stream, language);
+
+  for (let i = 0; i < stream.length - 1; i++) {
+    const token = stream[i];
+    const definition = definitions.get(token.value);
+    if (!definition || stream[i + 1].value !== '(') continue;
+    const previous = stream[i - 1]?.value;
+    if (previous === 'def' || previous === 'function' || previous === '.') continue;
+    if (isShadowed(stream, scopes, token.value, i)) continue;
+
+    const parsed = readArguments(stream, i + 1);
+    if (!parsed) continue;
+    if (parsed.args.some(arg => ['*', '**', '.'].includes(arg[0]?.value))) continue;
+    if (parsed.args.length >= definition.required.length) continue;
+
+    const missing = definition.required.slice(parsed.args.length);
+    if (language === 'javascript' && missing.every(param => guardsParameter(definition.body, param))) continue;
+    const callLine = sourceLine(code, token.line);
+    const fixedArgs = [
+      ...parsed.args.map(arg => arg.map(t => t.value).join(' ')),
+      ...missing.map(param => exampleValue(param))
+    ].join(', ');
+    const fixedLine = callLine.replace(
+      new RegExp(`${definition.name}\\s*\\([^)]*\\)`),
+      `${definition.name}(${fixedArgs})`
+    ).replace(/\s*(#|\/\/).*$/, '');
+    const missingList = missing.map(p => `\`${p}\``).join(', ');
+
+    if (language === 'python') {
+      return {
+        confidence: 0.97,
+        line: token.line,
+        error_type: 'TypeError',
+        simple_explanation:
+          `On line ${token.line} you call \`${definition.name}()\`, but the function defined on line ${definition.line} needs ` +
+          `${missing.length === 1 ? 'a value' : 'values'} for ${missingList}. Python stops with ` +
+          `\`TypeError: ${definition.name}() missing ${missing.length} required positional argument${missing.length === 1 ? '' : 's'}: ${missing.map(p => `'${p}'`).join(' and ')}\`.` +
+          levelNote(level,
+            'Think of a parameter as an empty box the function expects you to fill. If you call the function without filling the box, Python has nothing to work with.',
+            'Give the parameter a default (e.g. `def f(x=None)`) only if calling without it is genuinely valid.'),
+        solution:
+          `Pass a value for ${missingList} when you call the function:\n\n${codeBlock('python', fixedLine.trim())}\n\n` +
+          `Every parameter in \`def ${definition.name}(${definition.params.join(', ')})\` without a default value must receive an argument.`,
+        learning_points: [
+          'A function call must supply an argument for every parameter that has no default value',
+          'The TypeError message names exactly which argument is missing',
+          'Default values (param=value) make a parameter optional'
+        ]
+      };
+    }
+
+    return {
+      confidence: 0.92,
+      line: token.line,
+      error_type: 'Missing Function Argument',
+      simple_explanation:
+        `On line ${token.line} you call \`${definition.name}()\` without ${missingList}. JavaScript does not complain: ` +
+        `the missing parameter is simply \`undefined\`, so any math with it produces \`NaN\` and the result is wrong without an error message.` +
+        levelNote(level,
+          'This is one of the sneaky parts of JavaScript: the program keeps running, it just gives you a strange answer.',
+          'Consider default parameters or an explicit check that throws when the argument is missing.'),
+      solution:
+        `Pass the missing argument:\n\n${codeBlock('javascript', fixedLine.trim())}\n\n` +
+        `Or give the parameter a default value so calling without it is safe:\n\n` +
+        codeBlock('javascript', `function ${definition.name}(${definition.params.map(p => missing.includes(p) ? `${p} = ${exampleValue(p)}` : p).join(', ')}) { ... }`),
+      learning_points: [
+        'Missing arguments in JavaScript become undefined instead of raising an error',
+        'Arithmetic with undefined produces NaN',
+        'Default parameters (param = value) protect against missing arguments'
+      ]
+    };
+  }
+
+  return null;
+};
+
+// --- Java: local variable used before it is assigned ----------------------
+
+const JAVA_TYPES = new Set(['int', 'long', 'short', 'byte', 'char', 'float', 'double', 'boolean', 'String']);
+
+const javaUninitializedRule = ({ code, tokens, level }) => {
+  const stream = significant(tokens);
+  let depth = 0;
+
+  for (let i = 0; i < stream.length; i++) {
+    const token = stream[i];
+    if (token.value === '{') depth++;
+    if (token.value === '}') depth--;
+
+    // `Type name;` inside a method body (class = depth 1, method = depth 2+)
+    if (depth < 2 || token.type !== 'ident' || !JAVA_TYPES.has(token.value)) continue;
+    const nameToken = stream[i + 1];
+    if (nameToken?.type !== 'ident' || stream[i + 2]?.value !== ';') continue;
+    const previous = stream[i - 1]?.value;
+    if (previous && ![';', '{', '}'].includes(previous)) continue;
+
+    const name = nameToken.value;
+    let scopeDepth = 0;
+    for (let k = i + 3; k < stream.length; k++) {
+      const next = stream[k];
+      if (next.value === '{') scopeDepth++;
+      if (next.value === '}') {
+        if (scopeDepth === 0) break;
+        scopeDepth--;
+      }
+      if (next.value !== name || stream[k - 1]?.value === '.') continue;
+      if (stream[k + 1]?.value === '=') break;
+
+      return {
+        confidence: 0.95,
+        line: next.line,
+        error_type: 'Compilation Error: Variable Not Initialized',
+        simple_explanation:
+          `\`${name}\` is declared on line ${nameToken.line} but never given a value before it is used on line ${next.line}. ` +
+          `Java refuses to compile this and reports \`variable ${name} might not have been initialized\`.` +
+          levelNote(level,
+            'Declaring a variable creates a labelled box; Java insists you put something in the box before you look inside it.',
+            'Definite assignment analysis is per path, so assigning in only one branch of an if/else triggers the same error.'),
+        solution:
+          `Give \`${name}\` a value when you declare it (or before its first use):\n\n` +
+          codeBlock('java', `${token.value} ${name} = ${token.value === 'String' ? '"World"' : token.value === 'boolean' ? 'false' : '0'};\n${sourceLine(code, next.line).trim().replace(/\s*\/\/.*$/, '')}`),
+        learning_points: [
+          'Local variables in Java have no default value',
+          'The compiler checks that every local variable is assigned before it is read',
+          'Initializing at the point of declaration avoids this error entirely'
+        ]
+      };
+    }
+  }
+
+  return null;
+};
+
+// --- C++: constant index outside a fixed-size array -----------------------
+
+const cppOutOfBoundsRule = ({ code, tokens, level }) => {
+  const stream = significant(tokens);
+  const arrays = new Map();
+
+  for (let i = 0; i < stream.length - 3; i++) {
+    const [type, name, open] = [stream[i], stream[i + 1], stream[i + 2]];
+    if (type.type !== 'ident' || name.type !== 'ident' || open.value !== '[') continue;
+    if (['return', 'delete', 'new'].includes(type.value)) continue;
+
+    let size = null;
+    if (stream[i + 3].type === 'number' && stream[i + 4]?.value === ']') {
+      size = parseInt(stream[i + 3].value, 10);
+    } else if (stream[i + 3].value === ']' && stream[i + 4]?.value === '=' && stream[i + 5]?.value === '{') {
+      const parsed = readArguments(stream, i + 5);
+      if (parsed) size = parsed.args.length;
+    }
+    if (size !== null) arrays.set(name.value, { size, line: name.line, declIndex: i + 1 });
+  }
+
+  for (let i = 0; i < stream.length - 3; i++) {
+    const array = arrays.get(stream[i].value);
+    if (!array || i === array.declIndex || stream[i + 1].value !== '[') continue;
+    const negative = stream[i + 2].value === '-';
+    const indexToken = stream[i + (negative ? 3 : 2)];
+    if (indexToken?.type !== 'number' || stream[i + (negative ? 4 : 3)]?.value !== ']') continue;
+    const index = parseInt(indexToken.value, 10) * (negative ? -1 : 1);
+    if (index >= 0 && index < array.size) continue;
+
+    const name = stream[i].value;
+    return {
+      confidence: 0.96,
+      line: stream[i].line,
+      error_type: 'Array Index Out of Bounds (Undefined Behavior)',
+      simple_explanation:
+        `\`${name}\` has ${array.size} elements (valid indexes 0 to ${array.size - 1}), but line ${stream[i].line} reads \`${name}[${index}]\`. ` +
+        `C++ does not check array bounds, so this reads memory that does not belong to the array: it may print garbage, crash, or seem to work.` +
+        levelNote(level,
+          'Array positions start counting at 0, so the last element of a 5-element array is at position 4.',
+          'Use std::array or std::vector with .at() to get a checked access that throws std::out_of_range.'),
+      solution:
+        `Use an index inside the array's range, for example the last element:\n\n` +
+        codeBlock('cpp', sourceLine(code, stream[i].line).trim().replace(/\s*\/\/.*$/, '').replace(`${name}[${index}]`, `${name}[${array.size - 1}]`)) +
+        `\n\nIf you need a safety net, \`std::vector\` with \`.at(i)\` reports the mistake instead of silently reading bad memory.`,
+      learning_points: [
+        'Array indexes in C++ run from 0 to size - 1',
+        'Out-of-bounds access is undefined behavior, not a guaranteed crash',
+        'std::vector::at() performs bounds checking'
+      ]
+    };
+  }
+
+  return null;
+};
+
+// --- Python: statements that need a trailing colon, Python 2 print --------
+
+const PYTHON_BLOCK = /^\s*(def|class|if|elif|else|for|while|try|except|finally|with)\b/;
+
+const stripPythonComment = (line) => {
+  let quote = null;
+  for (let i = 0; i < line.length; i++) {
+    const ch = line[i];
+    if (quote) {
+      if (ch === '\\') i++;
+      else if (ch === quote) quote = null;
+    } else if (ch === '"' || ch === "'") {
+      quote = ch;
+    } else if (ch === '#') {
+      return line.slice(0, i);
+    }
+  }
+  return line;
+};
+
+const bracketsBalanced = (line) => {
+  let depth = 0;
+  for (const ch of line.replace(/(["'])(?:\\.|(?!\1).)*\1/g, '')) {
+    if ('([{'.includes(ch)) depth++;
+    if (')]}'.includes(ch)) depth--;
+  }
+  return depth === 0;
+};
+
+const pythonMissingColonRule = ({ code, tokens, level }) => {
+  const lines = code.split('\n');
+  const inStrings = linesInStrings(tokens);
+  for (let i = 0; i < lines.length; i++) {
+    if (inStrings.has(i + 1)) continue;
+    const line = stripPythonComment(lines[i]).replace(/\s+$/, '');
+    const match = PYTHON_BLOCK.exec(line);
+    if (!match || line.endsWith(':') || line.endsWith('\\') || !bracketsBalanced(line)) continue;
+    // One-line bodies such as `if x: return` already have their colon
+    if (line.includes(':') && !/lambda/.test(line)) continue;
+
+    return {
+      confidence: 0.95,
+      line: i + 1,
+      error_type: 'SyntaxError',
+      simple_explanation:
+        `Line ${i + 1} starts a \`${match[1]}\` block but does not end with a colon, so Python reports \`SyntaxError: expected ':'\`.` +
+        levelNote(level, 'The colon is how Python knows the indented lines below belong to this statement.'),
+      solution: `Add a colon at the end of the line:\n\n${codeBlock('python', `${line.trim()}:`)}`,
+      learning_points: [
+        'def, class, if/elif/else, for, while, try/except and with lines end with a colon',
+        'The indented block after the colon is the body of that statement'
+      ]
+    };
+  }
+  return null;
+};
+
+const pythonPrintStatementRule = ({ code, tokens, level }) => {
+  const lines = code.split('\n');
+  const inStrings = linesInStrings(tokens);
+  for (let i = 0; i < lines.length; i++) {
+    if (inStrings.has(i + 1)) continue;
+    const line = stripPythonComment(lines[i]);
+    const match = /^(\s*)print\s+([^=(\s].*)$/.exec(line);
+    if (!match) continue;
+    const fixed = `${match[1]}print(${match[2].trim()})`;
+
+    return {
+      confidence: 0.97,
+      line: i + 1,
+      error_type: 'SyntaxError',
+      simple_explanation:
+        `Line ${i + 1} uses \`print\` without parentheses. That was valid in Python 2, but in Python 3 \`print\` is a function, ` +
+        `so Python reports \`SyntaxError: Missing parentheses in call to 'print'\`.` +
+        levelNote(level, 'Many older tutorials still show the Python 2 style, which is why this mistake is so common.'),
+      solution: `Wrap what you want to print in parentheses:\n\n${codeBlock('python', fixed.trim())}`,
+      learning_points: [
+        'In Python 3, print is a function and needs parentheses',
+        'Code written for Python 2 often needs small syntax updates'
+      ]
+    };
+  }
+  return null;
+};
+
+// --- CSS: declaration missing its semicolon -------------------------------
+
+const extractCss = (code) => {
+  // Keep line numbers by blanking everything outside <style> blocks
+  if (!/<style[\s>]/i.test(code)) return code;
+  let inside = false;
+  return code.split('\n').map(line => {
+    let out = '';
+    let rest = line;
+    while (rest.length > 0) {
+      if (!inside) {
+        const open = rest.search(/<style[^>]*>/i);
+        if (open === -1) break;
+        rest = rest.slice(open).replace(/^<style[^>]*>/i, '');
+        inside = true;
+      } else {
+        const close = rest.search(/<\/style>/i);
+        if (close === -1) {
+          out += rest;
+          break;
+        }
+        out += rest.slice(0, close);
+        rest = rest.slice(close + 8);
+        inside = false;
+      }
+    }
+    return out;
+  }).join('\n');
+};
+
+const cssMissingSemicolonRule = ({ code, level }) => {
+  const css = extractCss(code).replace(/\/\*[\s\S]*?\*\//g, match => match.replace(/[^\n]/g, ' '));
+  const lines = css.split('\n');
+  let depth = 0;
+  const DECLARATION = /^\s*([a-z-]+)\s*:\s*([^;{}]+?)\s*$/i;
+  // The following declaration may be complete
+  const NEXT_DECLARATION = /^\s*([a-z-]+)\s*:\s*([^;{}]+?)\s*;?\s*$/i;
+
+  for (let i = 0; i < lines.length; i++) {
+    const line = lines[i];
+    const match = depth > 0 ? DECLARATION.exec(line) : null;
+    if (match) {
+      let k = i + 1;
+      while (k < lines.length && lines[k].trim() === '') k++;
+      if (k < lines.length && NEXT_DECLARATION.test(lines[k]) && !lines[k].includes('}')) {
+        const property = match[1];
+        return {
+          confidence: 0.95,
+          line: i + 1,
+          error_type: 'CSS Syntax Error: Missing Semicolon',
+          simple_explanation:
+            `The \`${property}\` declaration on line ${i + 1} is missing its semicolon. The browser reads it together with the next line ` +
+            `as one invalid value, so both \`${property}\` and \`${NEXT_DECLARATION.exec(lines[k])[1]}\` are silently ignored.` +
+            levelNote(level, 'CSS never shows an error message for this: the style just does not apply, which makes it hard to spot.'),
+          solution: `End every declaration with a semicolon:\n\n${codeBlock('css', `${property}: ${match[2]};`)}`,
+          learning_points: [
+            'Every CSS declaration ends with a semicolon',
+            'Invalid CSS is ignored silently instead of raising an error',
+            'Browser developer tools show which declarations were dropped'
+          ]
+        };
+      }
+    }
+    for (const ch of line) {
+      if (ch === '{') depth++;
+      if (ch === '}') depth = Math.max(0, depth - 1);
+    }
+  }
+  return null;
+};
+
+export const RULES = [
+  { id: 'python.print-statement', language: 'python', check: pythonPrintStatementRule },
+  { id: 'python.missing-colon', language: 'python', check: pythonMissingColonRule },
+  { id: 'python.missing-argument', language: 'python', check: missingArgumentRule('python') },
+  { id: 'javascript.missing-argument', language: 'javascript', check: missingArgumentRule('javascript') },
+  { id: 'java.uninitialized-variable', language: 'java', check: javaUninitializedRule },
+  { id: 'cpp.array-out-of-bounds', language: 'cpp', check: cppOutOfBoundsRule },
+  { id: 'css.missing-semicolon', language: 'html_css', check: cssMissingSemicolonRule }
+];
+
+// Returns an explanation for the first confident rule match, or null when
+// the code should go to the LLM.
+export const preAnalyze = ({ code, language, level = 'beginner' }) => {
+  const tokens = language === 'html_css' ? [] : tokenize(code, language);
+
+  for (const rule of RULES) {
+    if (rule.language !== language) continue;
+    let finding = null;
+    try {
+      finding = rule.check({ code, tokens, level });
+    } catch (error) {
+      console.error(`Pre-analysis rule ${rule.id} failed:`, error);
+    }
+    if (!finding || finding.confidence < MIN_CONFIDENCE) continue;
+
+    const { confidence, line, ...explanation } = finding;
+    return {
+      ...explanation,
+      source: 'local',
+      rule_id: rule.id,
+      rule_confidence: confidence,
+      error_line: line
+    };
+  }
+
+  return null;
+};
@@ -0,0 +1,14 @@
+import { preAnalyze } from "./preAnalyzer";
+
+// Runs the rule engine off the main thread so large pastes never block typing.
+self.onmessage = (event) => {
+  const { id, code, language, level } = event.data;
+  const started = performance.now();
+  let result = null;
+  try {
+    result = preAnalyze({ code, language, level });
+  } catch (error) {
+    console.error('Pre-analysis failed:', error);
+  }
+  self.postMessage({ id, result, duration: performance.now() - started });
+};
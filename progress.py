@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { User, DebuggingSession, UserProgress, Tutorial } from "@/entities/all";
+import { User, DebuggingSession, UserProgress, Tutorial, useQueryRevalidation } from "../components/debugger/queryCache";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { Progress } from "@/components/ui/progress";
@@ -28,8 +28,11 @@ export default function ProgressPage() {
     loadProgressData();
   }, []);
 
-  const loadProgressData = async () => {
-    setIsLoading(true);
+  // Cached data is shown at once; a background refresh that changed it reloads
+  useQueryRevalidation(() => loadProgressData({ background: true }));
+
+  const loadProgressData = async ({ background = false } = {}) => {
+    if (!background) setIsLoading(true);
     try {
       const user = await User.me();
       setUserProfile(user);
@@ -0,0 +1,396 @@
+import { explanationCache, hashText } from "./explanationCache";
+import { invokeLLMStreaming } from "./streamingLLM";
+import { createAbortError } from "./analysisRequests";
+import { EXPLANATION_SCHEMA } from "./analysisPrompt";
+import { estimateTokens, outlineLines } from "./promptBudget";
+import { analysisProviderPool } from "./providerPool";
+
+// Project mode: several files are analyzed as independent chunks in
+// parallel (largest first, under a concurrency cap) and the per-chunk
+// findings are merged into one explanation with the most likely root cause
+// first. Each chunk's prompt carries the import graph around it, so the
+// model can point at another file when that is where the problem starts.
+
+const options = {
+  concurrency: 4,
+  maxChunkTokens: 1500,
+  maxOutlineLines: 15
+};
+
+const stats = {
+  projects: 0,
+  chunks: 0,
+  cachedChunks: 0,
+  chunkMs: 0,
+  wallMs: 0,
+  largestChunkMs: 0
+};
+
+export const configureProjectAnalysis = (overrides) => {
+  Object.assign(options, overrides);
+};
+
+export const CHUNK_SCHEMA = {
+  type: "object",
+  properties: {
+    has_issue: {
+      type: "boolean",
+      description: "Whether this part of the project contains an error or likely bug"
+    },
+    severity: {
+      type: "string",
+      enum: ["error", "warning", "none"],
+      description: "How serious the main issue is"
+    },
+    root_cause_file: {
+      type: "string",
+      description: "Path of another project file where the problem originates, if not this one"
+    },
+    ...EXPLANATION_SCHEMA.properties
+  }
+};
+
+const dirname = (path) => path.split('/').slice(0, -1).join('/');
+
+const joinPath = (dir, relative) => {
+  const parts = dir ? dir.split('/') : [];
+  for (const part of relative.split('/')) {
+    if (part === '..') parts.pop();
+    else if (part !== '.' && part !== '') parts.push(part);
+  }
+  return parts.join('/');
+};
+
+// Import/include specifiers, resolved to candidate project paths.
+const IMPORT_PATTERNS = {
+  python: (file) => {
+    const targets = [];
+    for (const match of file.content.matchAll(/^\s*(?:from\s+(\.*[\w.]*)\s+import|import\s+([\w.]+(?:\s*,\s*[\w.]+)*))/gm)) {
+      const modules = match[1] !== undefined ? [match[1]] : match[2].split(',').map(part => part.trim());
+      for (const module of modules) {
+        const dots = module.match(/^\.*/)[0].length;
+        const name = module.slice(dots).replace(/\./g, '/');
+        let base = name;
+        if (dots > 0) {
+          let dir = dirname(file.path);
+          for (let k = 1; k < dots; k++) dir = dirname(dir);
+          base = joinPath(dir, name);
+        }
+        targets.push({ paths: [`${base}.py`, `${base}/__init__.py`], suffix: dots === 0 });
+      }
+    }
+    return targets;
+  },
+  javascript: (file) => {
+    const targets = [];
+    for (const match of file.content.matchAll(/(?:import\s[^'"]*?from\s*|import\s*|require\(\s*|import\(\s*)['"](\.{1,2}\/[^'"]+)['"]/g)) {
+      const base = joinPath(dirname(file.path), match[1]);
+      targets.push({
+        paths: ['', '.js', '.jsx', '.ts', '.tsx', '.mjs', '/index.js', '/index.ts'].map(ext => base + ext),
+        suffix: false
+      });
+    }
+    return targets;
+  },
+  java: (file) => {
+    const targets = [];
+    for (const match of file.content.matchAll(/^\s*import\s+(?:static\s+)?([\w.]+)\s*;/gm)) {
+      targets.push({ paths: [`${match[1].replace(/\./g, '/')}.java`], suffix: true });
+    }
+    return targets;
+  },
+  cpp: (file) => {
+    const targets = [];
+    for (const match of file.content.matchAll(/^\s*#\s*include\s*"([^"]+)"/gm)) {
+      targets.push({ paths: [joinPath(dirname(file.path), match[1]), match[1]], suffix: true });
+    }
+    return targets;
+  },
+  html_css: (file) => {
+    const targets = [];
+    for (const match of file.content.matchAll(/<(?:script[^>]*\ssrc|link[^>]*\shref)\s*=\s*["']([^"':]+)["']|@import\s+(?:url\()?["']([^"':]+)["']/gi)) {
+      targets.push({ paths: [joinPath(dirname(file.path), match[1] || match[2])], suffix: false });
+    }
+    return targets;
+  }
+};
+
+// Returns { imports, importedBy } as Maps from path to paths.
+export const buildDependencyGraph = (files) => {
+  const byPath = new Map(files.map(file => [file.path, file]));
+  const imports = new Map(files.map(file => [file.path, new Set()]));
+  const importedBy = new Map(files.map(file => [file.path, new Set()]));
+
+  const resolve = ({ paths, suffix }) => {
+    for (const path of paths) {
+      if (byPath.has(path)) return path;
+    }
+    if (!suffix) return null;
+    // Absolute module names may be rooted anywhere in the upload
+    return files.find(file => paths.some(path => file.path.endsWith(`/${path}`)))?.path || null;
+  };
+
+  for (const file of files) {
+    const targets = (IMPORT_PATTERNS[file.language] || (() => []))(file);
+    for (const target of targets) {
+      const path = resolve(target);
+      if (path && path !== file.path) imports.get(file.path).add(path);
+    }
+
+    // Java classes in the same package need no import
+    if (file.language === 'java') {
+      for (const other of files) {
+        if (other === file || other.language !== 'java' || dirname(other.path) !== dirname(file.path)) continue;
+        const className = other.path.split('/').pop().replace(/\.java$/, '');
+        if (new RegExp(`\\b${className}\\b`).test(file.content)) imports.get(file.path).add(other.path);
+      }
+    }
+  }
+
+  for (const [path, targets] of imports) {
+    for (const target of targets) importedBy.get(target).add(path);
+  }
+  return { imports, importedBy };
+};
+
+// Number of files that depend on `path`, directly or not.
+const dependentCount = (graph, path) => {
+  const seen = new Set();
+  const queue = [path];
+  while (queue.length > 0) {
+    for (const next of graph.importedBy.get(queue.pop()) || []) {
+      if (!seen.has(next) && next !== path) {
+        seen.add(next);
+        queue.push(next);
+      }
+    }
+  }
+  return seen.size;
+};
+
+// Splits files into chunks of at most maxChunkTokens, preferring to cut
+// right before a declaration.
+export const chunkProjectFiles = (files, maxChunkTokens = options.maxChunkTokens) => {
+  const chunks = [];
+  for (const file of files) {
+    const lines = file.content.split('\n');
+    const declarations = new Set(outlineLines(lines).map(({ index }) => index));
+    let start = 0;
+    let tokens = 0;
+    for (let i = 0; i < lines.length; i++) {
+      const cost = estimateTokens(`${lines[i]}\n`, file.language);
+      const full = tokens + cost > maxChunkTokens;
+      const goodCut = declarations.has(i) && tokens > maxChunkTokens * 0.6;
+      if (i > start && (full || goodCut)) {
+        chunks.push({ file, startLine: start + 1, endLine: i, tokens });
+        start = i;
+        tokens = 0;
+      }
+      tokens += cost;
+    }
+    chunks.push({ file, startLine: start + 1, endLine: lines.length, tokens });
+  }
+
+  return chunks.map((chunk, index) => {
+    const lines = chunk.file.content.split('\n');
+    return {
+      ...chunk,
+      id: index,
+      path: chunk.file.path,
+      language: chunk.file.language,
+      totalLines: lines.length,
+      code: lines
+        .slice(chunk.startLine - 1, chunk.endLine)
+        .map((text, offset) => `${String(chunk.startLine + offset).padStart(5)}| ${text}`)
+        .join('\n')
+    };
+  });
+};
+
+const describeFile = (graph, path) => {
+  const uses = [...graph.imports.get(path)];
+  return uses.length > 0 ? `${path} (imports ${uses.join(', ')})` : path;
+};
+
+const buildChunkPrompt = ({ chunk, files, graph, level, errorMessage }) => {
+  const dependencies = [...graph.imports.get(chunk.path)];
+  const outlines = dependencies
+    .map(path => {
+      const file = files.find(other => other.path === path);
+      const outline = outlineLines(file.content.split('\n'))
+        .slice(0, options.maxOutlineLines)
+        .map(({ line, index }) => `    ${index + 1}: ${line.trim()}`)
+        .join('\n');
+      return `  ${path}:\n${outline || '    (no declarations)'}`;
+    })
+    .join('\n');
+  const part = chunk.startLine === 1 && chunk.endLine === chunk.totalLines
+    ? `the whole of ${chunk.path}`
+    : `lines ${chunk.startLine}-${chunk.endLine} of ${chunk.path} (${chunk.totalLines} lines)`;
+  const importers = [...graph.importedBy.get(chunk.path)];
+  const errorSection = errorMessage
+    ? `\n  When the project was run, it reported this error:\n  \`\`\`\n  ${errorMessage.trim()}\n  \`\`\`\n`
+    : '';
+
+  return `
+  You are a friendly programming tutor helping a ${level} programmer debug a multi-file project.
+
+  Project files:
+  ${files.map(file => describeFile(graph, file.path)).join('\n  ')}
+
+  Below is ${part}. Each line starts with its line number.
+  ${importers.length > 0 ? `It is imported by: ${importers.join(', ')}` : 'No other file imports it.'}
+${outlines ? `\n  Declarations in the files it imports:\n${outlines}\n` : ''}
+  \`\`\`${chunk.language}
+${chunk.code}
+  \`\`\`
+${errorSection}
+  Report only problems that are visible in this part. Set has_issue to false if it looks correct.
+  If the problem really starts in another project file, name that file in root_cause_file.
+  Explain any issue in simple terms with a step-by-step fix and key learning points.
+`;
+};
+
+const SEVERITY_WEIGHT = { error: 3, warning: 1, none: 0 };
+
+// Root cause first: severity, then whether the run's error points at the
+// file, other chunks blaming it, and how much of the project depends on it.
+export const mergeFindings = (findings, { graph, errorMessage = '', pending = 0 }) => {
+  const issues = findings.filter(finding => finding.result.has_issue !== false && finding.result.error_type);
+  const blamed = new Map();
+  for (const { result } of issues) {
+    if (result.root_cause_file) blamed.set(result.root_cause_file, (blamed.get(result.root_cause_file) || 0) + 1);
+  }
+  const fileCount = Math.max(graph.imports.size, 1);
+  const score = ({ chunk, result }) =>
+    (SEVERITY_WEIGHT[result.severity] ?? 2) +
+    (errorMessage.includes(chunk.path.split('/').pop()) ? 2 : 0) +
+    (blamed.get(chunk.path) || 0) +
+    (1.5 * dependentCount(graph, chunk.path)) / fileCount;
+  const ranked = issues.slice().sort((a, b) => score(b) - score(a));
+
+  const checked = `${findings.length} part${findings.length === 1 ? '' : 's'} checked${pending > 0 ? `, ${pending} still running` : ''}`;
+  if (ranked.length === 0) {
+    return {
+      error_type: pending > 0 ? undefined : 'No errors found',
+      simple_explanation: pending > 0 ? undefined : `No problems were found across ${fileCount} files (${checked}).`,
+      solution: pending > 0 ? undefined : 'Nothing needs fixing. Try running the project to see whether it behaves as expected.',
+      learning_points: [],
+      findings: []
+    };
+  }
+
+  const [top, ...others] = ranked;
+  const where = ({ chunk, result }) => `**${chunk.path}**${result.error_line ? ` (line ${result.error_line})` : ''}`;
+  const related = others.length > 0
+    ? `\n\nOther issues found:\n${others.map(other => `- ${where(other)}: ${other.result.error_type}`).join('\n')}`
+    : '';
+  const otherFixes = others
+    .filter(other => other.result.solution)
+    .map(other => `\n\n**In ${other.chunk.path}:**\n\n${other.result.solution}`)
+    .join('');
+
+  return {
+    error_type: top.result.error_type,
+    error_file: top.chunk.path,
+    error_line: top.result.error_line,
+    simple_explanation: `In ${where(top)}: ${top.result.simple_explanation || ''}${related}`,
+    solution: `${top.result.solution || ''}${otherFixes}`,
+    learning_points: [...new Set(ranked.flatMap(({ result }) => result.learning_points || []))].slice(0, 6),
+    findings: ranked.map(({ chunk, result }) => ({
+      file: chunk.path,
+      error_line: result.error_line,
+      error_type: result.error_type,
+      severity: result.severity
+    }))
+  };
+};
+
+// files: [{ path, language, content }]. Resolves to one explanation in the
+// usual shape plus `error_file` and the ranked `findings`.
+export const analyzeProject = async ({
+  files,
+  level,
+  errorMessage = '',
+  signal,
+  onPartial,
+  invoke = analysisProviderPool.invoke
+}) => {
+  const started = performance.now();
+  const graph = buildDependencyGraph(files);
+  // Largest chunks start first so the slowest one is never queued last
+  const queue = chunkProjectFiles(files).sort((a, b) => b.tokens - a.tokens);
+  const total = queue.length;
+  const findings = [];
+  let cachedCount = 0;
+  // A failed chunk fails the project, so it also cancels the other chunks
+  // instead of leaving them calling the LLM
+  const controller = new AbortController();
+  const cancel = () => controller.abort();
+  if (signal?.aborted) cancel();
+  signal?.addEventListener('abort', cancel, { once: true });
+
+  const analyzeChunk = async (chunk) => {
+    const chunkStarted = performance.now();
+    const prompt = buildChunkPrompt({ chunk, files, graph, level, errorMessage });
+    const cacheKey = `project:${await hashText(prompt)}`;
+    let result = await explanationCache.get(cacheKey);
+    if (result) {
+      cachedCount++;
+    } else {
+      result = await invokeLLMStreaming({ prompt, response_json_schema: CHUNK_SCHEMA, signal: controller.signal, invoke });
+      await explanationCache.set(cacheKey, result);
+    }
+
+    const elapsed = performance.now() - chunkStarted;
+    stats.chunkMs += elapsed;
+    stats.largestChunkMs = Math.max(stats.largestChunkMs, elapsed);
+    if (controller.signal.aborted) throw createAbortError();
+    findings.push({ chunk, result });
+    onPartial && onPartial(mergeFindings(findings, { graph, errorMessage, pending: total - findings.length }));
+  };
+
+  const worker = async () => {
+    try {
+      while (queue.length > 0) {
+        if (controller.signal.aborted) throw createAbortError();
+        await analyzeChunk(queue.shift());
+      }
+    } catch (error) {
+      cancel();
+      throw error;
+    }
+  };
+  try {
+    await Promise.all(Array.from({ length: Math.min(options.concurrency, total) }, worker));
+  } finally {
+    signal?.removeEventListener('abort', cancel);
+  }
+
+  stats.projects++;
+  stats.chunks += total;
+  stats.cachedChunks += cachedCount;
+  stats.wallMs += performance.now() - started;
+
+  return {
+    ...mergeFindings(findings, { graph, errorMessage }),
+    source: cachedCount === total ? 'cache' : 'llm'
+  };
+};
+
+// The project as one text, for the request key and the saved session.
+export const projectSource = (files) =>
+  files.map(file => `// ==== ${file.path} ====\n${file.content}`).join('\n\n');
+
+// Most common language among the files.
+export const projectLanguage = (files) => {
+  const counts = {};
+  for (const file of files) counts[file.language] = (counts[file.language] || 0) + 1;
+  return Object.keys(counts).sort((a, b) => counts[b] - counts[a])[0] || 'python';
+};
+
+// `parallelism` is total chunk time over wall time: how much fan-out saved.
+export const getProjectAnalysisStats = () => ({
+  ...stats,
+  parallelism: stats.wallMs > 0 ? stats.chunkMs / stats.wallMs : 0
+});
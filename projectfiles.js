@@ -0,0 +1,113 @@
+// Reads the files of a multi-file project from an <input type="file">
+// selection. Zip archives are unpacked in the browser (stored and deflate
+// entries, via DecompressionStream); anything that is not a source file
+// the debugger understands is skipped.
+
+export const MAX_PROJECT_FILES = 60;
+export const MAX_FILE_BYTES = 512 * 1024;
+
+const EXTENSIONS = {
+  py: 'python',
+  js: 'javascript',
+  jsx: 'javascript',
+  mjs: 'javascript',
+  ts: 'javascript',
+  tsx: 'javascript',
+  java: 'java',
+  c: 'cpp',
+  cc: 'cpp',
+  cpp: 'cpp',
+  cxx: 'cpp',
+  h: 'cpp',
+  hpp: 'cpp',
+  html: 'html_css',
+  htm: 'html_css',
+  css: 'html_css'
+};
+
+export const languageForPath = (path) => EXTENSIONS[path.split('.').pop().toLowerCase()] || null;
+
+const isIgnored = (path) =>
+  path.endsWith('/') ||
+  path.split('/').some(part => part.startsWith('.') || part === '__MACOSX' || part === 'node_modules' || part === '__pycache__');
+
+const inflateRaw = async (bytes) => {
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate-raw'));
+  return new Response(stream).text();
+};
+
+// Minimal zip reader: walks the central directory, which has the sizes even
+// when the local headers use data descriptors.
+export const readZip = async (buffer) => {
+  const view = new DataView(buffer);
+  const bytes = new Uint8Array(buffer);
+  const decoder = new TextDecoder();
+
+  let end = -1;
+  for (let i = buffer.byteLength - 22; i >= Math.max(0, buffer.byteLength - 65557); i--) {
+    if (view.getUint32(i, true) === 0x06054b50) {
+      end = i;
+      break;
+    }
+  }
+  if (end === -1) throw new Error('Not a zip archive');
+
+  const count = view.getUint16(end + 10, true);
+  let offset = view.getUint32(end + 16, true);
+  const files = [];
+
+  for (let n = 0; n < count; n++) {
+    if (view.getUint32(offset, true) !== 0x02014b50) throw new Error('Corrupt zip central directory');
+    const method = view.getUint16(offset + 10, true);
+    const compressedSize = view.getUint32(offset + 20, true);
+    const size = view.getUint32(offset + 24, true);
+    const nameLength = view.getUint16(offset + 28, true);
+    const extraLength = view.getUint16(offset + 30, true);
+    const commentLength = view.getUint16(offset + 32, true);
+    const localOffset = view.getUint32(offset + 42, true);
+    const path = decoder.decode(bytes.subarray(offset + 46, offset + 46 + nameLength));
+    offset += 46 + nameLength + extraLength + commentLength;
+
+    if (isIgnored(path) || !languageForPath(path) || size > MAX_FILE_BYTES) continue;
+    if (method !== 0 && method !== 8) continue;
+
+    const dataStart = localOffset + 30 + view.getUint16(localOffset + 26, true) + view.getUint16(localOffset + 28, true);
+    const data = bytes.subarray(dataStart, dataStart + compressedSize);
+    const content = method === 0 ? decoder.decode(data) : await inflateRaw(data);
+    files.push({ path, content });
+  }
+  return files;
+};
+
+// Strips the folder every file shares (zips usually wrap a project in one).
+const stripCommonPrefix = (files) => {
+  if (files.length === 0) return files;
+  const first = files[0].path.split('/').slice(0, -1);
+  let shared = first.length;
+  for (const file of files) {
+    const parts = file.path.split('/').slice(0, -1);
+    let k = 0;
+    while (k < shared && parts[k] === first[k]) k++;
+    shared = k;
+  }
+  return files.map(file => ({ ...file, path: file.path.split('/').slice(shared).join('/') }));
+};
+
+// Resolves to [{ path, language, content }] sorted by path.
+export const readProjectFiles = async (fileList) => {
+  const collected = [];
+  for (const file of Array.from(fileList)) {
+    if (file.name.toLowerCase().endsWith('.zip')) {
+      collected.push(...await readZip(await file.arrayBuffer()));
+      continue;
+    }
+    const path = file.webkitRelativePath || file.name;
+    if (isIgnored(path) || !languageForPath(path) || file.size > MAX_FILE_BYTES) continue;
+    collected.push({ path, content: await file.text() });
+  }
+
+  return stripCommonPrefix(collected)
+    .map(file => ({ ...file, content: file.content.replace(/\r\n?/g, '\n'), language: languageForPath(file.path) }))
+    .sort((a, b) => a.path.localeCompare(b.path))
+    .slice(0, MAX_PROJECT_FILES);
+};
@@ -0,0 +1,187 @@
+import { stripComments } from "./explanationCache";
+
+// Keeps the code sent to the LLM within a token budget. Cheap reductions
+// come first (comments, blank runs); if that is not enough, a window around
+// the most likely error site is kept verbatim and the rest is replaced by a
+// one-line summary of what it declares.
+
+// Average characters per token for typical source in each language.
+const CHARS_PER_TOKEN = {
+  python: 3.6,
+  javascript: 3.3,
+  java: 3.5,
+  cpp: 3.2,
+  html_css: 3.0
+};
+
+const options = {
+  maxCodeTokens: 3000,
+  // Share of the budget spent on the window; the rest goes to summaries
+  windowShare: 0.8
+};
+
+const stats = {
+  requests: 0,
+  compacted: 0,
+  originalTokens: 0,
+  finalTokens: 0,
+  elidedLines: 0
+};
+
+export const configurePromptBudget = (overrides) => {
+  Object.assign(options, overrides);
+};
+
+export const estimateTokens = (text, language) =>
+  Math.ceil(text.length / (CHARS_PER_TOKEN[language] || 3.4));
+
+// Declarations that summarize what an elided range contains.
+const DECLARATION = /^\s*(def |class |function |public |private |protected |static |int main|[\w<>[\]]+\s+\w+\s*\([^;]*\)\s*\{?\s*$|\.[\w-]+\s*\{|<(html|head|body|style|script)\b)/;
+
+export const outlineLines = (lines) =>
+  lines
+    .map((line, index) => ({ line, index }))
+    .filter(({ line }) => DECLARATION.test(line));
+
+// Line numbers mentioned in a pasted error message, e.g. `line 12`,
+// `main.cpp:12:5`, `Main.java:12` or a stack frame `(file.js:12:3)`.
+export const linesFromErrorMessage = (message = '') => {
+  const found = new Set();
+  for (const match of message.matchAll(/\bline\s+(\d+)|:(\d+)(?::\d+)?\b/gi)) {
+    const line = parseInt(match[1] || match[2], 10);
+    if (line > 0) found.add(line);
+  }
+  return [...found];
+};
+
+// The line where bracket nesting first goes wrong is a strong static hint.
+export const bracketHintLine = (lines) => {
+  const pairs = { ')': '(', ']': '[', '}': '{' };
+  const stack = [];
+  for (let i = 0; i < lines.length; i++) {
+    for (const ch of lines[i].replace(/(["'`])(?:\\.|(?!\1).)*\1/g, '')) {
+      if ('([{'.includes(ch)) stack.push({ ch, line: i + 1 });
+      if (pairs[ch]) {
+        if (stack.length === 0 || stack[stack.length - 1].ch !== pairs[ch]) return i + 1;
+        stack.pop();
+      }
+    }
+  }
+  return stack.length > 0 ? stack[stack.length - 1].line : null;
+};
+
+// Leading ranges list their last declarations (the ones enclosing the
+// window), trailing ranges their first.
+const summarizeRange = (lines, start, end, { leading = false } = {}) => {
+  const all = outlineLines(lines.slice(start, end));
+  const declarations = (leading ? all.slice(-8) : all.slice(0, 8))
+    .map(({ line }) => line.trim().replace(/\s*[{:]\s*$/, ''));
+  const range = start + 1 === end ? `line ${end}` : `lines ${start + 1}-${end}`;
+  return declarations.length > 0
+    ? `... ${range} omitted; declares: ${declarations.join('; ')}`
+    : `... ${range} omitted`;
+};
+
+// Prefixes a kept line with its original line number
+const gutter = ({ text, number }) => `${String(number).padStart(5)}| ${text}`;
+
+// Returns { code, notice, metrics }. `notice` is set when anything was
+// removed and tells the model how to read original line numbers.
+export const fitCodeToBudget = ({ code, language, errorMessage, hintLines = [] }) => {
+  const budget = options.maxCodeTokens;
+  const originalTokens = estimateTokens(code, language);
+  const metrics = {
+    originalTokens,
+    finalTokens: originalTokens,
+    budgetTokens: budget,
+    strippedComments: false,
+    elidedLines: 0,
+    focusLine: null
+  };
+  stats.requests++;
+  stats.originalTokens += originalTokens;
+
+  const finish = (result) => {
+    stats.finalTokens += result.metrics.finalTokens;
+    if (result.metrics.finalTokens < originalTokens) stats.compacted++;
+    stats.elidedLines += result.metrics.elidedLines;
+    return result;
+  };
+
+  if (originalTokens <= budget) return finish({ code, notice: null, metrics });
+
+  // 1. Strip comments and collapse blank runs. Once a line is dropped the
+  // rest would shift, so kept lines then carry their original number.
+  const lines = stripComments(code, language).split('\n').map(line => line.replace(/\s+$/, ''));
+  const kept = lines
+    .map((text, index) => ({ text, number: index + 1 }))
+    .filter((line, index, all) => line.text !== '' || (index > 0 && all[index - 1].text !== ''));
+  metrics.strippedComments = true;
+
+  const shifted = kept.length < lines.length;
+  const compact = shifted ? kept.map(gutter).join('\n') : kept.map(({ text }) => text).join('\n');
+  metrics.finalTokens = estimateTokens(compact, language);
+  if (metrics.finalTokens <= budget) {
+    return finish({
+      code: compact,
+      notice: shifted
+        ? 'Comments and blank lines were removed to save space. Each line is prefixed with its original line number.'
+        : 'Comments were removed to save space; line numbers are unchanged.',
+      metrics
+    });
+  }
+
+  // 2. Keep a window around the likely error site and summarize the rest
+  const focusLine =
+    linesFromErrorMessage(errorMessage).find(line => line <= lines.length) ||
+    hintLines.find(line => line > 0 && line <= lines.length) ||
+    bracketHintLine(lines) ||
+    1;
+  metrics.focusLine = focusLine;
+
+  const windowBudget = budget * options.windowShare;
+  let center = kept.findIndex(line => line.number >= focusLine);
+  if (center === -1) center = kept.length - 1;
+
+  let from = center;
+  let to = center + 1;
+  let used = estimateTokens(gutter(kept[center]), language);
+  // Grow the window alternately up and down until the budget is spent
+  while (from > 0 || to < kept.length) {
+    const candidates = [];
+    if (from > 0) candidates.push('up');
+    if (to < kept.length) candidates.push('down');
+    const direction = candidates[(to - from) % candidates.length];
+    const entry = direction === 'up' ? kept[from - 1] : kept[to];
+    const cost = estimateTokens(gutter(entry), language) + 1;
+    if (used + cost > windowBudget) break;
+    used += cost;
+    if (direction === 'up') from--;
+    else to++;
+  }
+
+  const windowStart = kept[from].number - 1;
+  const windowEnd = kept[to - 1].number;
+  const parts = [];
+  if (windowStart > 0) parts.push(summarizeRange(lines, 0, windowStart, { leading: true }));
+  parts.push(kept.slice(from, to).map(gutter).join('\n'));
+  if (windowEnd < lines.length) parts.push(summarizeRange(lines, windowEnd, lines.length));
+
+  const result = parts.join('\n');
+  metrics.finalTokens = estimateTokens(result, language);
+  metrics.elidedLines = lines.length - (windowEnd - windowStart);
+
+  return finish({
+    code: result,
+    notice:
+      `This is an excerpt of a ${lines.length}-line program around line ${focusLine}. ` +
+      'Each kept line is prefixed with its original line number; omitted parts are summarized.',
+    metrics
+  });
+};
+
+export const getPromptBudgetStats = () => ({
+  ...stats,
+  trimmedTokens: stats.originalTokens - stats.finalTokens,
+  trimmedRatio: stats.originalTokens > 0 ? 1 - stats.finalTokens / stats.originalTokens : 0
+});
@@ -0,0 +1,223 @@
+import { InvokeLLM } from "@/integrations/Core";
+import { createAbortError, isAbortError } from "./analysisRequests";
+
+// Hedged LLM requests over a pool of providers. Each request goes to the
+// provider with the best recent median latency; if it has not answered by
+// that provider's rolling p90, a duplicate goes to the next best provider
+// and whichever answers first wins. The loser is aborted. A provider has
+// "answered" when its call resolves, which for streaming backends is the
+// first byte rather than the full explanation.
+
+const DEFAULT_OPTIONS = {
+  hedgeQuantile: 0.9,
+  // Below this many samples a provider's quantiles are not trusted
+  minSamples: 10,
+  defaultHedgeMs: 2500,
+  minHedgeMs: 150,
+  maxHedges: 1,
+  // With a single provider, hedge by sending the same request again. Off:
+  // it doubles calls to the one backend without a faster one to win
+  allowSelfHedge: false,
+  errorCooldownMs: 30000,
+  windowSize: 200
+};
+
+// Rolling window of the last `size` latencies.
+export class LatencyHistogram {
+  constructor(size = DEFAULT_OPTIONS.windowSize) {
+    this.samples = new Float64Array(size);
+    this.count = 0;
+    this.next = 0;
+  }
+
+  add(ms) {
+    this.samples[this.next] = ms;
+    this.next = (this.next + 1) % this.samples.length;
+    this.count = Math.min(this.count + 1, this.samples.length);
+  }
+
+  quantile(q) {
+    if (this.count === 0) return null;
+    const sorted = this.samples.slice(0, this.count).sort();
+    return sorted[Math.min(this.count - 1, Math.floor(q * this.count))];
+  }
+}
+
+export class ProviderPool {
+  // providers: [{ name, invoke, cost = 1 }]
+  constructor(providers = [], options = {}) {
+    this.options = { ...DEFAULT_OPTIONS, ...options };
+    this.providers = [];
+    this.counters = {
+      requests: 0,
+      attempts: 0,
+      hedged: 0,
+      hedgeWins: 0,
+      failovers: 0,
+      cancelled: 0,
+      failed: 0,
+      cost: 0,
+      winnerCost: 0
+    };
+    providers.forEach(provider => this.addProvider(provider));
+    this.invoke = this.invoke.bind(this);
+  }
+
+  addProvider({ name, invoke, cost = 1 }) {
+    this.providers.push({
+      name,
+      invoke,
+      cost,
+      histogram: new LatencyHistogram(this.options.windowSize),
+      calls: 0,
+      wins: 0,
+      errors: 0,
+      failedAt: 0
+    });
+  }
+
+  // Providers still warming up are tried first, then the fastest median.
+  pick(exclude = []) {
+    const now = Date.now();
+    const available = this.providers.filter(p => !exclude.includes(p));
+    const healthy = available.filter(p => now - p.failedAt > this.options.errorCooldownMs);
+    const candidates = healthy.length > 0 ? healthy : available;
+    if (candidates.length === 0) return null;
+
+    const score = (p) =>
+      p.histogram.count < this.options.minSamples ? -1 / (p.calls + 1) : p.histogram.quantile(0.5);
+    return candidates.reduce((best, p) => (score(p) < score(best) ? p : best));
+  }
+
+  hedgeDelay(provider) {
+    if (provider.histogram.count < this.options.minSamples) return this.options.defaultHedgeMs;
+    return Math.max(this.options.minHedgeMs, provider.histogram.quantile(this.options.hedgeQuantile));
+  }
+
+  // Same contract as InvokeLLM; `signal` cancels every outstanding attempt.
+  invoke({ signal, ...params }) {
+    if (this.providers.length === 0) return Promise.reject(new Error('No LLM providers configured'));
+    if (signal?.aborted) return Promise.reject(createAbortError());
+    this.counters.requests++;
+
+    return new Promise((resolve, reject) => {
+      const attempts = [];
+      let settled = false;
+      let hedgeTimer = null;
+      let lastError = null;
+
+      const finish = (settle) => {
+        settled = true;
+        clearTimeout(hedgeTimer);
+        signal?.removeEventListener('abort', onAbort);
+        for (const attempt of attempts) {
+          if (attempt.done) continue;
+          attempt.controller.abort();
+          // The loser's elapsed time is a lower bound on its latency; keep it
+          // so a provider that keeps losing does not look fast
+          attempt.provider.histogram.add(performance.now() - attempt.started);
+          this.counters.cancelled++;
+        }
+        settle();
+      };
+
+      const onAbort = () => finish(() => reject(createAbortError()));
+      signal?.addEventListener('abort', onAbort, { once: true });
+
+      const nextProvider = () => {
+        const used = attempts.map(attempt => attempt.provider);
+        return this.pick(used) || (this.options.allowSelfHedge ? used[0] : null);
+      };
+
+      const launch = (provider, kind) => {
+        const attempt = {
+          provider,
+          kind,
+          controller: new AbortController(),
+          started: performance.now(),
+          done: false
+        };
+        attempts.push(attempt);
+        provider.calls++;
+        this.counters.attempts++;
+        this.counters.cost += provider.cost;
+
+        Promise.resolve()
+          .then(() => provider.invoke({ ...params, signal: attempt.controller.signal }))
+          .then(
+            (result) => {
+              attempt.done = true;
+              if (settled) return;
+              provider.histogram.add(performance.now() - attempt.started);
+              provider.wins++;
+              this.counters.winnerCost += provider.cost;
+              if (kind === 'hedge') this.counters.hedgeWins++;
+              finish(() => resolve(result));
+            },
+            (error) => {
+              attempt.done = true;
+              if (settled || (isAbortError(error) && attempt.controller.signal.aborted)) return;
+              provider.errors++;
+              provider.failedAt = Date.now();
+              lastError = error;
+
+              // Fail over right away instead of waiting for the hedge timer
+              if (attempts.length <= this.options.maxHedges) {
+                const backup = nextProvider();
+                if (backup) {
+                  clearTimeout(hedgeTimer);
+                  this.counters.failovers++;
+                  launch(backup, 'failover');
+                  return;
+                }
+              }
+              if (attempts.every(other => other.done)) {
+                this.counters.failed++;
+                finish(() => reject(lastError));
+              }
+            }
+          );
+      };
+
+      const primary = this.pick();
+      launch(primary, 'primary');
+      // Hedging needs somewhere else to send the request
+      if (this.providers.length < 2 && !this.options.allowSelfHedge) return;
+      hedgeTimer = setTimeout(() => {
+        if (settled || attempts.length > this.options.maxHedges) return;
+        const backup = nextProvider();
+        if (!backup) return;
+        this.counters.hedged++;
+        launch(backup, 'hedge');
+      }, this.hedgeDelay(primary));
+    });
+  }
+
+  stats() {
+    const { requests, attempts, cost, winnerCost } = this.counters;
+    return {
+      ...this.counters,
+      hedgeRate: requests > 0 ? this.counters.hedged / requests : 0,
+      // Spend on attempts that did not produce the answer, relative to the winners
+      costOverhead: winnerCost > 0 ? cost / winnerCost - 1 : 0,
+      extraAttemptsPerRequest: requests > 0 ? attempts / requests - 1 : 0,
+      providers: this.providers.map(p => ({
+        name: p.name,
+        calls: p.calls,
+        wins: p.wins,
+        errors: p.errors,
+        p50: p.histogram.quantile(0.5),
+        p90: p.histogram.quantile(0.9),
+        samples: p.histogram.count
+      }))
+    };
+  }
+}
+
+// Pool used by the analysis pipeline. InvokeLLM is the only backend the app
+// has today; more can be registered with addProvider().
+export const analysisProviderPool = new ProviderPool([
+  { name: 'base44', invoke: (params) => InvokeLLM(params) }
+]);
+
+export const getProviderPoolStats = () => analysisProviderPool.stats();
@@ -0,0 +1,219 @@
+import { useEffect, useRef } from 'react';
+import * as entities from "@/entities/all";
+import { MemoryLRU } from "./explanationCache";
+
+// Client-side cache for entity reads shared by every page. Reads are keyed
+// by entity, method, filter, sort and limit; identical reads in flight
+// share one request. A result younger than its entity's TTL is served as
+// is; an older one is served at once and refetched in the background
+// (stale-while-revalidate), and pages that asked for it are told when the
+// refetch changed it. Writes made through the cached entities drop exactly
+// the reads they can affect, so those are fetched fresh next time.
+//
+// The cached entities have the same interface as those in @/entities/all
+// and are used in their place.
+
+const DEFAULT_OPTIONS = {
+  ttlMs: {
+    User: 5 * 60 * 1000,
+    Tutorial: 30 * 60 * 1000,
+    UserProgress: 60 * 1000,
+    DebuggingSession: 60 * 1000
+  },
+  defaultTtlMs: 30 * 1000,
+  maxEntries: 200
+};
+
+let options = DEFAULT_OPTIONS;
+const entries = new MemoryLRU(DEFAULT_OPTIONS.maxEntries);
+const inflight = new Map();
+// Bumped by every write, so a read that started before it isn't cached
+const generations = new Map();
+const listeners = new Set();
+
+const stats = {
+  hits: 0,
+  staleHits: 0,
+  misses: 0,
+  deduplicated: 0,
+  revalidations: 0,
+  revalidationChanges: 0,
+  invalidations: 0
+};
+
+export const configureQueryCache = (overrides = {}) => {
+  options = { ...DEFAULT_OPTIONS, ...overrides, ttlMs: { ...DEFAULT_OPTIONS.ttlMs, ...overrides.ttlMs } };
+  entries.limit = options.maxEntries;
+};
+
+// Object keys sorted so equal filters give equal keys
+const stableStringify = (value) => {
+  if (value === null || typeof value !== 'object') return JSON.stringify(value ?? null);
+  if (Array.isArray(value)) return `[${value.map(stableStringify).join(',')}]`;
+  return `{${Object.keys(value).sort().map(key => `${JSON.stringify(key)}:${stableStringify(value[key])}`).join(',')}}`;
+};
+
+const queryKey = (entity, method, filter, sort, limit) =>
+  [entity, method, stableStringify(filter), sort ?? '', limit ?? ''].join('\u0000');
+
+const ttlOf = (entity) => options.ttlMs[entity] ?? options.defaultTtlMs;
+
+const fetchInto = (key, query, fetch) => {
+  if (inflight.has(key)) {
+    stats.deduplicated++;
+    return inflight.get(key);
+  }
+  const generation = generations.get(query.entity) || 0;
+  const request = Promise.resolve()
+    .then(fetch)
+    .then((data) => {
+      if ((generations.get(query.entity) || 0) === generation) {
+        entries.set(key, { ...query, data, fetchedAt: Date.now() });
+      }
+      return data;
+    })
+    .finally(() => {
+      if (inflight.get(key) === request) inflight.delete(key);
+    });
+  inflight.set(key, request);
+  return request;
+};
+
+const notify = (entity) => listeners.forEach(listener => listener(entity));
+
+const revalidate = (key, entry, fetch) => {
+  if (inflight.has(key)) return;
+  stats.revalidations++;
+  const before = stableStringify(entry.data);
+  fetchInto(key, entry, fetch)
+    .then((data) => {
+      if (stableStringify(data) === before) return;
+      stats.revalidationChanges++;
+      notify(entry.entity);
+    })
+    .catch(error => console.error(`Error refreshing ${entry.entity} data:`, error));
+};
+
+const read = (entity, method, filter, sort, limit, fetch) => {
+  const key = queryKey(entity, method, filter, sort, limit);
+  const entry = entries.get(key);
+  if (entry) {
+    if (Date.now() - entry.fetchedAt < ttlOf(entity)) {
+      stats.hits++;
+    } else {
+      stats.staleHits++;
+      revalidate(key, entry, fetch);
+    }
+    return Promise.resolve(entry.data);
+  }
+  if (!inflight.has(key)) stats.misses++;
+  return fetchInto(key, { entity, method, filter }, fetch);
+};
+
+// A filter can match a record unless a field both have differs; fields the
+// record doesn't carry (e.g. created_by before the server fills it in)
+// count as a possible match
+const mayMatch = (filter, record) =>
+  !filter || Object.entries(filter).every(([field, value]) => !(field in record) || record[field] === value);
+
+const containsRecord = (data, id) =>
+  Array.isArray(data) ? data.some(item => item?.id === id) : data?.id === id;
+
+// Drops the entity's cached reads that `affected` says a write touched.
+// Reads in flight may predate the write, so they are forgotten too.
+const invalidate = (entity, affected) => {
+  generations.set(entity, (generations.get(entity) || 0) + 1);
+  for (const [key, entry] of [...entries.entries]) {
+    if (entry.entity === entity && affected(entry)) {
+      entries.delete(key);
+      stats.invalidations++;
+    }
+  }
+  for (const key of [...inflight.keys()]) {
+    if (key.startsWith(`${entity}\u0000`)) inflight.delete(key);
+  }
+};
+
+const cachedEntity = (name, entity) => {
+  const overrides = {
+    list: (sort, limit) => read(name, 'list', null, sort, limit, () => entity.list(sort, limit)),
+
+    filter: (filter, sort, limit) => read(name, 'filter', filter, sort, limit, () => entity.filter(filter, sort, limit)),
+
+    me: () => read(name, 'me', null, null, null, () => entity.me()),
+
+    create: async (data) => {
+      const created = await entity.create(data);
+      const record = { ...data, ...(created || {}) };
+      invalidate(name, entry => entry.method !== 'me' && mayMatch(entry.filter, record));
+      return created;
+    },
+
+    bulkCreate: async (records) => {
+      const created = await entity.bulkCreate(records);
+      invalidate(name, entry => entry.method !== 'me' && records.some(record => mayMatch(entry.filter, record)));
+      return created;
+    },
+
+    // A changed record leaves the reads that contain it and may join reads
+    // filtering on a field it changed
+    update: async (id, data) => {
+      const updated = await entity.update(id, data);
+      invalidate(name, entry =>
+        containsRecord(entry.data, id) ||
+        (entry.method === 'filter' && Object.keys(entry.filter || {}).some(field => field in data)));
+      return updated;
+    },
+
+    delete: async (id) => {
+      const result = await entity.delete(id);
+      invalidate(name, entry => containsRecord(entry.data, id));
+      return result;
+    },
+
+    updateMyUserData: async (data) => {
+      const result = await entity.updateMyUserData(data);
+      invalidate(name, entry => entry.method === 'me' || containsRecord(entry.data, result?.id));
+      return result;
+    }
+  };
+
+  return new Proxy(entity, {
+    get(target, property) {
+      if (Object.prototype.hasOwnProperty.call(overrides, property)) return overrides[property];
+      const value = target[property];
+      return typeof value === 'function' ? value.bind(target) : value;
+    }
+  });
+};
+
+export const User = cachedEntity('User', entities.User);
+export const DebuggingSession = cachedEntity('DebuggingSession', entities.DebuggingSession);
+export const UserProgress = cachedEntity('UserProgress', entities.UserProgress);
+export const Tutorial = cachedEntity('Tutorial', entities.Tutorial);
+
+// Calls `reload` when a background refresh changed data, so a page that
+// rendered stale results picks up the fresh ones
+export const useQueryRevalidation = (reload) => {
+  const reloadRef = useRef(reload);
+  reloadRef.current = reload;
+
+  useEffect(() => {
+    const listener = (entity) => reloadRef.current(entity);
+    listeners.add(listener);
+    return () => listeners.delete(listener);
+  }, []);
+};
+
+export const clearQueryCache = () => {
+  entries.clear();
+  inflight.clear();
+};
+
+export const getQueryCacheStats = () => ({
+  ...stats,
+  entries: entries.entries.size,
+  hitRatio: stats.hits + stats.staleHits + stats.misses > 0
+    ? (stats.hits + stats.staleHits) / (stats.hits + stats.staleHits + stats.misses)
+    : 0
+});
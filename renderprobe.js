@@ -0,0 +1,72 @@
+import { getEditorLatencyStats } from "./editorSupport";
+
+// Opt-in render counters and a typing benchmark that checks keystrokes only
+// re-render the editor. Enable with
+//   localStorage.setItem('codewhisperer-render-probe', '1')
+// reload the Debugger page, then run in the console:
+//   await codewhispererRenderBenchmark()
+
+const PROBE_KEY = 'codewhisperer-render-probe';
+const EDITOR_COMPONENTS = new Set(['CodeEditor', 'VirtualCodeEditor']);
+
+const enabled = (() => {
+  try {
+    return typeof window !== 'undefined' && window.localStorage.getItem(PROBE_KEY) === '1';
+  } catch (error) {
+    return false;
+  }
+})();
+
+let counts = {};
+
+// Called from component bodies; a no-op unless the probe is enabled.
+export const countRender = (name) => {
+  if (enabled) counts[name] = (counts[name] || 0) + 1;
+};
+
+export const getRenderCounts = () => ({ ...counts });
+
+export const resetRenderCounts = () => {
+  counts = {};
+};
+
+const nextFrame = () => new Promise(resolve => requestAnimationFrame(() => resolve()));
+
+// Types `text` into the editor `repeat` times, one event per character,
+// then waits for the debounced commit and reports who re-rendered.
+export const benchmarkTyping = async ({ text = 'total += value\n', repeat = 20, settleMs = 500 } = {}) => {
+  const input = document.querySelector('textarea[aria-label="Code editor"]');
+  if (!input) throw new Error('Open the Debugger page with the single-file editor first');
+  input.focus();
+  await nextFrame();
+  resetRenderCounts();
+
+  let keystrokes = 0;
+  for (let r = 0; r < repeat; r++) {
+    for (const ch of text) {
+      if (ch === '\n') {
+        input.dispatchEvent(new KeyboardEvent('keydown', { key: 'Enter', bubbles: true, cancelable: true }));
+      } else {
+        input.value = ch;
+        input.dispatchEvent(new Event('input', { bubbles: true }));
+      }
+      keystrokes++;
+      await nextFrame();
+    }
+  }
+  await new Promise(resolve => setTimeout(resolve, settleMs));
+
+  const renders = getRenderCounts();
+  const outsideEditor = Object.entries(renders)
+    .filter(([name]) => !EDITOR_COMPONENTS.has(name))
+    .reduce((total, [, count]) => total + count, 0);
+  return {
+    keystrokes,
+    renders,
+    outsideEditor,
+    isolated: outsideEditor === 0,
+    editorLatency: getEditorLatencyStats()
+  };
+};
+
+if (enabled) window.codewhispererRenderBenchmark = benchmarkTyping;
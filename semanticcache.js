@@ -0,0 +1,366 @@
+import { tokenize } from "./preAnalyzer";
+
+// Reuses explanations across submissions that differ only in the names
+// they declare and their string literals. Code is reduced to an error
+// signature (declared names numbered by first use, literals replaced by
+// their kind), embedded with feature-hashed token n-grams and searched in a
+// per language/level vector index. Some values decide whether code fails
+// and are kept exactly: numbers (10 / 0 but not 10 / 5), attribute and
+// method names (items.append but not items.appnd) and the names of called
+// functions the program does not define (print, len). A match is only
+// reused when those are the same. The stored explanation is returned with
+// the old identifiers renamed to the new ones in its code.
+
+export const EMBEDDING_DIM = 256;
+
+const options = {
+  threshold: 0.96,
+  ivfThreshold: 4096,
+  ivfLists: 64,
+  ivfProbes: 8
+};
+
+const stats = {
+  lookups: 0,
+  hits: 0,
+  indexed: 0,
+  lookupMs: 0
+};
+
+export const configureSemanticReuse = (overrides) => {
+  Object.assign(options, overrides);
+};
+
+const KEYWORDS = {
+  python: 'and as assert break class continue def del elif else except False finally for from global if import in is lambda None nonlocal not or pass raise return True try while with yield print len range input int str float list dict set tuple self',
+  javascript: 'async await break case catch class const continue default delete do else export extends false finally for function if import in instanceof let new null return super switch this throw true try typeof undefined var void while yield console log document window Math JSON',
+  java: 'abstract boolean break byte case catch char class continue default do double else extends false final finally float for if implements import int interface long new null private protected public return short static String super switch this throw throws true try void while System out println main args',
+  cpp: 'auto bool break case catch char class const continue default delete do double else false float for if include int long namespace new nullptr private protected public return short signed sizeof static std struct switch template this throw true try typedef unsigned using void while cout cin endl main iostream vector string',
+  html_css: ''
+};
+
+const keywordSets = Object.fromEntries(
+  Object.entries(KEYWORDS).map(([language, words]) => [language, new Set(words.split(' '))])
+);
+
+const DECLARING = new Set(['def', 'class', 'function', 'let', 'const', 'var', 'for', 'as', 'import']);
+const C_LIKE = ['java', 'cpp'];
+
+// Names the program itself introduces: declarations, assignment targets,
+// parameters, loop variables, and in Java/C++ names after a type.
+const declaredNames = (tokens, language) => {
+  const declared = new Set();
+  let parameters = false;
+  let depth = 0;
+  tokens.forEach((token, i) => {
+    const previous = tokens[i - 1];
+    const next = tokens[i + 1];
+    if (token.type === 'punct' && token.value === '(') {
+      if (parameters) depth++;
+      else if (['def', 'function'].includes(tokens[i - 2]?.value) || tokens[i - 1]?.value === 'function') {
+        parameters = true;
+        depth = 1;
+      }
+    } else if (parameters && token.value === ')' && --depth === 0) parameters = false;
+    if (token.type !== 'ident' || previous?.value === '.') return;
+    if (
+      parameters ||
+      DECLARING.has(previous?.value) ||
+      next?.value === '=' ||
+      (C_LIKE.includes(language) && previous?.type === 'ident')
+    ) declared.add(token.value);
+  });
+  return declared;
+};
+
+// Canonical token stream, the original identifier for each ordinal and the
+// values that must match exactly (see above), in order.
+export const errorSignature = (code, language, errorMessage = '') => {
+  const keywords = keywordSets[language] || new Set();
+  const ordinals = new Map();
+  const identifiers = [];
+  const fixed = [];
+  const canonical = (value) => {
+    if (!ordinals.has(value)) {
+      ordinals.set(value, ordinals.size);
+      identifiers.push(value);
+    }
+    return `ID${ordinals.get(value)}`;
+  };
+
+  const tokens = [];
+  const source = tokenize(code, language === 'html_css' ? 'javascript' : language);
+  const significant = source.filter(token => token.type !== 'newline');
+  const declared = declaredNames(significant, language);
+  let position = -1;
+  for (const token of source) {
+    if (token.type !== 'newline') position++;
+    if (token.type === 'ident') {
+      const attribute = significant[position - 1]?.value === '.';
+      const external = significant[position + 1]?.value === '(' && !declared.has(token.value);
+      if (keywords.has(token.value)) tokens.push(token.value);
+      else if (attribute || external) {
+        tokens.push(token.value);
+        fixed.push(token.value);
+      } else tokens.push(canonical(token.value));
+    } else if (token.type === 'string') tokens.push('STR');
+    else if (token.type === 'number') {
+      tokens.push('NUM');
+      fixed.push(token.value);
+    } else if (token.type === 'newline') {
+      if (tokens.length > 0 && tokens[tokens.length - 1] !== 'NL') tokens.push('NL');
+    } else tokens.push(token.value);
+  }
+
+  // The error message is part of the signature, with its names canonicalized too
+  if (errorMessage.trim()) {
+    tokens.push('ERR');
+    for (const word of errorMessage.match(/[A-Za-z_]\w*|\d+|\S/g) || []) {
+      if (/^\d+$/.test(word)) {
+        tokens.push('NUM');
+        fixed.push(word);
+      } else tokens.push(ordinals.has(word) ? canonical(word) : word);
+    }
+  }
+
+  return { tokens, identifiers, fixed };
+};
+
+const hashToken = (text) => {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < text.length; i++) {
+    hash = Math.imul(hash ^ text.charCodeAt(i), 0x01000193) >>> 0;
+  }
+  return hash;
+};
+
+// Feature-hashed unigrams, bigrams and trigrams, L2-normalized. The sign
+// bit of the hash keeps collisions from only ever adding up.
+export const embedSignature = (tokens) => {
+  const vector = new Float32Array(EMBEDDING_DIM);
+  for (let n = 1; n <= 3; n++) {
+    for (let i = 0; i + n <= tokens.length; i++) {
+      const hash = hashToken(tokens.slice(i, i + n).join(' '));
+      vector[hash % EMBEDDING_DIM] += (hash & 0x80000000 ? -1 : 1) * n;
+    }
+  }
+  let norm = 0;
+  for (let i = 0; i < EMBEDDING_DIM; i++) norm += vector[i] * vector[i];
+  norm = Math.sqrt(norm);
+  if (norm > 0) {
+    for (let i = 0; i < EMBEDDING_DIM; i++) vector[i] /= norm;
+  }
+  return vector;
+};
+
+const dot = (data, offset, vector) => {
+  let sum = 0;
+  for (let i = 0; i < vector.length; i++) sum += data[offset + i] * vector[i];
+  return sum;
+};
+
+// Flat Float32Array of unit vectors. Searched by brute force until it is
+// large enough for an inverted file (k-means lists, probing the nearest few)
+// to pay off.
+export class VectorIndex {
+  constructor(dim = EMBEDDING_DIM) {
+    this.dim = dim;
+    this.size = 0;
+    this.data = new Float32Array(dim * 64);
+    this.payloads = [];
+    this.ivf = null;
+  }
+
+  add(vector, payload) {
+    if ((this.size + 1) * this.dim > this.data.length) {
+      const grown = new Float32Array(this.data.length * 2);
+      grown.set(this.data);
+      this.data = grown;
+    }
+    this.data.set(vector, this.size * this.dim);
+    this.payloads.push(payload);
+    const id = this.size++;
+
+    if (this.ivf) this.ivf.lists[this.nearestCentroid(vector)].push(id);
+    // Retrain whenever the index has doubled since the last training
+    if (this.size >= options.ivfThreshold && (!this.ivf || this.size >= this.ivf.trainedAt * 2)) {
+      this.trainIvf();
+    }
+    return id;
+  }
+
+  nearestCentroid(vector) {
+    let best = 0;
+    let bestScore = -Infinity;
+    for (let c = 0; c < this.ivf.count; c++) {
+      const score = dot(this.ivf.centroids, c * this.dim, vector);
+      if (score > bestScore) {
+        best = c;
+        bestScore = score;
+      }
+    }
+    return best;
+  }
+
+  trainIvf(iterations = 8) {
+    const count = Math.min(options.ivfLists, this.size);
+    const centroids = new Float32Array(count * this.dim);
+    const step = this.size / count;
+    for (let c = 0; c < count; c++) {
+      centroids.set(this.data.subarray(Math.floor(c * step) * this.dim, (Math.floor(c * step) + 1) * this.dim), c * this.dim);
+    }
+    this.ivf = { count, centroids, lists: [], trainedAt: this.size };
+
+    for (let iteration = 0; iteration <= iterations; iteration++) {
+      this.ivf.lists = Array.from({ length: count }, () => []);
+      for (let id = 0; id < this.size; id++) {
+        this.ivf.lists[this.nearestCentroid(this.data.subarray(id * this.dim, (id + 1) * this.dim))].push(id);
+      }
+      if (iteration === iterations) break;
+
+      // Spherical k-means: centroids are re-normalized means
+      for (let c = 0; c < count; c++) {
+        const members = this.ivf.lists[c];
+        if (members.length === 0) continue;
+        const mean = new Float32Array(this.dim);
+        for (const id of members) {
+          for (let i = 0; i < this.dim; i++) mean[i] += this.data[id * this.dim + i];
+        }
+        let norm = 0;
+        for (let i = 0; i < this.dim; i++) norm += mean[i] * mean[i];
+        norm = Math.sqrt(norm) || 1;
+        for (let i = 0; i < this.dim; i++) centroids[c * this.dim + i] = mean[i] / norm;
+      }
+    }
+  }
+
+  candidates(vector) {
+    if (!this.ivf) return null;
+    const ranked = [];
+    for (let c = 0; c < this.ivf.count; c++) {
+      ranked.push({ c, score: dot(this.ivf.centroids, c * this.dim, vector) });
+    }
+    ranked.sort((a, b) => b.score - a.score);
+    return ranked.slice(0, options.ivfProbes).flatMap(({ c }) => this.ivf.lists[c]);
+  }
+
+  // Best match as { score, payload } among the payloads `accept` allows, or
+  // null when there is none.
+  search(vector, accept = () => true) {
+    let best = null;
+    const visit = (id) => {
+      if (!accept(this.payloads[id])) return;
+      const score = dot(this.data, id * this.dim, vector);
+      if (!best || score > best.score) best = { score, payload: this.payloads[id] };
+    };
+    const ids = this.candidates(vector);
+    if (ids) ids.forEach(visit);
+    else for (let id = 0; id < this.size; id++) visit(id);
+    return best;
+  }
+}
+
+const indexes = new Map();
+const seededSessions = new Set();
+
+const indexFor = (language, level) => {
+  const key = `${language}\u0000${level}`;
+  if (!indexes.has(key)) indexes.set(key, new VectorIndex());
+  return indexes.get(key);
+};
+
+const escapeRegExp = (text) => text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+
+const CODE_SPANS = /(```[\s\S]*?```|`[^`\n]+`)/;
+
+const sameValues = (a = [], b = []) => a.length === b.length && a.every((value, index) => value === b[index]);
+
+// Renames the stored program's identifiers to the ones in the new program,
+// matched by order of first appearance. Only code spans and fences are
+// renamed; in the prose a name like `a` is also just a word.
+const renameIdentifiers = (explanation, from, to) => {
+  const renames = new Map();
+  from.forEach((name, index) => {
+    if (to[index] && to[index] !== name) renames.set(name, to[index]);
+  });
+  if (renames.size === 0) return explanation;
+
+  const pattern = new RegExp(`\\b(${[...renames.keys()].map(escapeRegExp).join('|')})\\b`, 'g');
+  const rename = (text) => (typeof text === 'string'
+    ? text.split(CODE_SPANS).map((part, index) => (index % 2 === 1 ? part.replace(pattern, name => renames.get(name)) : part)).join('')
+    : text);
+  return {
+    ...explanation,
+    error_type: rename(explanation.error_type),
+    simple_explanation: rename(explanation.simple_explanation),
+    solution: rename(explanation.solution),
+    learning_points: (explanation.learning_points || []).map(rename)
+  };
+};
+
+export const rememberExplanation = ({ code, language, level, errorMessage = '', explanation }) => {
+  const { tokens, identifiers, fixed } = errorSignature(code, language, errorMessage);
+  if (tokens.length === 0) return;
+  const { source, ...stored } = explanation;
+  indexFor(language, level).add(embedSignature(tokens), { identifiers, fixed, explanation: stored });
+  stats.indexed++;
+};
+
+// Returns a reused explanation (source "similar") or null.
+export const findSimilarExplanation = ({ code, language, level, errorMessage = '' }) => {
+  const index = indexes.get(`${language}\u0000${level}`);
+  if (!index || index.size === 0) return null;
+
+  const started = performance.now();
+  stats.lookups++;
+  const { tokens, identifiers, fixed } = errorSignature(code, language, errorMessage);
+  const match = tokens.length > 0
+    ? index.search(embedSignature(tokens), payload => sameValues(payload.fixed, fixed))
+    : null;
+  stats.lookupMs += performance.now() - started;
+
+  if (!match || match.score < options.threshold) return null;
+  stats.hits++;
+  return {
+    ...renameIdentifiers(match.payload.explanation, match.payload.identifiers, identifiers),
+    source: 'similar',
+    similarity: match.score
+  };
+};
+
+// Loads past DebuggingSession records. Only sessions the student did not
+// rate poorly and that were answered by the LLM are worth reusing.
+export const seedSimilarExplanations = (sessions) => {
+  for (const session of sessions) {
+    if (seededSessions.has(session.id)) continue;
+    seededSessions.add(session.id);
+    if (session.analysis_source !== 'llm' || !session.programming_level) continue;
+    if (session.user_satisfaction && session.user_satisfaction < 3) continue;
+    if (!session.code_input || !session.explanation_provided) continue;
+
+    rememberExplanation({
+      code: session.code_input,
+      language: session.programming_language,
+      level: session.programming_level,
+      errorMessage: session.error_message || '',
+      explanation: {
+        error_type: session.error_type,
+        simple_explanation: session.explanation_provided,
+        solution: session.solution_suggested,
+        learning_points: session.concepts_learned || []
+      }
+    });
+  }
+};
+
+export const clearSemanticIndex = () => {
+  indexes.clear();
+  seededSessions.clear();
+  stats.indexed = 0;
+};
+
+export const getSemanticReuseStats = () => ({
+  ...stats,
+  reuseRate: stats.lookups > 0 ? stats.hits / stats.lookups : 0,
+  averageLookupMs: stats.lookups > 0 ? stats.lookupMs / stats.lookups : 0
+});
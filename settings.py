@@ -1,5 +1,9 @@
 import React, { useState, useEffect } from "react";
-import { User } from "@/entities/all";
+import { User } from "../components/debugger/queryCache";
+import { recognitionService } from "../components/voice/speechRecognition";
+import { speechQueue } from "../components/voice/speechQueue";
+import { applyVoicePreferences } from "../components/voice/voicePreferences";
+import { wantsBargeIn } from "../components/voice/bargeIn";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Label } from "@/components/ui/label";
@@ -23,7 +27,12 @@ export default function Settings() {
     voice_enabled: true,
     speech_rate: 1.0,
     preferred_language: 'python',
-    programming_level: 'beginner'
+    programming_level: 'beginner',
+    speculative_analysis: false,
+    speech_backend: 'auto',
+    speech_engine: 'browser',
+    // null until chosen: follows the voice (see bargeInByDefault)
+    barge_in: null
   });
   const [isSaving, setIsSaving] = useState(false);
   const [saveMessage, setSaveMessage] = useState('');
@@ -42,7 +51,11 @@ export default function Settings() {
         voice_enabled: user.voice_enabled ?? true,
         speech_rate: user.speech_rate ?? 1.0,
         preferred_language: user.preferred_language ?? 'python',
-        programming_level: user.programming_level ?? 'beginner'
+        programming_level: user.programming_level ?? 'beginner',
+        speculative_analysis: user.speculative_analysis ?? false,
+        speech_backend: user.speech_backend ?? 'auto',
+        speech_engine: user.speech_engine ?? 'browser',
+        barge_in: user.barge_in ?? null
       });
     } catch (error) {
       console.error('Error loading user settings:', error);
@@ -60,6 +73,8 @@ export default function Settings() {
       
       // Update local state
       setUserProfile(prev => ({ ...prev, ...settings }));
+      applyVoicePreferences(settings);
+      if (!settings.voice_enabled) recognitionService.stop();
       
       // Clear message after 3 seconds
       setTimeout(() => setSaveMessage(''), 3000);
@@ -72,16 +87,11 @@ export default function Settings() {
   };
 
   const testSpeech = () => {
-    if ('speechSynthesis' in window) {
-      window.speechSynthesis.cancel(); // Cancel any ongoing speech
-      const utterance = new SpeechSynthesisUtterance(
-        "Hello! This is a test of your text-to-speech settings. The speech rate is currently set to " + settings.speech_rate + ". How does this sound?"
-      );
-      utterance.rate = settings.speech_rate;
-      utterance.pitch = 1;
-      utterance.volume = 0.8;
-      window.speechSynthesis.speak(utterance);
-    }
+    applyVoicePreferences(settings);
+    speechQueue.speak(
+      "Hello! This is a test of your text-to-speech settings. The speech rate is currently set to " + settings.speech_rate + ". How does this sound?",
+      { rate: settings.speech_rate, volume: 0.8 }
+    );
   };
 
   if (isLoading) {
@@ -207,6 +217,22 @@ export default function Settings() {
                   </Select>
                 </div>
               </div>
+
+              <div className="flex items-center justify-between p-4 bg-blue-50 rounded-lg">
+                <div className="flex-1">
+                  <Label htmlFor="speculative_analysis" className="text-base font-medium">
+                    Prepare Help While I Type
+                  </Label>
+                  <p className="text-sm text-gray-600 mt-1">
+                    Analyze your code in the background once you pause, so "Get Help" answers instantly
+                  </p>
+                </div>
+                <Switch
+                  id="speculative_analysis"
+                  checked={settings.speculative_analysis}
+                  onCheckedChange={(checked) => setSettings(prev => ({ ...prev, speculative_analysis: checked }))}
+                />
+              </div>
             </CardContent>
           </Card>
 
@@ -262,6 +288,68 @@ export default function Settings() {
                     </div>
                   </div>
 
+                  {/* Speech Recognition Engine */}
+                  <div>
+                    <Label htmlFor="speech_backend" className="text-base font-medium">
+                      Speech Recognition
+                    </Label>
+                    <p className="text-sm text-gray-600 mb-3">
+                      On-device recognition works offline and in browsers without built-in speech recognition, but only understands voice commands and common programming words
+                    </p>
+                    <Select
+                      value={settings.speech_backend}
+                      onValueChange={(value) => setSettings(prev => ({ ...prev, speech_backend: value }))}
+                    >
+                      <SelectTrigger id="speech_backend" className="w-full md:w-64">
+                        <SelectValue />
+                      </SelectTrigger>
+                      <SelectContent>
+                        <SelectItem value="auto">Automatic</SelectItem>
+                        <SelectItem value="native">Browser</SelectItem>
+                        <SelectItem value="local">On-device</SelectItem>
+                      </SelectContent>
+                    </Select>
+                  </div>
+
+                  {/* Speech Engine */}
+                  <div>
+                    <Label htmlFor="speech_engine" className="text-base font-medium">
+                      Voice
+                    </Label>
+                    <p className="text-sm text-gray-600 mb-3">
+                      The on-device voice sounds the same in every browser and works offline; explanations you hear often start instantly
+                    </p>
+                    <Select
+                      value={settings.speech_engine}
+                      onValueChange={(value) => setSettings(prev => ({ ...prev, speech_engine: value }))}
+                    >
+                      <SelectTrigger id="speech_engine" className="w-full md:w-64">
+                        <SelectValue />
+                      </SelectTrigger>
+                      <SelectContent>
+                        <SelectItem value="browser">Browser</SelectItem>
+                        <SelectItem value="local">On-device</SelectItem>
+                      </SelectContent>
+                    </Select>
+                  </div>
+
+                  {/* Barge-in */}
+                  <div className="flex items-center justify-between">
+                    <div className="flex-1">
+                      <Label htmlFor="barge_in" className="text-base font-medium">
+                        Interrupt by Speaking
+                      </Label>
+                      <p className="text-sm text-gray-600 mt-1">
+                        Start talking while an explanation is read and it stops to listen to you (on by default with the on-device voice; use headphones with the browser voice)
+                      </p>
+                    </div>
+                    <Switch
+                      id="barge_in"
+                      checked={wantsBargeIn(settings)}
+                      onCheckedChange={(checked) => setSettings(prev => ({ ...prev, barge_in: checked }))}
+                    />
+                  </div>
+
                   {/* Test Speech */}
                   <div className="flex items-center gap-3">
                     <Button 
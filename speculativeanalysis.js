@@ -0,0 +1,155 @@
+import { useEffect, useRef } from 'react';
+import { isAbortError } from "./analysisRequests";
+
+// Opt-in background analysis: once the code has been left alone for a few
+// seconds and the browser is idle, analyze it so the result is already in
+// the explanation cache when the student presses "Get Help".
+//
+// Spend is capped per user: at most `maxConcurrent` speculative calls at a
+// time, and per day no more than `maxRatio` times the number of explicit
+// analyses (plus a small allowance) and never more than `dailyLimit`.
+
+const STORAGE_KEY = 'codewhisperer-speculative-usage';
+
+export const SPECULATIVE_DEFAULTS = {
+  stableMs: 3000,
+  minChars: 20,
+  maxConcurrent: 1,
+  dailyLimit: 30,
+  maxRatio: 0.5,
+  minDaily: 5
+};
+
+const running = new Map();
+const stats = {
+  scheduled: 0,
+  started: 0,
+  llmCalls: 0,
+  skippedBudget: 0,
+  skippedBusy: 0,
+  cancelled: 0
+};
+
+const today = () => new Date().toISOString().slice(0, 10);
+
+const readUsage = (userKey) => {
+  try {
+    const all = JSON.parse(localStorage.getItem(STORAGE_KEY) || '{}');
+    const usage = all[userKey];
+    if (usage && usage.date === today()) return usage;
+  } catch (error) {
+    console.error('Error reading speculative usage:', error);
+  }
+  return { date: today(), speculative: 0, explicit: 0 };
+};
+
+const writeUsage = (userKey, usage) => {
+  try {
+    const all = JSON.parse(localStorage.getItem(STORAGE_KEY) || '{}');
+    // Only today's counters matter; drop anything older
+    for (const key of Object.keys(all)) {
+      if (all[key].date !== today()) delete all[key];
+    }
+    all[userKey] = usage;
+    localStorage.setItem(STORAGE_KEY, JSON.stringify(all));
+  } catch (error) {
+    console.error('Error writing speculative usage:', error);
+  }
+};
+
+export const recordExplicitAnalysis = (userKey) => {
+  const usage = readUsage(userKey);
+  usage.explicit++;
+  writeUsage(userKey, usage);
+};
+
+export const speculativeAllowance = (userKey, options = SPECULATIVE_DEFAULTS) => {
+  const usage = readUsage(userKey);
+  const limit = Math.min(
+    options.dailyLimit,
+    options.minDaily + Math.floor(usage.explicit * options.maxRatio)
+  );
+  return Math.max(0, limit - usage.speculative);
+};
+
+const scheduleIdle = (callback) => {
+  if (typeof window !== 'undefined' && window.requestIdleCallback) {
+    const handle = window.requestIdleCallback(callback, { timeout: 2000 });
+    return () => window.cancelIdleCallback(handle);
+  }
+  const handle = setTimeout(callback, 0);
+  return () => clearTimeout(handle);
+};
+
+// `prefetch()` must resolve to the explanation (with its `source`) and is
+// expected to write LLM results to the explanation cache itself.
+export const useSpeculativeAnalysis = ({
+  enabled,
+  userKey,
+  code,
+  language,
+  level,
+  errorMessage,
+  isBusy,
+  prefetch,
+  options = SPECULATIVE_DEFAULTS
+}) => {
+  const prefetchRef = useRef(prefetch);
+  const busyRef = useRef(isBusy);
+  prefetchRef.current = prefetch;
+  busyRef.current = isBusy;
+
+  useEffect(() => {
+    if (!enabled || !userKey || code.trim().length < options.minChars) return undefined;
+
+    let cancelIdle = null;
+    let cancelled = false;
+    stats.scheduled++;
+
+    const timer = setTimeout(() => {
+      cancelIdle = scheduleIdle(async () => {
+        if (cancelled) return;
+        if (busyRef.current || (running.get(userKey) || 0) >= options.maxConcurrent) {
+          stats.skippedBusy++;
+          return;
+        }
+        if (speculativeAllowance(userKey, options) <= 0) {
+          stats.skippedBudget++;
+          return;
+        }
+
+        // Reserve the call up front so parallel tabs cannot overshoot,
+        // and give it back if no LLM call was needed after all
+        const usage = readUsage(userKey);
+        usage.speculative++;
+        writeUsage(userKey, usage);
+        running.set(userKey, (running.get(userKey) || 0) + 1);
+        stats.started++;
+
+        try {
+          const result = await prefetchRef.current();
+          if (result?.source === 'llm') {
+            stats.llmCalls++;
+          } else {
+            const refund = readUsage(userKey);
+            refund.speculative = Math.max(0, refund.speculative - 1);
+            writeUsage(userKey, refund);
+          }
+        } catch (error) {
+          if (isAbortError(error)) stats.cancelled++;
+          else console.error('Speculative analysis failed:', error);
+        } finally {
+          running.set(userKey, running.get(userKey) - 1);
+        }
+      });
+    }, options.stableMs);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+      if (cancelIdle) cancelIdle();
+    };
+  }, [enabled, userKey, code, language, level, errorMessage, options]);
+};
+
+export const getSpeculativeStats = () => ({ ...stats });
@@ -0,0 +1,74 @@
+// On-device speech recognition worker. Loads a small Vosk model (WASM,
+// CPU only) restricted to the grammar it is given, and decodes audio
+// arriving from the capture worklet's port or posted directly (fixtures).
+// The engine is an optional dependency: without vosk-browser installed the
+// worker reports an error and the app stays on the browser's recognizer.
+
+let recognizer = null;
+let sampleRate = 16000;
+
+const post = (message) => self.postMessage(message);
+
+// Words outside the grammar come back as "[unk]"
+const known = (text) => (text || '').replace(/\[unk\]/g, ' ').replace(/\s+/g, ' ').trim();
+
+const accept = (samples) => {
+  if (!recognizer) return;
+  try {
+    recognizer.acceptWaveformFloat(samples, sampleRate);
+  } catch (error) {
+    post({ type: 'error', message: error.message });
+  }
+};
+
+const init = async ({ modelUrl, grammar, rate }) => {
+  sampleRate = rate;
+  if (recognizer) {
+    post({ type: 'ready' });
+    return;
+  }
+  try {
+    const { createModel } = await import('vosk-browser');
+    const model = await createModel(modelUrl);
+    recognizer = new model.KaldiRecognizer(sampleRate, JSON.stringify(grammar));
+    recognizer.on('partialresult', (message) => {
+      const text = known(message.result.partial);
+      if (text) post({ type: 'partial', text });
+    });
+    recognizer.on('result', (message) => {
+      post({ type: 'result', text: known(message.result.text) });
+    });
+    post({ type: 'ready' });
+  } catch (error) {
+    post({ type: 'error', message: `On-device recognition unavailable: ${error.message}` });
+  }
+};
+
+// Cheap availability check: the engine imports and the model is served
+const probe = async ({ modelUrl }) => {
+  try {
+    await import('vosk-browser');
+    const response = await fetch(modelUrl, { method: 'HEAD' });
+    if (!response.ok) throw new Error(`model not found (HTTP ${response.status})`);
+    post({ type: 'probe', ok: true });
+  } catch (error) {
+    post({ type: 'probe', ok: false, message: error.message });
+  }
+};
+
+self.onmessage = (event) => {
+  const { type } = event.data;
+
+  if (type === 'probe') {
+    probe(event.data);
+  } else if (type === 'init') {
+    init(event.data);
+  } else if (type === 'connect') {
+    // Audio from the worklet comes in on its own port
+    event.data.port.onmessage = (message) => accept(message.data.samples);
+  } else if (type === 'audio') {
+    accept(event.data.samples);
+  } else if (type === 'flush') {
+    if (recognizer) recognizer.retrieveFinalResult();
+  }
+};
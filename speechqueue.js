@@ -0,0 +1,309 @@
+import { useSyncExternalStore } from 'react';
+
+// Speaks text as a queue of sentence-sized utterances. Text can be fed while
+// it is still being generated: each sentence is queued as soon as it is
+// complete, so speech starts with the first sentence of the response rather
+// than after the last, and no single utterance is long enough for engines to
+// truncate or stall on. The next sentence is handed to the engine before the
+// current one ends, so there is no gap between them.
+
+const DEFAULT_OPTIONS = { rate: 1.0, pitch: 1, volume: 0.8, lookahead: 1, maxChars: 220 };
+
+const stats = {
+  sessions: 0,
+  utterances: 0,
+  skipped: 0,
+  replayed: 0,
+  firstAudioCount: 0,
+  firstAudioTotalMs: 0,
+  lastFirstAudioMs: null
+};
+
+const ABBREVIATIONS = /\b(e\.g|i\.e|etc|vs|Mr|Mrs|Dr)\.$/i;
+const FENCE_LINE = /^\s*(`{3,}|~{3,})/;
+
+const BLOCK_MARKER = /^\s*(#{1,6}\s+|[-*+]\s+|\d+[.)]\s+|>\s*)/;
+
+// Markdown markers read badly aloud; code inside fences is left as written.
+const cleanText = (text) => text
+  .replace(/\[([^\]]+)\]\([^)]*\)/g, '$1')
+  .replace(/(\*\*|__|`)/g, '')
+  .replace(/(^|\s)[*_](\S)/g, '$1$2')
+  .replace(/(\S)[*_](?=\s|$|[.,!?:;])/g, '$1')
+  .trim();
+
+// Breaks an over-long sentence at a comma, or failing that a space.
+const splitLong = (sentence, maxChars) => {
+  const parts = [];
+  let rest = sentence;
+  while (rest.length > maxChars) {
+    const window = rest.slice(0, maxChars);
+    let cut = window.lastIndexOf(', ') + 1;
+    if (cut < maxChars / 2) cut = window.lastIndexOf(' ');
+    if (cut <= 0) cut = maxChars;
+    parts.push(rest.slice(0, cut).trim());
+    rest = rest.slice(cut).trim();
+  }
+  if (rest) parts.push(rest);
+  return parts;
+};
+
+const splitLine = (line) => {
+  const sentences = [];
+  const boundary = /[.!?]+["')\]]*\s+/g;
+  let start = 0;
+  let match;
+  while ((match = boundary.exec(line)) !== null) {
+    const end = match.index + match[0].trimEnd().length;
+    if (ABBREVIATIONS.test(line.slice(start, end))) continue;
+    sentences.push(line.slice(start, end));
+    start = match.index + match[0].length;
+  }
+  sentences.push(line.slice(start));
+  return sentences;
+};
+
+// Sentences of `text`, one per line at most. Unless `final`, the last one
+// is held back because more of it may still arrive.
+export const splitSentences = (text, { final = true, maxChars = DEFAULT_OPTIONS.maxChars } = {}) => {
+  const sentences = [];
+  const lines = (text || '').replace(/\r\n?/g, '\n').split('\n');
+  let inFence = false;
+
+  lines.forEach((line, lineIndex) => {
+    const lastLine = lineIndex === lines.length - 1;
+    if (FENCE_LINE.test(line)) {
+      inFence = !inFence;
+      return;
+    }
+    const pieces = inFence ? [line] : splitLine(line.replace(BLOCK_MARKER, ''));
+    pieces.forEach((piece, pieceIndex) => {
+      if (!final && lastLine && pieceIndex === pieces.length - 1) return;
+      const spoken = inFence ? piece.trim() : cleanText(piece);
+      if (/[\p{L}\p{N}]/u.test(spoken)) sentences.push(...splitLong(spoken, maxChars));
+    });
+  });
+  return sentences;
+};
+
+// A field that opens with a list, heading or code goes on its own line
+const lead = (phrase, value) =>
+  BLOCK_MARKER.test(value) || FENCE_LINE.test(value) ? `${phrase}\n${value}` : `${phrase} ${value}`;
+
+// Spoken as sentences of their own, so they sound the same every time and
+// a cached rendering can be reused
+export const SPEECH_LEADS = ["Here is what's wrong:", 'And here is how to fix it:'];
+
+const SPEECH_FIELDS = [
+  ['error_type', (value) => lead('I found a', value)],
+  ['simple_explanation', (value) => `${SPEECH_LEADS[0]}\n${value}`],
+  ['solution', (value) => `${SPEECH_LEADS[1]}\n${value}`]
+];
+
+// What is read aloud for an explanation. For a partial explanation the
+// text only ever grows: fields are added in order, and a field is closed
+// off once the next one has started.
+export const explanationSpeech = (explanation, { complete = true } = {}) => {
+  const parts = [];
+  for (let i = 0; i < SPEECH_FIELDS.length; i++) {
+    const [field, phrase] = SPEECH_FIELDS[i];
+    const value = explanation?.[field];
+    if (!value) break;
+    const closed = complete || SPEECH_FIELDS.slice(i + 1).some(([later]) => explanation[later]);
+    if (!closed) {
+      parts.push(phrase(value));
+      break;
+    }
+    const text = phrase(value.trimEnd());
+    parts.push(/[.!?]$/.test(text) ? `${text}\n` : `${text}.\n`);
+  }
+  return parts.join('');
+};
+
+export class SpeechQueue {
+  constructor({ synth, Utterance, now = () => performance.now() } = {}) {
+    this.synth = synth;
+    this.Utterance = Utterance;
+    this.now = now;
+    this.options = DEFAULT_OPTIONS;
+    this.sentences = [];
+    this.index = 0;
+    this.queuedUpTo = 0;
+    this.final = true;
+    this.active = false;
+    this.generation = 0;
+    this.listeners = new Set();
+    this.state = { active: false, speaking: false, index: 0, total: 0 };
+  }
+
+  getSynth() {
+    if (!this.synth && typeof window !== 'undefined' && 'speechSynthesis' in window) {
+      this.synth = window.speechSynthesis;
+      this.Utterance = window.SpeechSynthesisUtterance;
+    }
+    return this.synth;
+  }
+
+  // Swaps the engine (null for the browser's speechSynthesis); whatever is
+  // being read is stopped first.
+  setSynth(synth, Utterance) {
+    this.stop();
+    this.synth = synth;
+    this.Utterance = Utterance;
+  }
+
+  getState = () => this.state;
+
+  subscribe = (listener) => {
+    this.listeners.add(listener);
+    return () => this.listeners.delete(listener);
+  };
+
+  emit(speaking = this.state.speaking) {
+    this.state = {
+      active: this.active,
+      speaking: this.active && speaking,
+      index: this.index,
+      total: this.sentences.length
+    };
+    this.listeners.forEach(listener => listener(this.state));
+  }
+
+  // Starts a new session, stopping anything still being spoken. Call
+  // before the text exists so time-to-first-audio covers generation.
+  begin(options = {}) {
+    this.interrupt();
+    this.options = { ...DEFAULT_OPTIONS, ...options };
+    this.sentences = [];
+    this.index = 0;
+    this.queuedUpTo = 0;
+    this.final = false;
+    this.active = true;
+    this.startedAt = this.now();
+    this.heardFirst = false;
+    stats.sessions++;
+    this.emit(false);
+  }
+
+  // Feeds the text so far. Sentences already queued that changed are
+  // re-queued; sentences already spoken are not repeated. After a stop the
+  // text is still kept up to date, so skip and replay can pick up again.
+  feed(text, { final = false } = {}) {
+    const next = splitSentences(text, { final, maxChars: this.options.maxChars });
+    if (!this.active) {
+      this.sentences = next;
+      this.final = final;
+      return;
+    }
+    let changedAt = 0;
+    while (changedAt < this.sentences.length && changedAt < next.length && this.sentences[changedAt] === next[changedAt]) {
+      changedAt++;
+    }
+    this.sentences = next;
+    this.final = final;
+    if (changedAt < this.queuedUpTo) {
+      this.restartFrom(Math.max(changedAt, this.index));
+    } else {
+      this.pump();
+    }
+  }
+
+  speak(text, options) {
+    this.begin(options);
+    this.feed(text, { final: true });
+  }
+
+  // Like replay, this also resumes after a stop (e.g. the student
+  // interrupted, then said "skip")
+  skip() {
+    if (this.sentences.length === 0) return;
+    stats.skipped++;
+    this.active = true;
+    this.restartFrom(Math.min(this.index + 1, this.sentences.length));
+  }
+
+  replay() {
+    if (this.sentences.length === 0) return;
+    stats.replayed++;
+    this.active = true;
+    this.restartFrom(Math.min(this.index, this.sentences.length - 1));
+  }
+
+  stop() {
+    this.interrupt();
+    this.active = false;
+    this.emit(false);
+  }
+
+  interrupt() {
+    this.generation++;
+    if (this.getSynth()) this.synth.cancel();
+  }
+
+  restartFrom(index) {
+    this.interrupt();
+    this.index = index;
+    this.queuedUpTo = index;
+    this.pump();
+  }
+
+  pump() {
+    if (!this.getSynth()) return;
+    while (this.queuedUpTo < this.sentences.length && this.queuedUpTo - this.index <= this.options.lookahead) {
+      this.enqueue(this.queuedUpTo++);
+    }
+    if (this.final && this.index >= this.sentences.length) {
+      this.active = false;
+    }
+    this.emit();
+  }
+
+  enqueue(index) {
+    const generation = this.generation;
+    const utterance = new this.Utterance(this.sentences[index]);
+    utterance.rate = this.options.rate;
+    utterance.pitch = this.options.pitch;
+    utterance.volume = this.options.volume;
+
+    utterance.onstart = () => {
+      if (generation !== this.generation) return;
+      this.index = index;
+      if (!this.heardFirst) {
+        this.heardFirst = true;
+        const elapsed = this.now() - this.startedAt;
+        stats.firstAudioCount++;
+        stats.firstAudioTotalMs += elapsed;
+        stats.lastFirstAudioMs = elapsed;
+      }
+      this.emit(true);
+    };
+    const finished = () => {
+      if (generation !== this.generation) return;
+      this.index = index + 1;
+      this.emit(false);
+      this.pump();
+    };
+    utterance.onend = finished;
+    utterance.onerror = (event) => {
+      if (generation !== this.generation) return;
+      if (event.error !== 'interrupted' && event.error !== 'canceled') {
+        console.error('Speech error:', event.error);
+      }
+      finished();
+    };
+
+    this.synth.speak(utterance);
+    stats.utterances++;
+  }
+}
+
+// Shared by everything that talks, so only one thing speaks at a time.
+export const speechQueue = new SpeechQueue();
+
+export const useSpeechQueue = (queue = speechQueue) =>
+  useSyncExternalStore(queue.subscribe, queue.getState);
+
+export const getSpeechStats = () => ({
+  ...stats,
+  meanFirstAudioMs: stats.firstAudioCount > 0 ? stats.firstAudioTotalMs / stats.firstAudioCount : null
+});
@@ -0,0 +1,268 @@
+import { useEffect, useRef, useSyncExternalStore } from 'react';
+import { CommandRecognizer } from "./voiceCommands";
+import { speechQueue } from "./speechQueue";
+import { LocalSpeechRecognition, isLocalRecognitionAvailable, onLocalRecognitionAvailability } from "./localRecognition";
+
+// One SpeechRecognition for the whole app. Once the user starts listening
+// it runs in continuous mode and is restarted whenever the browser ends it,
+// so moving between pages never pays for a cold start. Results go to the
+// handler of the page mounted last (see useVoiceCommands).
+//
+// Backends: 'native' is the browser's engine, 'local' the on-device model
+// (localRecognition); 'auto' uses native where it exists. The local backend
+// only counts as available once its engine and model have been found.
+
+const RESTART_BACKOFF_MS = 1000;
+const FATAL_ERRORS = new Set(['not-allowed', 'service-not-allowed', 'audio-capture', 'engine-unavailable']);
+
+const nativeRecognition = () =>
+  typeof window !== 'undefined' ? window.SpeechRecognition || window.webkitSpeechRecognition : null;
+
+const BACKENDS = {
+  native: { available: () => !!nativeRecognition(), create: () => new (nativeRecognition())() },
+  local: { available: isLocalRecognitionAvailable, create: () => new LocalSpeechRecognition() }
+};
+
+const stats = {
+  starts: 0,
+  restarts: 0,
+  errors: 0,
+  // From start() to onstart; for 'local' the first start includes loading the model
+  startup: {
+    native: { count: 0, totalMs: 0, lastMs: null },
+    local: { count: 0, totalMs: 0, lastMs: null }
+  }
+};
+
+class RecognitionService {
+  constructor() {
+    this.recognition = null;
+    this.backend = 'auto';
+    this.wanted = false;
+    this.running = false;
+    this.handlers = [];
+    this.recognizers = new WeakMap();
+    this.utterance = -1;
+    this.listeners = new Set();
+    this.state = { supported: this.isSupported(), listening: false, running: false, backend: null };
+    onLocalRecognitionAvailability(() => this.handleAvailabilityChange());
+  }
+
+  // The local probe answered, or the model failed to load
+  handleAvailabilityChange() {
+    if (this.activeBackend === 'local' && !BACKENDS.local.available() && this.recognition) {
+      this.stop();
+      this.recognition.onstart = this.recognition.onend = this.recognition.onerror = null;
+      this.recognition.onresult = this.recognition.onspeechend = null;
+      this.recognition = null;
+      this.activeBackend = null;
+      this.running = false;
+    }
+    this.emit();
+  }
+
+  resolveBackend() {
+    if (this.backend !== 'auto') return BACKENDS[this.backend]?.available() ? this.backend : null;
+    return ['native', 'local'].find(name => BACKENDS[name].available()) || null;
+  }
+
+  // Switching backends while listening carries on with the new one
+  setBackend(backend = 'auto') {
+    if (backend === this.backend) return;
+    this.backend = backend;
+    if (!this.recognition) return;
+    const old = this.recognition;
+    this.recognition = null;
+    old.onstart = old.onend = old.onerror = old.onresult = old.onspeechend = null;
+    if (this.running) old.stop();
+    this.running = false;
+    if (this.wanted && this.getRecognition()) this.launch();
+    this.emit();
+  }
+
+  getRecognition() {
+    if (!this.recognition) {
+      const backend = this.resolveBackend();
+      if (!backend) return null;
+
+      const recognition = BACKENDS[backend].create();
+      this.activeBackend = backend;
+      recognition.continuous = true;
+      recognition.interimResults = true;
+      recognition.lang = 'en-US';
+      recognition.onstart = () => this.handleStart();
+      recognition.onend = () => this.handleEnd();
+      recognition.onerror = (event) => this.handleError(event);
+      recognition.onspeechend = () => this.activeRecognizer()?.speechEnded();
+      recognition.onresult = (event) => this.handleResult(event);
+      this.recognition = recognition;
+    }
+    return this.recognition;
+  }
+
+  isSupported() {
+    return !!this.resolveBackend();
+  }
+
+  getState = () => this.state;
+
+  subscribe = (listener) => {
+    this.listeners.add(listener);
+    return () => this.listeners.delete(listener);
+  };
+
+  emit() {
+    this.state = {
+      supported: this.isSupported(),
+      listening: this.wanted,
+      running: this.running,
+      backend: this.activeBackend || null
+    };
+    this.listeners.forEach(listener => listener(this.state));
+  }
+
+  // The page's handler: { commands, onCommand(name, transcript),
+  // onSpeechResult(transcript), isQuestion(transcript) }. A transcript the
+  // page takes for a question skips command matching. Returns the
+  // unregister function.
+  register(handler) {
+    this.handlers.push(handler);
+    return () => {
+      this.handlers = this.handlers.filter(entry => entry !== handler);
+    };
+  }
+
+  activeHandler() {
+    return this.handlers[this.handlers.length - 1] || null;
+  }
+
+  activeRecognizer() {
+    const commands = this.activeHandler()?.commands;
+    if (!commands) return null;
+    if (!this.recognizers.has(commands)) this.recognizers.set(commands, new CommandRecognizer(commands));
+    return this.recognizers.get(commands);
+  }
+
+  // `preRoll` returns a promise of audio heard just before the call
+  // (16 kHz mono), for backends that can be fed audio (barge-in)
+  start({ preRoll = null } = {}) {
+    const recognition = this.getRecognition();
+    if (!recognition || this.wanted) return;
+    if ('preRoll' in recognition) recognition.preRoll = preRoll;
+    this.wanted = true;
+    this.emit();
+    this.launch();
+  }
+
+  stop() {
+    if (!this.wanted) return;
+    this.wanted = false;
+    this.utterance = -1;
+    clearTimeout(this.restartTimer);
+    if (this.running) this.recognition.stop();
+    this.emit();
+  }
+
+  launch() {
+    this.launchedAt = performance.now();
+    try {
+      this.recognition.start();
+      stats.starts++;
+    } catch (error) {
+      // Already started; onstart/onend will follow
+      console.error('Error starting speech recognition:', error);
+    }
+  }
+
+  handleStart() {
+    this.running = true;
+    this.utterance = -1;
+    const elapsed = performance.now() - this.launchedAt;
+    const startup = stats.startup[this.activeBackend];
+    startup.count++;
+    startup.totalMs += elapsed;
+    startup.lastMs = elapsed;
+    this.emit();
+  }
+
+  // Browsers end continuous recognition after silence or a time limit;
+  // restart at once unless it keeps ending straight away.
+  handleEnd() {
+    this.running = false;
+    this.emit();
+    if (!this.wanted) return;
+    stats.restarts++;
+    const delay = performance.now() - this.launchedAt < RESTART_BACKOFF_MS ? RESTART_BACKOFF_MS : 0;
+    clearTimeout(this.restartTimer);
+    this.restartTimer = setTimeout(() => {
+      if (this.wanted && !this.running) this.launch();
+    }, delay);
+  }
+
+  handleError(event) {
+    if (event.error === 'aborted' || event.error === 'no-speech') return;
+    stats.errors++;
+    console.error('Speech recognition error:', event.error);
+    if (FATAL_ERRORS.has(event.error)) this.stop();
+  }
+
+  // In continuous mode every result index is one utterance
+  handleResult(event) {
+    const handler = this.activeHandler();
+    if (!handler) return;
+    const recognizer = this.activeRecognizer();
+
+    for (let i = event.resultIndex; i < event.results.length; i++) {
+      const result = event.results[i];
+      const transcript = result[0].transcript.trim();
+      if (i !== this.utterance) {
+        this.utterance = i;
+        recognizer?.reset();
+      }
+
+      if (recognizer) {
+        const alreadyFired = recognizer.fired;
+        const question = !alreadyFired && !!handler.isQuestion?.(transcript);
+        const command = question ? null : recognizer.feed(transcript, { final: result.isFinal });
+        // Without a speechend per utterance, the final result marks the end
+        if (result.isFinal) recognizer.speechEnded();
+        if (command) {
+          handler.onCommand && handler.onCommand(command.name, transcript);
+          continue;
+        }
+        if (alreadyFired) continue;
+      }
+      // While the app is talking the microphone mostly hears the app, so
+      // only commands get through
+      if (speechQueue.getState().active) continue;
+      if (result.isFinal && transcript) handler.onSpeechResult && handler.onSpeechResult(transcript);
+    }
+  }
+}
+
+export const recognitionService = new RecognitionService();
+
+export const useRecognitionState = () =>
+  useSyncExternalStore(recognitionService.subscribe, recognitionService.getState);
+
+// Routes recognition results to this component while it is mounted. The
+// callbacks may change identity freely; only a new `commands` list
+// re-registers.
+export const useVoiceCommands = ({ commands, onCommand, onSpeechResult, isQuestion }) => {
+  const callbacksRef = useRef(null);
+  callbacksRef.current = { onCommand, onSpeechResult, isQuestion };
+
+  useEffect(() => recognitionService.register({
+    commands,
+    onCommand: (name, transcript) => callbacksRef.current.onCommand?.(name, transcript),
+    onSpeechResult: (transcript) => callbacksRef.current.onSpeechResult?.(transcript),
+    isQuestion: (transcript) => !!callbacksRef.current.isQuestion?.(transcript)
+  }), [commands]);
+};
+
+const summarizeStartup = ({ count, totalMs, lastMs }) => ({ count, lastMs, meanMs: count > 0 ? totalMs / count : null });
+
+export const getRecognitionStats = () => ({
+  ...stats,
+  startup: { native: summarizeStartup(stats.startup.native), local: summarizeStartup(stats.startup.local) }
+});
@@ -0,0 +1,204 @@
+import { InvokeLLM } from "@/integrations/Core";
+import { abortable, createAbortError } from "./analysisRequests";
+
+// Best-effort parser for a JSON document that is still being generated.
+// Returns whatever prefix can be read: unterminated strings and arrays are
+// kept, half-written keys, numbers and literals are dropped until complete.
+export const parsePartialJson = (text) => {
+  const start = text.indexOf('{');
+  if (start === -1) return undefined;
+
+  let i = start;
+  const n = text.length;
+
+  const skipWhitespace = () => {
+    while (i < n && /\s/.test(text[i])) i++;
+  };
+
+  const parseString = () => {
+    i++;
+    let out = '';
+    while (i < n) {
+      const ch = text[i];
+      if (ch === '"') {
+        i++;
+        return { value: out, complete: true };
+      }
+      if (ch === '\\') {
+        if (i + 1 >= n) break;
+        const next = text[i + 1];
+        if (next === 'u') {
+          if (i + 6 > n) break;
+          out += String.fromCharCode(parseInt(text.slice(i + 2, i + 6), 16));
+          i += 6;
+          continue;
+        }
+        out += { n: '\n', t: '\t', r: '\r', b: '\b', f: '\f' }[next] ?? next;
+        i += 2;
+        continue;
+      }
+      out += ch;
+      i++;
+    }
+    i = n;
+    return { value: out, complete: false };
+  };
+
+  const parseScalar = () => {
+    const match = /^(-?\d+(\.\d+)?([eE][+-]?\d+)?|true|false|null)/.exec(text.slice(i));
+    if (!match) return undefined;
+    const end = i + match[0].length;
+    // A number running into the end of the buffer may still grow.
+    if (end >= n) return undefined;
+    i = end;
+    return { value: JSON.parse(match[0]), complete: true };
+  };
+
+  let parseValue;
+
+  const parseArray = () => {
+    i++;
+    const out = [];
+    while (true) {
+      skipWhitespace();
+      if (i >= n) return { value: out, complete: false };
+      if (text[i] === ']') {
+        i++;
+        return { value: out, complete: true };
+      }
+      if (text[i] === ',') {
+        i++;
+        continue;
+      }
+      const item = parseValue();
+      if (!item) return { value: out, complete: false };
+      out.push(item.value);
+      if (!item.complete) return { value: out, complete: false };
+    }
+  };
+
+  const parseObject = () => {
+    i++;
+    const out = {};
+    while (true) {
+      skipWhitespace();
+      if (i >= n) return { value: out, complete: false };
+      if (text[i] === '}') {
+        i++;
+        return { value: out, complete: true };
+      }
+      if (text[i] === ',') {
+        i++;
+        continue;
+      }
+      if (text[i] !== '"') return { value: out, complete: false };
+      const key = parseString();
+      if (!key.complete) return { value: out, complete: false };
+      skipWhitespace();
+      if (text[i] !== ':') return { value: out, complete: false };
+      i++;
+      const item = parseValue();
+      if (!item) return { value: out, complete: false };
+      out[key.value] = item.value;
+      if (!item.complete) return { value: out, complete: false };
+    }
+  };
+
+  parseValue = () => {
+    skipWhitespace();
+    if (i >= n) return undefined;
+    const ch = text[i];
+    if (ch === '{') return parseObject();
+    if (ch === '[') return parseArray();
+    if (ch === '"') return parseString();
+    return parseScalar();
+  };
+
+  return parseValue()?.value;
+};
+
+const isAsyncIterable = (value) =>
+  value != null && typeof value[Symbol.asyncIterator] === 'function';
+
+const isReadableStream = (value) =>
+  value != null && typeof value.getReader === 'function';
+
+async function* readStream(stream) {
+  const reader = stream.getReader();
+  try {
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) return;
+      yield value;
+    }
+  } finally {
+    reader.releaseLock();
+  }
+}
+
+// Normalizes the shapes a streaming backend may hand us into an async
+// iterable of chunks, or null when the response is already complete.
+export const toChunkStream = (response) => {
+  if (isAsyncIterable(response)) return response;
+  if (isReadableStream(response)) return readStream(response);
+  if (response && isReadableStream(response.body)) return readStream(response.body);
+  return null;
+};
+
+const chunkToText = (chunk, decoder) => {
+  if (typeof chunk === 'string') return chunk;
+  if (chunk instanceof Uint8Array) return decoder.decode(chunk, { stream: true });
+  return chunk?.delta ?? chunk?.text ?? '';
+};
+
+// Calls InvokeLLM in streaming mode and reports the explanation as it is
+// parsed. Backends that ignore `stream` return the full object, which is
+// passed through unchanged so callers see the old all-at-once behavior.
+// `signal` is forwarded to the backend and also stops reading the stream.
+export const invokeLLMStreaming = async ({
+  prompt,
+  response_json_schema,
+  onPartial,
+  signal,
+  invoke = InvokeLLM,
+  ...rest
+}) => {
+  const response = await abortable(
+    invoke({ prompt, response_json_schema, stream: true, signal, ...rest }),
+    signal
+  );
+  const chunks = toChunkStream(response);
+
+  if (!chunks) {
+    const result = typeof response === 'string' ? JSON.parse(response) : response;
+    onPartial && onPartial(result);
+    return result;
+  }
+
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let lastSnapshot = '';
+
+  for await (const chunk of chunks) {
+    if (signal?.aborted) throw createAbortError();
+    buffer += chunkToText(chunk, decoder);
+    const partial = parsePartialJson(buffer);
+    if (!partial) continue;
+    const snapshot = JSON.stringify(partial);
+    if (snapshot !== lastSnapshot) {
+      lastSnapshot = snapshot;
+      onPartial && onPartial(partial);
+    }
+  }
+
+  const start = buffer.indexOf('{');
+  const end = buffer.lastIndexOf('}');
+  try {
+    return JSON.parse(buffer.slice(start, end + 1));
+  } catch (error) {
+    // Truncated stream: fall back to the best partial parse we have.
+    const partial = parsePartialJson(buffer);
+    if (!partial) throw error;
+    return partial;
+  }
+};
@@ -0,0 +1,433 @@
+// Line-at-a-time tokenizers for the playground languages. Each tokenizer
+// takes a line and the lexer state left by the previous line (open block
+// comment, triple-quoted string, ...) and returns the line's tokens plus the
+// state at its end. Tokens are flat [start, end, type, ...] triples so they
+// are cheap to cache and to post from the editor worker.
+
+export const TOKEN_CLASSES = {
+  keyword: 'text-purple-700',
+  string: 'text-green-700',
+  comment: 'text-gray-500 italic',
+  number: 'text-orange-600',
+  function: 'text-blue-700',
+  type: 'text-teal-700',
+  meta: 'text-pink-600',
+  tag: 'text-blue-800',
+  attribute: 'text-amber-700',
+  property: 'text-sky-700'
+};
+
+const words = (list) => new Set(list.split(' '));
+
+const IDENTIFIER = /[A-Za-z_$][\w$]*/y;
+const NUMBER = /(?:0[xX][\da-fA-F_]+|0[bB][01_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?)[a-zA-Z]*/y;
+
+const matchAt = (pattern, text, index) => {
+  pattern.lastIndex = index;
+  const match = pattern.exec(text);
+  return match ? match[0] : null;
+};
+
+// Index of the closing quote, honouring backslash escapes, or -1.
+const stringEnd = (text, from, quote) => {
+  for (let i = from; i < text.length; i++) {
+    if (text[i] === '\\') i++;
+    else if (text.startsWith(quote, i)) return i;
+  }
+  return -1;
+};
+
+const nextNonSpace = (text, index) => {
+  while (index < text.length && (text[index] === ' ' || text[index] === '\t')) index++;
+  return text[index];
+};
+
+const C_LIKE = {
+  javascript: {
+    keywords: words('async await break case catch class const continue debugger default delete do else export extends finally for from function get if import in instanceof let new of return set static super switch this throw try typeof var void while with yield'),
+    types: words('true false null undefined NaN Infinity Array Object String Number Boolean Promise Map Set Math JSON console document window'),
+    templates: true
+  },
+  java: {
+    keywords: words('abstract assert break case catch class continue default do else enum extends final finally for if implements import instanceof interface native new package private protected public record return static strictfp super switch synchronized this throw throws transient try var void volatile while'),
+    types: words('boolean byte char double float int long short true false null String Integer Double Boolean Object System List ArrayList Map HashMap'),
+    annotations: true,
+    capitalTypes: true
+  },
+  cpp: {
+    keywords: words('alignas auto break case catch class const constexpr const_cast continue default delete do dynamic_cast else enum explicit extern for friend goto if inline mutable namespace new noexcept operator private protected public reinterpret_cast return sizeof static static_cast struct switch template this throw try typedef typename union using virtual volatile while'),
+    types: words('bool char double float int long short signed unsigned void size_t true false nullptr std string vector map set cout cin endl'),
+    preprocessor: true
+  }
+};
+
+const tokenizeCLike = (config, text, state) => {
+  const tokens = [];
+  const push = (start, end, type) => {
+    if (end > start) tokens.push(start, end, type);
+  };
+  let i = 0;
+
+  if (state === 'comment') {
+    const close = text.indexOf('*/');
+    if (close === -1) {
+      push(0, text.length, 'comment');
+      return { tokens, state };
+    }
+    push(0, close + 2, 'comment');
+    i = close + 2;
+  } else if (state === 'template') {
+    const close = stringEnd(text, 0, '`');
+    if (close === -1) {
+      push(0, text.length, 'string');
+      return { tokens, state };
+    }
+    push(0, close + 1, 'string');
+    i = close + 1;
+  } else if (config.preprocessor && /^\s*#/.test(text)) {
+    const comment = text.indexOf('//');
+    push(0, comment === -1 ? text.length : comment, 'meta');
+    if (comment !== -1) push(comment, text.length, 'comment');
+    return { tokens, state: '' };
+  }
+
+  while (i < text.length) {
+    const ch = text[i];
+    if (ch === '/' && text[i + 1] === '/') {
+      push(i, text.length, 'comment');
+      break;
+    }
+    if (ch === '/' && text[i + 1] === '*') {
+      const close = text.indexOf('*/', i + 2);
+      if (close === -1) {
+        push(i, text.length, 'comment');
+        return { tokens, state: 'comment' };
+      }
+      push(i, close + 2, 'comment');
+      i = close + 2;
+      continue;
+    }
+    if (ch === '"' || ch === "'" || (ch === '`' && config.templates)) {
+      const close = stringEnd(text, i + 1, ch);
+      if (close === -1) {
+        push(i, text.length, 'string');
+        return { tokens, state: ch === '`' ? 'template' : '' };
+      }
+      push(i, close + 1, 'string');
+      i = close + 1;
+      continue;
+    }
+    if (ch === '@' && config.annotations) {
+      const word = matchAt(IDENTIFIER, text, i + 1);
+      push(i, i + 1 + (word ? word.length : 0), 'meta');
+      i += 1 + (word ? word.length : 0);
+      continue;
+    }
+    const word = matchAt(IDENTIFIER, text, i);
+    if (word) {
+      const end = i + word.length;
+      if (config.keywords.has(word)) push(i, end, 'keyword');
+      else if (config.types.has(word) || (config.capitalTypes && /^[A-Z]/.test(word))) push(i, end, 'type');
+      else if (nextNonSpace(text, end) === '(') push(i, end, 'function');
+      i = end;
+      continue;
+    }
+    const number = /[\d.]/.test(ch) ? matchAt(NUMBER, text, i) : null;
+    if (number) {
+      push(i, i + number.length, 'number');
+      i += number.length;
+      continue;
+    }
+    i++;
+  }
+  return { tokens, state: '' };
+};
+
+const PYTHON = {
+  keywords: words('and as assert async await break case class continue def del elif else except finally for from global if import in is lambda match nonlocal not or pass raise return try while with yield'),
+  types: words('True False None self int str float bool list dict set tuple object Exception print len range input open enumerate zip map filter sorted sum min max abs isinstance super'),
+  prefixes: words('r u b f br rb fr rf R U B F BR RB FR RF Rb rB Br bR Fr fR Rf rF')
+};
+
+const tokenizePython = (text, state) => {
+  const tokens = [];
+  const push = (start, end, type) => {
+    if (end > start) tokens.push(start, end, type);
+  };
+  let i = 0;
+
+  if (state) {
+    const close = stringEnd(text, 0, state);
+    if (close === -1) {
+      push(0, text.length, 'string');
+      return { tokens, state };
+    }
+    push(0, close + 3, 'string');
+    i = close + 3;
+  }
+
+  let previous = null;
+  while (i < text.length) {
+    const ch = text[i];
+    if (ch === '#') {
+      push(i, text.length, 'comment');
+      break;
+    }
+    if (ch === '@' && text.slice(0, i).trim() === '') {
+      const word = matchAt(/[\w.]+/y, text, i + 1);
+      push(i, i + 1 + (word ? word.length : 0), 'meta');
+      i += 1 + (word ? word.length : 0);
+      continue;
+    }
+    const word = matchAt(IDENTIFIER, text, i);
+    const quoteAt = word && PYTHON.prefixes.has(word) && (text[i + word.length] === '"' || text[i + word.length] === "'")
+      ? i + word.length
+      : (ch === '"' || ch === "'" ? i : -1);
+    if (quoteAt !== -1) {
+      const quote = text[quoteAt];
+      const triple = text.startsWith(quote.repeat(3), quoteAt);
+      const delimiter = triple ? quote.repeat(3) : quote;
+      const close = stringEnd(text, quoteAt + delimiter.length, delimiter);
+      if (close === -1) {
+        push(i, text.length, 'string');
+        return { tokens, state: triple ? delimiter : '' };
+      }
+      push(i, close + delimiter.length, 'string');
+      i = close + delimiter.length;
+      previous = null;
+      continue;
+    }
+    if (word) {
+      const end = i + word.length;
+      if (previous === 'def') push(i, end, 'function');
+      else if (previous === 'class') push(i, end, 'type');
+      else if (PYTHON.keywords.has(word)) push(i, end, 'keyword');
+      else if (PYTHON.types.has(word)) push(i, end, 'type');
+      else if (nextNonSpace(text, end) === '(') push(i, end, 'function');
+      previous = word;
+      i = end;
+      continue;
+    }
+    const number = /[\d.]/.test(ch) ? matchAt(NUMBER, text, i) : null;
+    if (number) {
+      push(i, i + number.length, 'number');
+      i += number.length;
+      continue;
+    }
+    if (ch !== ' ' && ch !== '\t') previous = null;
+    i++;
+  }
+  return { tokens, state: '' };
+};
+
+// CSS inside <style>, with the brace depth and open comments in the state.
+const tokenizeCss = (text, from, to, state, push) => {
+  let i = from;
+  let inBlock = state === 'css-block' || state === 'css-block-comment';
+  if (state.endsWith('-comment')) {
+    const close = text.indexOf('*/', i);
+    if (close === -1 || close + 2 > to) {
+      push(i, to, 'comment');
+      return state;
+    }
+    push(i, close + 2, 'comment');
+    i = close + 2;
+  }
+  while (i < to) {
+    const ch = text[i];
+    if (ch === '/' && text[i + 1] === '*') {
+      const close = text.indexOf('*/', i + 2);
+      if (close === -1 || close + 2 > to) {
+        push(i, to, 'comment');
+        return inBlock ? 'css-block-comment' : 'css-comment';
+      }
+      push(i, close + 2, 'comment');
+      i = close + 2;
+    } else if (ch === '{' || ch === '}') {
+      inBlock = ch === '{';
+      i++;
+    } else if (ch === '"' || ch === "'") {
+      const close = stringEnd(text, i + 1, ch);
+      const end = close === -1 || close >= to ? to : close + 1;
+      push(i, end, 'string');
+      i = end;
+    } else if (ch === '@') {
+      const word = matchAt(/@[\w-]+/y, text, i);
+      push(i, i + word.length, 'meta');
+      i += word.length;
+    } else if (inBlock && ch === '#') {
+      const hex = matchAt(/#[\da-fA-F]+/y, text, i) || '#';
+      push(i, i + hex.length, 'number');
+      i += hex.length;
+    } else {
+      const word = matchAt(/-?[A-Za-z_][\w-]*/y, text, i);
+      if (word) {
+        const end = i + word.length;
+        if (inBlock && nextNonSpace(text, end) === ':' && text.lastIndexOf(':', i) <= text.lastIndexOf(';', i)) {
+          push(i, end, 'property');
+        } else if (!inBlock) {
+          push(i, end, 'tag');
+        }
+        i = end;
+        continue;
+      }
+      const number = /[\d.]/.test(ch) ? matchAt(/\d*\.?\d+(?:%|[a-z]+)?/y, text, i) : null;
+      if (number) {
+        push(i, i + number.length, 'number');
+        i += number.length;
+      } else {
+        i++;
+      }
+    }
+  }
+  return inBlock ? 'css-block' : 'css';
+};
+
+// HTML with embedded <style> and <script>. States: '' (text), 'comment',
+// 'tag:<name>' (inside a start tag), 'css…', and 'script:<js state>'.
+const tokenizeHtml = (text, state) => {
+  const tokens = [];
+  const push = (start, end, type) => {
+    if (end > start) tokens.push(start, end, type);
+  };
+  let i = 0;
+
+  while (i < text.length) {
+    if (state === 'comment') {
+      const close = text.indexOf('-->', i);
+      if (close === -1) {
+        push(i, text.length, 'comment');
+        return { tokens, state };
+      }
+      push(i, close + 3, 'comment');
+      i = close + 3;
+      state = '';
+    } else if (state.startsWith('tag:')) {
+      const ch = text[i];
+      if (ch === '>' || text.startsWith('/>', i)) {
+        const end = ch === '>' ? i + 1 : i + 2;
+        push(i, end, 'tag');
+        const name = state.slice(4);
+        state = ch === '>' && name === 'style' ? 'css' : ch === '>' && name === 'script' ? 'script:' : '';
+        i = end;
+      } else if (ch === '"' || ch === "'") {
+        const close = text.indexOf(ch, i + 1);
+        push(i, close === -1 ? text.length : close + 1, 'string');
+        i = close === -1 ? text.length : close + 1;
+      } else {
+        const name = matchAt(/[^\s=>\/"']+/y, text, i);
+        if (name) push(i, i + name.length, 'attribute');
+        i += name ? name.length : 1;
+      }
+    } else if (state.startsWith('css') || state.startsWith('script:')) {
+      const closeTag = state.startsWith('css') ? '</style' : '</script';
+      const close = text.toLowerCase().indexOf(closeTag, i);
+      const end = close === -1 ? text.length : close;
+      if (state.startsWith('css')) {
+        state = tokenizeCss(text, i, end, state, push);
+      } else {
+        const inner = tokenizeCLike(C_LIKE.javascript, text.slice(i, end), state.slice(7));
+        for (let t = 0; t < inner.tokens.length; t += 3) push(inner.tokens[t] + i, inner.tokens[t + 1] + i, inner.tokens[t + 2]);
+        state = 'script:' + inner.state;
+      }
+      if (close === -1) return { tokens, state };
+      state = '';
+      i = close;
+    } else {
+      const open = text.indexOf('<', i);
+      if (open === -1) break;
+      if (text.startsWith('<!--', open)) {
+        i = open;
+        state = 'comment';
+        continue;
+      }
+      const name = matchAt(/<\/?[!A-Za-z][\w-]*/y, text, open);
+      if (!name) {
+        i = open + 1;
+        continue;
+      }
+      push(open, open + name.length, 'tag');
+      state = 'tag:' + (name[1] === '/' ? '' : name.slice(1).toLowerCase());
+      i = open + name.length;
+    }
+  }
+  return { tokens, state };
+};
+
+export const tokenizeLine = (language, text, state = '') => {
+  if (language === 'python') return tokenizePython(text, state);
+  if (language === 'html_css') return tokenizeHtml(text, state);
+  if (C_LIKE[language]) return tokenizeCLike(C_LIKE[language], text, state);
+  return { tokens: [], state: '' };
+};
+
+// Tokens for a whole snippet, e.g. a code block in an explanation.
+export const highlightLines = (language, code) => {
+  let state = '';
+  return code.split('\n').map((text) => {
+    const result = tokenizeLine(language, text, state);
+    state = result.state;
+    return { text, tokens: result.tokens };
+  });
+};
+
+// Per-line cache of tokens and end-of-line state. Each entry remembers the
+// text and start state it was computed from, so after an edit only lines
+// from the edit onwards are re-tokenized, and only until the lexer state
+// re-converges with what was cached; unchanged lines past that point are
+// reused as they are.
+export class HighlightCache {
+  constructor(language) {
+    this.language = language;
+    this.entries = [];
+    this.validLines = 0;
+    this.stats = { tokenized: 0, reused: 0 };
+  }
+
+  setLanguage(language) {
+    if (language === this.language) return;
+    this.language = language;
+    this.entries = [];
+    this.validLines = 0;
+  }
+
+  // `removed` lines starting at `line` were replaced by `inserted` lines.
+  splice(line, removed, inserted) {
+    const fresh = new Array(inserted).fill(null);
+    if (inserted < 10000 && removed < 10000) {
+      this.entries.splice(line, removed, ...fresh);
+    } else {
+      this.entries = this.entries.slice(0, line).concat(fresh, this.entries.slice(line + removed));
+    }
+    this.validLines = Math.min(this.validLines, line);
+  }
+
+  // Whole document replaced: keep the entries, they are re-checked by text.
+  invalidate() {
+    this.validLines = 0;
+  }
+
+  // Tokens for lines [from, to) of `lines`.
+  tokens(lines, from, to) {
+    to = Math.min(to, lines.length);
+    this.entries.length = lines.length;
+    let state = this.validLines > 0 ? this.entries[this.validLines - 1].state : '';
+    for (let line = this.validLines; line < to; line++) {
+      const cached = this.entries[line];
+      if (cached && cached.text === lines[line] && cached.startState === state) {
+        this.stats.reused++;
+      } else {
+        const result = tokenizeLine(this.language, lines[line], state);
+        this.entries[line] = { text: lines[line], startState: state, state: result.state, tokens: result.tokens };
+        this.stats.tokenized++;
+      }
+      state = this.entries[line].state;
+    }
+    this.validLines = Math.max(this.validLines, to);
+    const result = [];
+    for (let line = from; line < to; line++) {
+      result.push({ text: this.entries[line].text, tokens: this.entries[line].tokens });
+    }
+    return result;
+  }
+}
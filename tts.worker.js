@@ -0,0 +1,28 @@
+// On-device text-to-speech worker. Renders one sentence at a time with a
+// Piper voice (VITS, ONNX on WASM, CPU only) and returns the WAV bytes.
+// The engine is an optional dependency: without @diffusionstudio/vits-web
+// installed every request fails and the app keeps the browser's voice.
+
+let engine = null;
+
+const loadEngine = () => {
+  if (!engine) {
+    engine = import('@diffusionstudio/vits-web');
+    engine.catch(() => {
+      engine = null;
+    });
+  }
+  return engine;
+};
+
+self.onmessage = async (event) => {
+  const { id, text, voice } = event.data;
+  try {
+    const tts = await loadEngine();
+    const wav = await tts.predict({ text, voiceId: voice });
+    const audio = await wav.arrayBuffer();
+    self.postMessage({ id, audio }, [audio]);
+  } catch (error) {
+    self.postMessage({ id, error: error.message });
+  }
+};
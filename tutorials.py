@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { Tutorial, UserProgress, User } from "@/entities/all";
+import { Tutorial, UserProgress, User, useQueryRevalidation } from "../components/debugger/queryCache";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Badge } from "@/components/ui/badge";
@@ -17,8 +17,12 @@ import {
   Star,
   Code
 } from "lucide-react";
-import { Link } from "react-router-dom";
+import { Link, useNavigate } from "react-router-dom";
 import { createPageUrl } from "@/utils";
+import { useVoiceCommands } from "../components/voice/speechRecognition";
+import { applyVoicePreferences } from "../components/voice/voicePreferences";
+import { NAVIGATION_COMMANDS, commandPage } from "../components/voice/voiceCommands";
+import ListenButton from "../components/voice/ListenButton";
 
 export default function Tutorials() {
   const [tutorials, setTutorials] = useState([]);
@@ -28,16 +32,27 @@ export default function Tutorials() {
   const [selectedLanguage, setSelectedLanguage] = useState('all');
   const [selectedLevel, setSelectedLevel] = useState('all');
   const [isLoading, setIsLoading] = useState(true);
+  const navigate = useNavigate();
 
   useEffect(() => {
     loadTutorialsAndProgress();
   }, []);
 
-  const loadTutorialsAndProgress = async () => {
-    setIsLoading(true);
+  // Cached data is shown at once; a background refresh that changed it reloads
+  useQueryRevalidation(() => loadTutorialsAndProgress({ background: true }));
+
+  // Voice navigation, through the recognizer shared with the other pages
+  useVoiceCommands({
+    commands: NAVIGATION_COMMANDS,
+    onCommand: (command) => commandPage(command) && navigate(createPageUrl(commandPage(command)))
+  });
+
+  const loadTutorialsAndProgress = async ({ background = false } = {}) => {
+    if (!background) setIsLoading(true);
     try {
       const user = await User.me();
       setUserProfile(user);
+      applyVoicePreferences(user);
 
       const allTutorials = await Tutorial.list('order_index');
       setTutorials(allTutorials);
@@ -110,13 +125,16 @@ export default function Tutorials() {
     <div className="min-h-screen bg-gradient-to-br from-blue-50 to-indigo-50 p-6 md:p-8">
       <div className="max-w-7xl mx-auto">
         {/* Header */}
-        <div className="mb-8">
-          <h1 className="text-3xl md:text-4xl font-bold text-gray-900 mb-2">
-            Interactive Tutorials
-          </h1>
-          <p className="text-lg text-gray-600">
-            Learn programming step by step with voice-guided tutorials
-          </p>
+        <div className="mb-8 flex flex-col md:flex-row justify-between items-start md:items-center gap-4">
+          <div>
+            <h1 className="text-3xl md:text-4xl font-bold text-gray-900 mb-2">
+              Interactive Tutorials
+            </h1>
+            <p className="text-lg text-gray-600">
+              Learn programming step by step with voice-guided tutorials
+            </p>
+          </div>
+          {userProfile?.voice_enabled && <ListenButton />}
         </div>
 
         {/* Progress Overview */}
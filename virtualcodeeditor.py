@@ -0,0 +1,514 @@
+import React, { useState, useRef, useEffect, useLayoutEffect, forwardRef, useImperativeHandle } from 'react';
+import { Input } from "@/components/ui/input";
+import { Search, X } from "lucide-react";
+import { PieceTable } from "./pieceTable";
+import { createEditorWorker, recordKeystrokeLatency } from "./editorSupport";
+import HighlightedText from "./HighlightedText";
+import { countRender } from "./renderProbe";
+
+const LINE_HEIGHT = 20;
+const OVERSCAN = 10;
+const TAB_SIZE = 4;
+const EMIT_DELAY_MS = 150;
+const LARGE_PASTE_CHARS = 256 * 1024;
+const UNDO_LIMIT = 200;
+const TYPING_GROUP_MS = 1000;
+const FONT_FAMILY = 'Consolas, Monaco, "Courier New", monospace';
+
+// Column on screen for a character column, expanding tabs.
+const visualColumn = (text, column) => {
+  let visual = 0;
+  for (let i = 0; i < column && i < text.length; i++) {
+    visual = text[i] === '\t' ? visual + TAB_SIZE - (visual % TAB_SIZE) : visual + 1;
+  }
+  return visual;
+};
+
+const columnAtVisual = (text, target) => {
+  let visual = 0;
+  for (let i = 0; i < text.length; i++) {
+    const next = text[i] === '\t' ? visual + TAB_SIZE - (visual % TAB_SIZE) : visual + 1;
+    if (target < (visual + next) / 2) return i;
+    visual = next;
+  }
+  return text.length;
+};
+
+// Only the visible lines are rendered, from a piece table, so a 100k-line
+// paste costs the same per keystroke as a ten-line snippet. Input goes
+// through a hidden textarea; the parent hears about changes after typing
+// pauses (or on flush()) instead of on every key.
+const VirtualCodeEditor = forwardRef(function VirtualCodeEditor(
+  { value, onChange, language, placeholder = '', height = 384, className = '' },
+  ref
+) {
+  countRender('VirtualCodeEditor');
+  const tableRef = useRef(null);
+  if (!tableRef.current) tableRef.current = new PieceTable(value);
+
+  const [version, setVersion] = useState(0);
+  const [selection, setSelection] = useState({ anchor: 0, head: 0 });
+  const [scrollTop, setScrollTop] = useState(0);
+  const [charWidth, setCharWidth] = useState(8);
+  const [isFocused, setIsFocused] = useState(false);
+  const [search, setSearch] = useState({ open: false, query: '', offsets: [], total: 0, current: -1 });
+  const [highlights, setHighlights] = useState({ from: 0, lines: [] });
+
+  const scrollerRef = useRef(null);
+  const inputRef = useRef(null);
+  const measureRef = useRef(null);
+  const searchInputRef = useRef(null);
+  const workerRef = useRef(null);
+  const emitTimerRef = useRef(null);
+  const searchTimerRef = useRef(null);
+  const dirtyRef = useRef(false);
+  const lastEmittedRef = useRef(value);
+  const undoRef = useRef([]);
+  const redoRef = useRef([]);
+  const lastTypingRef = useRef(0);
+  const goalColumnRef = useRef(null);
+  const keystrokeStartRef = useRef(null);
+  const caretRef = useRef(0);
+  const searchQueryRef = useRef('');
+  const onChangeRef = useRef(onChange);
+  onChangeRef.current = onChange;
+
+  const table = tableRef.current;
+  const selectionStart = Math.min(selection.anchor, selection.head);
+  const selectionEnd = Math.max(selection.anchor, selection.head);
+  caretRef.current = selectionStart;
+  searchQueryRef.current = search.query;
+
+  useEffect(() => {
+    workerRef.current = createEditorWorker();
+    workerRef.current.load(tableRef.current.getText());
+    return () => {
+      clearTimeout(emitTimerRef.current);
+      clearTimeout(searchTimerRef.current);
+      workerRef.current.terminate();
+    };
+  }, []);
+
+  useLayoutEffect(() => {
+    if (measureRef.current) {
+      setCharWidth(measureRef.current.getBoundingClientRect().width / 100 || 8);
+    }
+  }, []);
+
+  // Replaced from outside (reset, language switch, voice "clear")
+  useEffect(() => {
+    if (value === lastEmittedRef.current) return;
+    clearTimeout(emitTimerRef.current);
+    dirtyRef.current = false;
+    lastEmittedRef.current = value;
+    tableRef.current = new PieceTable(value);
+    workerRef.current?.load(value);
+    undoRef.current = [];
+    redoRef.current = [];
+    setSelection({ anchor: 0, head: 0 });
+    setVersion(v => v + 1);
+  }, [value]);
+
+  const flush = () => {
+    clearTimeout(emitTimerRef.current);
+    if (!dirtyRef.current) return lastEmittedRef.current;
+    dirtyRef.current = false;
+    const text = tableRef.current.getText();
+    lastEmittedRef.current = text;
+    onChangeRef.current(text);
+    return text;
+  };
+
+  useImperativeHandle(ref, () => ({
+    flush,
+    focus: () => inputRef.current?.focus()
+  }));
+
+  // Keystroke-to-paint: the frame after the commit is the one that shows it
+  useEffect(() => {
+    const started = keystrokeStartRef.current;
+    if (started === null) return;
+    keystrokeStartRef.current = null;
+    requestAnimationFrame(() => setTimeout(() => recordKeystrokeLatency(performance.now() - started), 0));
+  }, [version, selection]);
+
+  // Keep the caret in view after keyboard moves and edits
+  useLayoutEffect(() => {
+    const scroller = scrollerRef.current;
+    if (!scroller) return;
+    const caretTop = tableRef.current.positionAt(selection.head).line * LINE_HEIGHT;
+    if (caretTop < scroller.scrollTop) {
+      scroller.scrollTop = caretTop;
+    } else if (caretTop + LINE_HEIGHT > scroller.scrollTop + scroller.clientHeight) {
+      scroller.scrollTop = caretTop + LINE_HEIGHT - scroller.clientHeight;
+    }
+  }, [selection.head, version]);
+
+  const runSearch = (query, { jump = false } = {}) => {
+    clearTimeout(searchTimerRef.current);
+    searchTimerRef.current = setTimeout(async () => {
+      const { offsets, total } = await workerRef.current.search(query);
+      if (searchQueryRef.current !== query) return;
+      const after = offsets.findIndex(offset => offset >= caretRef.current);
+      const current = offsets.length === 0 ? -1 : (after === -1 ? 0 : after);
+      setSearch(previous => ({ ...previous, offsets, total, current }));
+      if (jump && current !== -1) {
+        setSelection({ anchor: offsets[current], head: offsets[current] + query.length });
+      }
+    }, 100);
+  };
+
+  const pushUndo = (typing) => {
+    const now = performance.now();
+    const grouped = typing && now - lastTypingRef.current < TYPING_GROUP_MS && undoRef.current.length > 0;
+    lastTypingRef.current = typing ? now : 0;
+    if (grouped) return;
+    undoRef.current.push({ snapshot: tableRef.current.snapshot(), selection });
+    if (undoRef.current.length > UNDO_LIMIT) undoRef.current.shift();
+    redoRef.current = [];
+  };
+
+  const scheduleEmit = () => {
+    dirtyRef.current = true;
+    clearTimeout(emitTimerRef.current);
+    emitTimerRef.current = setTimeout(flush, EMIT_DELAY_MS);
+  };
+
+  const replaceRange = (from, to, text, { typing = false, lineStarts = null } = {}) => {
+    const current = tableRef.current;
+    pushUndo(typing);
+    workerRef.current.edit(current.positionAt(from), current.positionAt(to), text);
+    if (to > from) current.delete(from, to - from);
+    if (text) current.insert(from, text, lineStarts);
+    const caret = from + text.length;
+    goalColumnRef.current = null;
+    setSelection({ anchor: caret, head: caret });
+    setVersion(v => v + 1);
+    scheduleEmit();
+    if (search.open && search.query) runSearch(search.query);
+  };
+
+  const replaceSelection = (text, options) => replaceRange(selectionStart, selectionEnd, text, options);
+
+  const restoreFrom = (from, to) => {
+    const entry = from.current.pop();
+    if (!entry) return;
+    to.current.push({ snapshot: tableRef.current.snapshot(), selection });
+    tableRef.current.restore(entry.snapshot);
+    workerRef.current.load(tableRef.current.getText());
+    lastTypingRef.current = 0;
+    setSelection(entry.selection);
+    setVersion(v => v + 1);
+    scheduleEmit();
+  };
+
+  const moveTo = (head, extend) => {
+    setSelection(previous => ({ anchor: extend ? previous.anchor : head, head }));
+  };
+
+  const moveVertically = (lines, extend) => {
+    const { line, column } = table.positionAt(selection.head);
+    const text = table.getLine(line);
+    if (goalColumnRef.current === null) goalColumnRef.current = visualColumn(text, column);
+    const target = Math.max(0, Math.min(table.lineCount - 1, line + lines));
+    const targetText = table.getLine(target);
+    const goal = goalColumnRef.current;
+    moveTo(table.offsetOfLine(target) + columnAtVisual(targetText, goal), extend);
+    goalColumnRef.current = goal;
+  };
+
+  const handleKeyDown = (e) => {
+    keystrokeStartRef.current = performance.now();
+    const mod = e.ctrlKey || e.metaKey;
+    const key = e.key;
+    const { line, column } = table.positionAt(selection.head);
+    const collapsed = selectionStart === selectionEnd;
+    let handled = true;
+
+    if (mod && key.toLowerCase() === 'z') {
+      if (e.shiftKey) restoreFrom(redoRef, undoRef);
+      else restoreFrom(undoRef, redoRef);
+    } else if (mod && key.toLowerCase() === 'y') {
+      restoreFrom(redoRef, undoRef);
+    } else if (mod && key.toLowerCase() === 'a') {
+      setSelection({ anchor: 0, head: table.length });
+    } else if (mod && key.toLowerCase() === 'f') {
+      setSearch(previous => ({ ...previous, open: true }));
+      setTimeout(() => searchInputRef.current?.focus(), 0);
+    } else if (key === 'ArrowLeft') {
+      goalColumnRef.current = null;
+      moveTo(!collapsed && !e.shiftKey ? selectionStart : Math.max(0, selection.head - 1), e.shiftKey);
+    } else if (key === 'ArrowRight') {
+      goalColumnRef.current = null;
+      moveTo(!collapsed && !e.shiftKey ? selectionEnd : Math.min(table.length, selection.head + 1), e.shiftKey);
+    } else if (key === 'ArrowUp') {
+      moveVertically(-1, e.shiftKey);
+    } else if (key === 'ArrowDown') {
+      moveVertically(1, e.shiftKey);
+    } else if (key === 'PageUp' || key === 'PageDown') {
+      const page = Math.max(1, Math.floor(height / LINE_HEIGHT) - 1);
+      moveVertically(key === 'PageUp' ? -page : page, e.shiftKey);
+    } else if (key === 'Home') {
+      goalColumnRef.current = null;
+      moveTo(mod ? 0 : table.offsetOfLine(line), e.shiftKey);
+    } else if (key === 'End') {
+      goalColumnRef.current = null;
+      moveTo(mod ? table.length : table.lineEnd(line), e.shiftKey);
+    } else if (key === 'Backspace') {
+      if (!collapsed) replaceSelection('');
+      else if (selection.head > 0) replaceRange(selection.head - 1, selection.head, '', { typing: true });
+    } else if (key === 'Delete') {
+      if (!collapsed) replaceSelection('');
+      else if (selection.head < table.length) replaceRange(selection.head, selection.head + 1, '', { typing: true });
+    } else if (key === 'Enter') {
+      const text = table.getLine(line);
+      const indent = text.match(/^[ \t]*/)[0];
+      const opensBlock = /[:{[(]\s*$/.test(text.slice(0, column));
+      replaceSelection('\n' + indent + (opensBlock ? ' '.repeat(TAB_SIZE) : ''));
+    } else if (key === 'Tab' && !e.shiftKey) {
+      replaceSelection(' '.repeat(TAB_SIZE - (visualColumn(table.getLine(line), column) % TAB_SIZE)), { typing: true });
+    } else if (key === 'Escape' && search.open) {
+      setSearch(previous => ({ ...previous, open: false }));
+    } else {
+      handled = false;
+    }
+
+    if (handled) e.preventDefault();
+  };
+
+  const handleInput = (e) => {
+    if (e.nativeEvent.isComposing) return;
+    const text = e.target.value;
+    e.target.value = '';
+    if (text) replaceSelection(text, { typing: true });
+  };
+
+  const handleCompositionEnd = (e) => {
+    const text = e.target.value;
+    e.target.value = '';
+    if (text) replaceSelection(text, { typing: true });
+  };
+
+  const handlePaste = async (e) => {
+    e.preventDefault();
+    const text = e.clipboardData.getData('text/plain').replace(/\r\n?/g, '\n');
+    if (!text) return;
+    keystrokeStartRef.current = performance.now();
+    const from = selectionStart;
+    const to = selectionEnd;
+    if (text.length < LARGE_PASTE_CHARS) {
+      replaceRange(from, to, text);
+      return;
+    }
+    // Line starts for big pastes are found in the worker
+    const lineStarts = await workerRef.current.computeLineStarts(text);
+    replaceRange(from, Math.min(to, tableRef.current.length), text, { lineStarts });
+  };
+
+  const handleCopy = (e) => {
+    if (selectionStart === selectionEnd) return;
+    e.preventDefault();
+    e.clipboardData.setData('text/plain', table.substring(selectionStart, selectionEnd));
+  };
+
+  const handleCut = (e) => {
+    if (selectionStart === selectionEnd) return;
+    handleCopy(e);
+    replaceSelection('');
+  };
+
+  const gutterChars = String(table.lineCount).length + 2;
+  const gutterWidth = gutterChars * charWidth;
+
+  const offsetFromPoint = (clientX, clientY) => {
+    const scroller = scrollerRef.current;
+    const rect = scroller.getBoundingClientRect();
+    const y = clientY - rect.top + scroller.scrollTop;
+    const x = clientX - rect.left + scroller.scrollLeft - gutterWidth;
+    const line = Math.max(0, Math.min(table.lineCount - 1, Math.floor(y / LINE_HEIGHT)));
+    return table.offsetOfLine(line) + columnAtVisual(table.getLine(line), Math.max(0, x / charWidth));
+  };
+
+  const handleMouseDown = (e) => {
+    if (e.button !== 0) return;
+    e.preventDefault();
+    inputRef.current?.focus();
+    goalColumnRef.current = null;
+    const head = offsetFromPoint(e.clientX, e.clientY);
+    moveTo(head, e.shiftKey);
+
+    const handleMove = (event) => moveTo(offsetFromPoint(event.clientX, event.clientY), true);
+    const handleUp = () => {
+      window.removeEventListener('mousemove', handleMove);
+      window.removeEventListener('mouseup', handleUp);
+    };
+    window.addEventListener('mousemove', handleMove);
+    window.addEventListener('mouseup', handleUp);
+  };
+
+  const handleSearchChange = (query) => {
+    setSearch(previous => ({ ...previous, query, offsets: [], total: 0, current: -1 }));
+    if (query) runSearch(query, { jump: true });
+  };
+
+  const handleSearchKeyDown = (e) => {
+    if (e.key === 'Escape') {
+      setSearch(previous => ({ ...previous, open: false }));
+      inputRef.current?.focus();
+      return;
+    }
+    if (e.key !== 'Enter' || search.offsets.length === 0) return;
+    e.preventDefault();
+    const step = e.shiftKey ? -1 : 1;
+    const current = (search.current + step + search.offsets.length) % search.offsets.length;
+    setSearch(previous => ({ ...previous, current }));
+    setSelection({ anchor: search.offsets[current], head: search.offsets[current] + search.query.length });
+  };
+
+  const firstLine = Math.max(0, Math.floor(scrollTop / LINE_HEIGHT) - OVERSCAN);
+  const lastLine = Math.min(table.lineCount, Math.ceil((scrollTop + height) / LINE_HEIGHT) + OVERSCAN);
+
+  // Tokens come back from the worker a moment after the edit; until then a
+  // line whose text changed renders plain
+  useEffect(() => {
+    if (!language) return;
+    let cancelled = false;
+    workerRef.current.highlight(language, firstLine, lastLine).then((result) => {
+      if (!cancelled) setHighlights({ from: firstLine, lines: result });
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, [language, version, firstLine, lastLine]);
+
+  const lines = [];
+  for (let line = firstLine; line < lastLine; line++) {
+    const start = table.offsetOfLine(line);
+    const text = table.getLine(line);
+    const highlighted = highlights.lines[line - highlights.from];
+    const tokens = highlighted && highlighted.text === text ? highlighted.tokens : null;
+    let highlight = null;
+    const from = Math.max(selectionStart, start);
+    const to = Math.min(selectionEnd, start + text.length + 1);
+    if (from < to) {
+      const left = visualColumn(text, from - start);
+      const right = visualColumn(text, Math.min(to - start, text.length)) + (to > start + text.length ? 1 : 0);
+      highlight = { left: left * charWidth, width: (right - left) * charWidth };
+    }
+    lines.push({ line, text, tokens, highlight });
+  }
+
+  const caret = table.positionAt(selection.head);
+  const caretLeft = gutterWidth + visualColumn(table.getLine(caret.line), caret.column) * charWidth;
+  const caretTop = caret.line * LINE_HEIGHT;
+
+  return (
+    <div
+      className={`relative rounded-md border border-gray-200 bg-gray-50 text-sm ${isFocused ? 'ring-2 ring-blue-200' : ''} ${className}`}
+      style={{ fontFamily: FONT_FAMILY }}
+    >
+      <span ref={measureRef} className="absolute invisible whitespace-pre" aria-hidden="true">
+        {'x'.repeat(100)}
+      </span>
+
+      {search.open && (
+        <div className="absolute right-3 top-2 z-10 flex items-center gap-2 rounded-md border border-gray-200 bg-white px-2 py-1 shadow">
+          <Search className="w-4 h-4 text-gray-400" />
+          <Input
+            ref={searchInputRef}
+            value={search.query}
+            onChange={(e) => handleSearchChange(e.target.value)}
+            onKeyDown={handleSearchKeyDown}
+            placeholder="Find"
+            className="h-7 w-48 font-mono text-sm"
+          />
+          <span className="text-xs text-gray-500 whitespace-nowrap">
+            {search.total > 0 ? `${search.current + 1} / ${search.total}` : 'No results'}
+          </span>
+          <button
+            type="button"
+            onClick={() => {
+              setSearch(previous => ({ ...previous, open: false }));
+              inputRef.current?.focus();
+            }}
+            className="text-gray-400 hover:text-gray-600"
+            aria-label="Close search"
+          >
+            <X className="w-4 h-4" />
+          </button>
+        </div>
+      )}
+
+      <div
+        ref={scrollerRef}
+        onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}
+        onMouseDown={handleMouseDown}
+        className="relative overflow-auto cursor-text"
+        style={{ height }}
+      >
+        <div className="relative" style={{ height: table.lineCount * LINE_HEIGHT }}>
+          <div className="absolute left-0 right-0" style={{ top: firstLine * LINE_HEIGHT }}>
+            {lines.map(({ line, text, tokens, highlight }) => (
+              <div key={line} className="flex" style={{ height: LINE_HEIGHT, lineHeight: `${LINE_HEIGHT}px` }}>
+                <span
+                  className="sticky left-0 flex-shrink-0 select-none bg-gray-100 pr-2 text-right text-gray-400"
+                  style={{ width: gutterWidth }}
+                >
+                  {line + 1}
+                </span>
+                <span className="relative whitespace-pre text-gray-900" style={{ tabSize: TAB_SIZE }}>
+                  {highlight && (
+                    <span
+                      className="absolute top-0 bottom-0 bg-blue-200"
+                      style={{ left: highlight.left, width: highlight.width }}
+                    />
+                  )}
+                  <span className="relative">
+                    {tokens ? <HighlightedText text={text} tokens={tokens} /> : text}
+                  </span>
+                </span>
+              </div>
+            ))}
+          </div>
+
+          {isFocused && (
+            <div
+              className="absolute w-0.5 bg-gray-900 pointer-events-none"
+              style={{ top: caretTop + 2, left: caretLeft, height: LINE_HEIGHT - 4 }}
+            />
+          )}
+        </div>
+
+        {table.length === 0 && placeholder && (
+          <div className="absolute top-0 pointer-events-none text-gray-400" style={{ left: gutterWidth, lineHeight: `${LINE_HEIGHT}px` }}>
+            {placeholder}
+          </div>
+        )}
+      </div>
+
+      <textarea
+        ref={inputRef}
+        onKeyDown={handleKeyDown}
+        onInput={handleInput}
+        onCompositionEnd={handleCompositionEnd}
+        onPaste={handlePaste}
+        onCopy={handleCopy}
+        onCut={handleCut}
+        onFocus={() => setIsFocused(true)}
+        onBlur={() => {
+          setIsFocused(false);
+          flush();
+        }}
+        className="absolute w-px h-px opacity-0 resize-none overflow-hidden"
+        style={{ top: Math.max(0, Math.min(height - LINE_HEIGHT, caretTop - scrollTop)), left: Math.min(caretLeft, 200) }}
+        autoCapitalize="off"
+        autoComplete="off"
+        autoCorrect="off"
+        spellCheck={false}
+        aria-label="Code editor"
+      />
+    </div>
+  );
+});
+
+export default VirtualCodeEditor;
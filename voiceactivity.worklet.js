@@ -0,0 +1,132 @@
+// Voice activity detection for barge-in. Runs on the audio thread while the
+// app is talking and posts { type: 'speech' } as soon as the student starts
+// to speak: 10 ms frames whose level stays a margin above the tracked noise
+// floor for `onsetMs`. It also keeps the last `preRollMs` of audio,
+// resampled for the recognizer, and from the onset on keeps recording until
+// asked to 'drain', so the words spoken before recognition starts are not
+// lost.
+
+const FRAME_MS = 10;
+// Per-frame weight of a louder frame on the noise floor (about 5 s to settle)
+const FLOOR_RISE = 0.002;
+
+class VoiceActivityProcessor extends AudioWorkletProcessor {
+  constructor({ processorOptions }) {
+    super();
+    this.options = processorOptions;
+    this.frameLength = Math.round(sampleRate * FRAME_MS / 1000);
+    this.onsetFrames = Math.max(1, Math.round(processorOptions.onsetMs / FRAME_MS));
+    this.releaseFrames = Math.max(1, Math.round(processorOptions.releaseMs / FRAME_MS));
+    this.energy = 0;
+    this.frameFilled = 0;
+    this.floor = null;
+    this.voiced = 0;
+    this.silent = 0;
+    this.triggered = false;
+
+    this.ratio = sampleRate / processorOptions.targetRate;
+    this.phase = 0;
+    this.sum = 0;
+    this.count = 0;
+    this.ring = new Float32Array(Math.round(processorOptions.targetRate * processorOptions.preRollMs / 1000));
+    this.ringAt = 0;
+    this.ringFilled = 0;
+    this.capture = null;
+    this.captured = 0;
+
+    this.port.onmessage = (event) => {
+      if (event.data.type === 'drain') this.drain();
+      else if (event.data.type === 'reset') this.reset();
+    };
+  }
+
+  reset() {
+    this.voiced = 0;
+    this.silent = 0;
+    this.triggered = false;
+    this.capture = null;
+    this.ringFilled = 0;
+  }
+
+  // Everything from the start of the pre-roll up to now
+  drain() {
+    const samples = this.capture ? this.capture.slice(0, this.captured) : new Float32Array(0);
+    this.capture = null;
+    this.port.postMessage({ type: 'audio', samples }, [samples.buffer]);
+  }
+
+  startCapture() {
+    this.capture = new Float32Array(Math.round(this.options.targetRate * this.options.maxCaptureMs / 1000));
+    const start = this.ringFilled < this.ring.length ? 0 : this.ringAt;
+    for (let i = 0; i < this.ringFilled; i++) this.capture[i] = this.ring[(start + i) % this.ring.length];
+    this.captured = this.ringFilled;
+  }
+
+  keep(sample) {
+    this.ring[this.ringAt] = sample;
+    this.ringAt = (this.ringAt + 1) % this.ring.length;
+    this.ringFilled = Math.min(this.ringFilled + 1, this.ring.length);
+    if (this.capture && this.captured < this.capture.length) this.capture[this.captured++] = sample;
+  }
+
+  endFrame() {
+    const level = 10 * Math.log10(this.energy / this.frameLength + 1e-10);
+    this.energy = 0;
+    this.frameFilled = 0;
+
+    if (this.floor === null || level < this.floor) {
+      this.floor = this.floor === null ? level : (this.floor + level) / 2;
+    } else {
+      this.floor += (level - this.floor) * FLOOR_RISE;
+    }
+
+    const speech = level > this.options.minDb && level > this.floor + this.options.thresholdDb;
+    if (speech) {
+      this.voiced++;
+      this.silent = 0;
+    } else {
+      this.voiced = 0;
+      this.silent++;
+    }
+
+    if (!this.triggered && this.voiced >= this.onsetFrames) {
+      this.triggered = true;
+      this.startCapture();
+      // currentTime is the end of this render quantum; the onset was
+      // `onsetFrames` frames ago
+      this.port.postMessage({ type: 'speech', time: currentTime - this.onsetFrames * FRAME_MS / 1000, level });
+    } else if (this.triggered && this.silent >= this.releaseFrames) {
+      this.triggered = false;
+      this.port.postMessage({ type: 'silence', time: currentTime });
+    }
+  }
+
+  process(inputs) {
+    const channels = inputs[0];
+    if (!channels || channels.length === 0) return true;
+
+    const frames = channels[0].length;
+    for (let i = 0; i < frames; i++) {
+      let value = 0;
+      for (let c = 0; c < channels.length; c++) value += channels[c][i];
+      value /= channels.length;
+
+      this.energy += value * value;
+      if (++this.frameFilled === this.frameLength) this.endFrame();
+
+      // Same averaging resampler as the capture worklet
+      this.sum += value;
+      this.count++;
+      this.phase++;
+      if (this.phase >= this.ratio) {
+        this.phase -= this.ratio;
+        this.keep(this.sum / this.count);
+        this.sum = 0;
+        this.count = 0;
+      }
+    }
+    return true;
+  }
+}
+
+registerProcessor('voice-activity', VoiceActivityProcessor);
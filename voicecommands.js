@@ -0,0 +1,180 @@
+// Streaming voice commands. Phrases are compiled into a word trie; interim
+// recognition results are matched against it as they arrive, and a command
+// fires as soon as nothing the user might still say could change it, often
+// before the recognizer has even decided the user stopped talking. Only an
+// utterance that is a phrase or starts with one is a command, so "what color
+// is the text" stays dictation. Words of seven letters or more also match
+// by sound, so "analyse", "analyzed" and "annalize" all reach "analyze";
+// shorter words, and every word of a command marked `exact`, must be heard
+// exactly ("clean up my code" is not "clear"). Commands marked `final`
+// change the code or leave the page, and wait for the final result.
+
+// Available on every page; the command name carries the target page
+export const NAVIGATION_COMMANDS = [
+  { name: 'navigate:Dashboard', phrases: ['go to dashboard', 'open dashboard', 'go home'], final: true },
+  { name: 'navigate:Debugger', phrases: ['go to debugger', 'open debugger', 'open the debugger'], final: true },
+  { name: 'navigate:Tutorials', phrases: ['go to tutorials', 'open tutorials', 'show tutorials'], final: true },
+  { name: 'navigate:Progress', phrases: ['go to progress', 'open progress', 'show my progress'], final: true },
+  { name: 'navigate:Settings', phrases: ['go to settings', 'open settings', 'voice settings'], final: true }
+];
+
+// The page a navigation command goes to, or null
+export const commandPage = (name) => (name.startsWith('navigate:') ? name.slice('navigate:'.length) : null);
+
+export const DEBUGGER_COMMANDS = [
+  { name: 'analyze', phrases: ['analyze', 'analyze my code', 'help', 'help me', 'get help', 'check my code', 'debug'], final: true },
+  { name: 'clear', phrases: ['clear', 'clear code', 'clear everything', 'start over'], final: true, exact: true },
+  { name: 'explain', phrases: ['explain again', 'repeat explanation', 'read explanation', 'say that again'] },
+  { name: 'stop', phrases: ['stop', 'stop talking', 'stop speaking', 'be quiet'], exact: true },
+  { name: 'skip', phrases: ['skip', 'next sentence'] },
+  { name: 'replay', phrases: ['repeat', 'repeat that', 'go back'] },
+  ...NAVIGATION_COMMANDS
+];
+
+const MAX_LATENCIES = 200;
+
+const stats = {
+  commands: 0,
+  firedOnInterim: 0,
+  firedOnFinal: 0,
+  dictations: 0
+};
+let latencies = [];
+
+export const normalizeWords = (text) =>
+  (text || '').toLowerCase().replace(/[^\p{L}\p{N}'\s]/gu, ' ').split(/\s+/).filter(Boolean);
+
+// Words shorter than this are matched by exact spelling only
+const FUZZY_MIN_LENGTH = 7;
+
+// Rough sound-alike key: common spellings of the same sound are folded
+// together. Vowels are kept, so "scope" and "skip" stay apart.
+export const phoneticKey = (word) => word
+  .replace(/'/g, '')
+  .replace(/(ed|ing|s)$/, (suffix) => (word.length > suffix.length + 3 ? '' : suffix))
+  .replace(/ph/g, 'f')
+  .replace(/ck/g, 'k')
+  .replace(/c(?=[eiy])/g, 's')
+  .replace(/[cq]/g, 'k')
+  .replace(/x/g, 'ks')
+  .replace(/z/g, 's')
+  .replace(/dg/g, 'j')
+  .replace(/([^aeiou])h/g, '$1')
+  .replace(/y/g, 'i')
+  .replace(/(.)\1+/g, '$1')
+  .replace(/(.)e$/, '$1');
+
+const matchWord = (heard, { word, key, fuzzy }) =>
+  heard === word || (fuzzy && heard.length >= FUZZY_MIN_LENGTH && phoneticKey(heard) === key);
+
+const createNode = () => ({ children: [], command: null, outcomes: new Set() });
+
+export const compileCommands = (commands) => {
+  const root = createNode();
+  for (const { name, phrases, exact = false } of commands) {
+    for (const phrase of phrases) {
+      let node = root;
+      for (const word of normalizeWords(phrase)) {
+        const fuzzy = !exact && word.length >= FUZZY_MIN_LENGTH;
+        let edge = node.children.find(child => child.word === word);
+        if (!edge) {
+          edge = { word, key: phoneticKey(word), fuzzy, node: createNode() };
+          node.children.push(edge);
+        }
+        // A word shared with an exact command stays exact
+        edge.fuzzy = edge.fuzzy && fuzzy;
+        node = edge.node;
+        node.outcomes.add(name);
+      }
+      node.command = name;
+    }
+  }
+  return root;
+};
+
+// Command phrases at the start of `words`, longest last, and the commands
+// of longer phrases still in progress at the end of the words (including
+// one whose last word is only partly heard).
+const walk = (root, words) => {
+  const matches = [];
+  const pending = new Set();
+  let nodes = [root];
+  for (let i = 0; i < words.length && nodes.length > 0; i++) {
+    const next = [];
+    for (const node of nodes) {
+      for (const edge of node.children) {
+        if (matchWord(words[i], edge)) next.push(edge.node);
+        else if (i === words.length - 1 && edge.word.startsWith(words[i])) {
+          edge.node.outcomes.forEach(name => pending.add(name));
+        }
+      }
+    }
+    for (const node of next) {
+      if (node.command) matches.push(node);
+      if (i === words.length - 1) {
+        node.children.forEach(edge => edge.node.outcomes.forEach(name => pending.add(name)));
+      }
+    }
+    nodes = next;
+  }
+  return { matches, pending };
+};
+
+// Feed it every interim and final transcript of one utterance; it returns
+// a command at most once per utterance.
+export class CommandRecognizer {
+  constructor(commands = DEBUGGER_COMMANDS, { now = () => performance.now() } = {}) {
+    this.root = compileCommands(commands);
+    this.finalOnly = new Set(commands.filter(command => command.final).map(command => command.name));
+    this.now = now;
+    this.reset();
+  }
+
+  reset() {
+    this.fired = null;
+    this.firedAt = null;
+    this.speechEndedAt = null;
+  }
+
+  // The recognizer's speechend event: the reference point for latency.
+  speechEnded() {
+    if (this.speechEndedAt !== null) return;
+    this.speechEndedAt = this.now();
+    if (this.firedAt !== null) recordLatency(this.firedAt - this.speechEndedAt);
+  }
+
+  feed(transcript, { final = false } = {}) {
+    if (this.fired) return null;
+    const { matches, pending } = walk(this.root, normalizeWords(transcript));
+    // The longest phrase wins once it is settled: every longer phrase that
+    // could still be completed means the same thing
+    const match = matches[matches.length - 1];
+    if (match && (final || (!this.finalOnly.has(match.command) && [...pending].every(name => name === match.command)))) {
+      return this.fire(match.command, final);
+    }
+    if (final) stats.dictations++;
+    return null;
+  }
+
+  fire(name, final) {
+    this.fired = { name };
+    this.firedAt = this.now();
+    stats.commands++;
+    if (final) stats.firedOnFinal++;
+    else stats.firedOnInterim++;
+    if (this.speechEndedAt !== null) recordLatency(this.firedAt - this.speechEndedAt);
+    return this.fired;
+  }
+}
+
+const recordLatency = (ms) => {
+  latencies.push(ms);
+  if (latencies.length > MAX_LATENCIES) latencies = latencies.slice(-MAX_LATENCIES);
+};
+
+// Negative latencies are commands that fired before the user stopped talking.
+export const getVoiceCommandStats = () => {
+  const sorted = [...latencies].sort((a, b) => a - b);
+  const at = (p) => (sorted.length > 0 ? sorted[Math.min(sorted.length - 1, Math.floor(p * sorted.length))] : null);
+  return { ...stats, latencyP50Ms: at(0.5), latencyP95Ms: at(0.95), latencySamples: sorted.length };
+};
@@ -1,94 +1,65 @@
-import React, { useState, useRef, useEffect, useCallback, forwardRef, useImperativeHandle } from 'react';
+import React, { useEffect, useCallback, forwardRef, useImperativeHandle } from 'react';
 import { Button } from "@/components/ui/button";
 import { Card, CardContent } from "@/components/ui/card";
-import { Mic, MicOff, Volume2, VolumeX } from "lucide-react";
+import { Volume2, VolumeX, SkipForward, RotateCcw } from "lucide-react";
 import { Badge } from "@/components/ui/badge";
+import { countRender } from "../debugger/renderProbe";
+import { speechQueue, useSpeechQueue } from "./speechQueue";
+import { recognitionService, useRecognitionState, useVoiceCommands } from "./speechRecognition";
+import ListenButton from "./ListenButton";
 
 const VoiceControls = forwardRef(({ 
   onSpeechResult, 
+  onCommand,
+  isQuestion,
+  commands,
   voiceEnabled, 
   speechRate = 1.0 
 }, ref) => {
-  const [isListening, setIsListening] = useState(false);
-  const [isSpeaking, setIsSpeaking] = useState(false);
-  const [speechSupported, setSpeechSupported] = useState(false);
-  const recognitionRef = useRef(null);
+  countRender('VoiceControls');
+  const { supported: speechSupported, listening: isListening } = useRecognitionState();
+  const speech = useSpeechQueue();
+  const isSpeaking = speech.active;
 
+  // The queue's synth is the browser's or the on-device engine, whichever
+  // is selected
   const speak = useCallback((text) => {
-    if (!voiceEnabled || !('speechSynthesis' in window)) return;
+    if (!voiceEnabled || !speechQueue.getSynth()) return;
+    speechQueue.speak(text, { rate: speechRate, volume: 0.8 });
+  }, [voiceEnabled, speechRate]);
 
-    // Stop any ongoing speech
-    window.speechSynthesis.cancel();
-    
-    const utterance = new SpeechSynthesisUtterance(text);
-    utterance.rate = speechRate;
-    utterance.pitch = 1;
-    utterance.volume = 0.8;
-    
-    utterance.onstart = () => setIsSpeaking(true);
-    utterance.onend = () => setIsSpeaking(false);
-    utterance.onerror = () => setIsSpeaking(false);
-    
-    window.speechSynthesis.speak(utterance);
+  // For text that is still being generated: beginStream() when the request
+  // starts, then feedStream() with the text so far, final on the last call
+  const beginStream = useCallback(() => {
+    if (!voiceEnabled || !speechQueue.getSynth()) return;
+    speechQueue.begin({ rate: speechRate, volume: 0.8 });
   }, [voiceEnabled, speechRate]);
 
+  const feedStream = useCallback((text, options) => {
+    speechQueue.feed(text, options);
+  }, []);
+
   const stopSpeaking = useCallback(() => {
-    window.speechSynthesis.cancel();
-    setIsSpeaking(false);
+    speechQueue.stop();
   }, []);
 
   // Expose speak function to parent component
   useImperativeHandle(ref, () => ({
     speak,
+    beginStream,
+    feedStream,
     stopSpeaking
-  }), [speak, stopSpeaking]);
-
-  useEffect(() => {
-    // Check for speech recognition support
-    const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
-    setSpeechSupported(!!SpeechRecognition);
-
-    if (SpeechRecognition) {
-      recognitionRef.current = new SpeechRecognition();
-      recognitionRef.current.continuous = false;
-      recognitionRef.current.interimResults = false;
-      recognitionRef.current.lang = 'en-US';
-
-      recognitionRef.current.onstart = () => {
-        setIsListening(true);
-      };
-
-      recognitionRef.current.onresult = (event) => {
-        const transcript = event.results[0][0].transcript;
-        onSpeechResult && onSpeechResult(transcript);
-        setIsListening(false);
-      };
-
-      recognitionRef.current.onerror = (event) => {
-        console.error('Speech recognition error:', event.error);
-        setIsListening(false);
-      };
+  }), [speak, beginStream, feedStream, stopSpeaking]);
 
-      recognitionRef.current.onend = () => {
-        setIsListening(false);
-      };
-    }
-  }, [onSpeechResult]);
+  // Results reach this page through the shared, long-lived recognizer
+  useVoiceCommands({ commands, onCommand, onSpeechResult, isQuestion });
 
-  const startListening = () => {
-    if (recognitionRef.current && !isListening) {
-      recognitionRef.current.start();
-    }
-  };
-
-  const stopListening = () => {
-    if (recognitionRef.current && isListening) {
-      recognitionRef.current.stop();
-      setIsListening(false);
-    }
-  };
+  // Turning voice off also releases the microphone
+  useEffect(() => {
+    if (!voiceEnabled) recognitionService.stop();
+  }, [voiceEnabled]);
 
-  if (!speechSupported && !('speechSynthesis' in window)) {
+  if (!speechSupported && !speechQueue.getSynth()) {
     return (
       <Card className="border-amber-200 bg-amber-50">
         <CardContent className="p-4">
@@ -102,18 +73,7 @@ const VoiceControls = forwardRef(({
 
   return (
     <div className="flex items-center gap-3">
-      <Button
-        variant={isListening ? "default" : "outline"}
-        size="sm"
-        onClick={isListening ? stopListening : startListening}
-        disabled={!voiceEnabled || !speechSupported}
-        className={`flex items-center gap-2 ${
-          isListening ? 'bg-red-500 hover:bg-red-600 text-white animate-pulse' : ''
-        }`}
-      >
-        {isListening ? <MicOff className="w-4 h-4" /> : <Mic className="w-4 h-4" />}
-        {isListening ? 'Stop Listening' : 'Start Voice'}
-      </Button>
+      <ListenButton disabled={!voiceEnabled} />
 
       <Button
         variant={isSpeaking ? "default" : "outline"}
@@ -126,6 +86,27 @@ const VoiceControls = forwardRef(({
         {isSpeaking ? 'Stop Speaking' : 'Text-to-Speech'}
       </Button>
 
+      {isSpeaking && (
+        <>
+          <Button
+            variant="outline"
+            size="icon"
+            onClick={() => speechQueue.replay()}
+            title="Replay sentence"
+          >
+            <RotateCcw className="w-4 h-4" />
+          </Button>
+          <Button
+            variant="outline"
+            size="icon"
+            onClick={() => speechQueue.skip()}
+            title="Skip sentence"
+          >
+            <SkipForward className="w-4 h-4" />
+          </Button>
+        </>
+      )}
+
       {isListening && (
         <Badge variant="secondary" className="animate-pulse">
           Listening...
@@ -134,11 +115,11 @@ const VoiceControls = forwardRef(({
       
       {isSpeaking && (
         <Badge variant="secondary" className="animate-pulse">
-          Speaking...
+          {speech.speaking ? `Speaking ${speech.index + 1}/${speech.total}...` : 'Preparing speech...'}
         </Badge>
       )}
     </div>
   );
 });
 
-export default VoiceControls;
\ No newline at end of file
+export default React.memo(VoiceControls);
\ No newline at end of file
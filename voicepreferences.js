@@ -0,0 +1,12 @@
+import { recognitionService } from "./speechRecognition";
+import { setSpeechEngine } from "./localSpeech";
+import { bargeIn, wantsBargeIn } from "./bargeIn";
+
+// Points the shared recognizer and speech queue at the engines the user
+// picked in Settings. Called wherever the profile is loaded or saved.
+export const applyVoicePreferences = (user) => {
+  if (!user) return;
+  recognitionService.setBackend(user.speech_backend);
+  setSpeechEngine(user.speech_engine, { level: user.programming_level || 'beginner' });
+  bargeIn.setEnabled(user.voice_enabled !== false && wantsBargeIn(user));
+};